@@ -0,0 +1,18 @@
+"""Celery config for Airflow, selected with AIRFLOW__CELERY__CELERY_CONFIG_OPTIONS.
+
+Airflow's config sections only hold strings, so the broker transport options
+(which include the ``predefined_queues`` mapping of queue names to SQS URLs)
+are passed as JSON in CELERY_BROKER_TRANSPORT_OPTIONS and merged in here.
+"""
+import json
+import os
+
+from airflow.config_templates.default_celery import DEFAULT_CELERY_CONFIG
+
+CELERY_CONFIG = {
+    **DEFAULT_CELERY_CONFIG,
+    "broker_transport_options": {
+        **DEFAULT_CELERY_CONFIG.get("broker_transport_options", {}),
+        **json.loads(os.environ.get("CELERY_BROKER_TRANSPORT_OPTIONS", "{}")),
+    },
+}
@@ -0,0 +1,16 @@
+#!/usr/bin/env bash
+
+# This script is run once per deploy to migrate the database and create the admin user
+set -Eeuxo pipefail
+source /readiness.sh
+wait_for_db
+airflow db upgrade
+startup_mark "database migrated"
+airflow users create \
+  --username admin \
+  --firstname admin \
+  --lastname admin \
+  --role Admin \
+  --email "testemail@test.de" \
+  --password "${ADMIN_PASSWORD}"
+startup_mark "admin user created"
@@ -0,0 +1,44 @@
+#!/usr/bin/env bash
+
+# Readiness checks sourced by the entry scripts, so components start as soon as
+# their dependencies are up instead of after a fixed sleep
+STARTUP_BEGIN=$(date +%s)
+READINESS_TIMEOUT=${READINESS_TIMEOUT:-600}
+READINESS_INTERVAL=${READINESS_INTERVAL:-2}
+
+# Log seconds since the entry script started, e.g. `startup_mark "db reachable"`
+startup_mark() {
+  echo "startup: $1 after $(($(date +%s) - STARTUP_BEGIN))s"
+}
+
+# Retry a command until it succeeds or READINESS_TIMEOUT passes
+wait_until() {
+  local description=$1
+  shift
+  until "$@"; do
+    if (($(date +%s) - STARTUP_BEGIN > READINESS_TIMEOUT)); then
+      echo "startup: gave up waiting for ${description}" >&2
+      return 1
+    fi
+    sleep "${READINESS_INTERVAL}"
+  done
+  startup_mark "${description}"
+}
+
+wait_for_db() {
+  wait_until "database reachable" airflow db check
+}
+
+wait_for_migrations() {
+  wait_for_db || return 1
+  airflow db check-migrations --migration-wait-timeout "${READINESS_TIMEOUT}" || return 1
+  startup_mark "migrations applied"
+}
+
+wait_for_broker() {
+  wait_until "broker reachable" python3 -c "
+from airflow.executors.celery_executor import app
+with app.connection_for_write() as connection:
+    connection.ensure_connection(max_retries=1)
+"
+}
@@ -2,5 +2,7 @@
 
 # This script is used to start the scheduler in a docker container
 set -Eeuxo pipefail
-sleep 30
-airflow scheduler
+source /readiness.sh
+wait_for_migrations
+startup_mark "starting scheduler"
+exec airflow scheduler
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+
+# This script is used to start the triggerer in a docker container
+set -Eeuxo pipefail
+source /readiness.sh
+wait_for_migrations
+startup_mark "starting triggerer"
+exec airflow triggerer
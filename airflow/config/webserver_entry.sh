@@ -2,14 +2,7 @@
 
 # This script is used to start the webserver in a docker container
 set -Eeuxo pipefail
-airflow db init
-sleep 5
-airflow users create \
-  --username admin \
-  --firstname admin \
-  --lastname admin \
-  --role Admin \
-  --email "testemail@test.de" \
-  --password "${ADMIN_PASSWORD}"
-sleep 5
-airflow webserver
+source /readiness.sh
+wait_for_migrations
+startup_mark "starting webserver"
+exec airflow webserver
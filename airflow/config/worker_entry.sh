@@ -3,5 +3,32 @@
 # This script is used to start the worker in a docker container
 
 set -Eeuxo pipefail
-sleep 30
-airflow celery worker
\ No newline at end of file
+source /readiness.sh
+wait_for_migrations
+wait_for_broker
+startup_mark "starting worker"
+
+# Worker pools only consume their own queue, set through CELERY_QUEUES.
+# The container health check probes the process in the pid file.
+airflow celery worker --pid /tmp/airflow-worker.pid ${CELERY_QUEUES:+--queues "${CELERY_QUEUES}"} &
+WORKER_PID=$!
+
+# ECS sends SIGTERM on scale-in and Spot reclaims, followed by SIGKILL after the
+# container stop timeout. Pass it on as Celery's warm shutdown, which stops
+# taking new tasks and lets running ones finish; tasks still running at SIGKILL
+# are not acknowledged, so they are delivered again.
+warm_shutdown() {
+  echo "SIGTERM received, starting Celery warm shutdown"
+  kill -TERM "${WORKER_PID}" 2>/dev/null || true
+}
+trap warm_shutdown TERM INT
+
+# wait returns early when a trapped signal arrives, so wait again for the worker to exit
+set +e
+wait "${WORKER_PID}"
+status=$?
+while kill -0 "${WORKER_PID}" 2>/dev/null; do
+  wait "${WORKER_PID}"
+  status=$?
+done
+exit "${status}"
@@ -0,0 +1,206 @@
+"""Runs the DagTasksConstruct task families on Fargate.
+
+The ECS tasks are started in deferrable mode: once RunTask returns, the
+operator hands the wait over to the triggerer, so no Celery worker slot is
+held for the lifetime of the Fargate task.
+
+``airflow_on_fargate_numbers_sharded`` fans the range out over
+``params.shards`` Fargate tasks per parity with dynamic task mapping, then
+fans back in to a single ordered merge. The shards hand their numbers to the
+merge as binary ``.npy`` arrays, which it memory-maps instead of parsing text.
+
+DAGs with their own EFS access point run the task families mounting it, and
+with per-run directories every run keeps its files under its run id.
+"""
+import os
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.decorators import task
+from airflow.providers.amazon.aws.operators.ecs import EcsRunTaskOperator
+
+# Exported into the Airflow containers by AirflowConstruct
+CLUSTER = os.environ.get("CLUSTER", "")
+SUBNETS = [subnet for subnet in os.environ.get("SUBNETS", "").split(",") if subnet]
+SECURITY_GROUP = os.environ.get("SECURITY_GROUP", "")
+ACCESS_POINT_DAGS = [
+    dag
+    for dag in os.environ.get("SHARED_VOLUME_ACCESS_POINT_DAGS", "").split(",")
+    if dag
+]
+PER_RUN_DIRECTORIES = os.environ.get("SHARED_VOLUME_PER_RUN_DIRECTORIES") == "True"
+
+# Must match DagTasksConstruct
+COMBINED_TASK_FAMILY = "AirflowOnFargateCombinedTask"
+COMBINED_TASK_CONTAINER = "MultiTaskContainer"
+SINGLE_TASK_FAMILY = "AirflowOnFargateSingleTask"
+SINGLE_TASK_CONTAINER = "SingleTaskContainer"
+LOG_GROUP = "AirflowOnFargateDagTaskLogGroup"
+LOG_STREAM_PREFIX = "AirflowOnFargateDagTaskLogging"
+
+NETWORK_CONFIGURATION = {
+    "awsvpcConfiguration": {
+        "subnets": SUBNETS,
+        "securityGroups": [SECURITY_GROUP],
+        "assignPublicIp": "DISABLED",
+    }
+}
+
+
+def task_family(family: str, dag_id: str) -> str:
+    """Return the variant of ``family`` mounting the access point of ``dag_id``, if it has one.
+
+    Must match ``dag_task_family`` in DagTasksConstruct.
+    """
+    return f"{family}-{dag_id}" if dag_id in ACCESS_POINT_DAGS else family
+
+
+def run_directory_args(run_id: str = "{{ run_id }}") -> list:
+    return ["--run-id", run_id] if PER_RUN_DIRECTORIES else []
+
+
+def container_overrides(container: str, command: list) -> dict:
+    return {"containerOverrides": [{"name": container, "command": command}]}
+
+
+def fargate_task_kwargs(family: str, container: str) -> dict:
+    return dict(
+        cluster=CLUSTER,
+        task_definition=family,
+        launch_type="FARGATE",
+        network_configuration=NETWORK_CONFIGURATION,
+        awslogs_group=LOG_GROUP,
+        awslogs_stream_prefix=f"{LOG_STREAM_PREFIX}/{container}",
+        deferrable=True,
+        waiter_delay=15,
+        waiter_max_attempts=240,
+    )
+
+
+def fargate_task(
+    task_id: str, family: str, container: str, command: list, **kwargs
+) -> EcsRunTaskOperator:
+    return EcsRunTaskOperator(
+        task_id=task_id,
+        overrides=container_overrides(container, command),
+        **fargate_task_kwargs(family, container),
+        **kwargs,
+    )
+
+
+@task
+def plan_shards(number, shards, run_id) -> list:
+    """Return one RunTask override per (script, shard) pair covering ``range(number)``."""
+    return [
+        container_overrides(
+            COMBINED_TASK_CONTAINER,
+            [
+                "python",
+                script,
+                str(number),
+                "--part-index",
+                str(index),
+                "--part-count",
+                str(shards),
+                "--quiet",
+                "--format",
+                "npy",
+                *run_directory_args(run_id),
+            ],
+        )
+        for script in ("even_numbers.py", "odd_numbers.py")
+        for index in range(int(shards))
+    ]
+
+
+with DAG(
+    dag_id="airflow_on_fargate_numbers",
+    description="Write even and odd numbers on Fargate, then merge them",
+    start_date=datetime(2023, 1, 1),
+    schedule=None,
+    catchup=False,
+    params={"number": 10},
+    default_args={"retries": 1, "retry_delay": timedelta(minutes=1)},
+    tags=["fargate"],
+) as dag:
+    even_numbers = fargate_task(
+        "even_numbers",
+        task_family(COMBINED_TASK_FAMILY, dag.dag_id),
+        COMBINED_TASK_CONTAINER,
+        [
+            "python",
+            "even_numbers.py",
+            "{{ params.number }}",
+            "--quiet",
+            *run_directory_args(),
+        ],
+    )
+    odd_numbers = fargate_task(
+        "odd_numbers",
+        task_family(COMBINED_TASK_FAMILY, dag.dag_id),
+        COMBINED_TASK_CONTAINER,
+        [
+            "python",
+            "odd_numbers.py",
+            "{{ params.number }}",
+            "--quiet",
+            *run_directory_args(),
+        ],
+    )
+    merge_numbers = fargate_task(
+        "merge_numbers",
+        task_family(SINGLE_TASK_FAMILY, dag.dag_id),
+        SINGLE_TASK_CONTAINER,
+        [
+            "python",
+            "number_pipeline.py",
+            "{{ params.number }}",
+            "--summary-only",
+            *run_directory_args(),
+        ],
+    )
+
+    [even_numbers, odd_numbers] >> merge_numbers
+
+
+with DAG(
+    dag_id="airflow_on_fargate_numbers_sharded",
+    description="Fan even and odd numbers out over parallel Fargate tasks, then merge them",
+    start_date=datetime(2023, 1, 1),
+    schedule=None,
+    catchup=False,
+    params={"number": 1_000_000, "shards": 4},
+    default_args={"retries": 1, "retry_delay": timedelta(minutes=1)},
+    tags=["fargate"],
+) as sharded_dag:
+    generate_shards = EcsRunTaskOperator.partial(
+        task_id="generate_shard",
+        **fargate_task_kwargs(
+            task_family(COMBINED_TASK_FAMILY, sharded_dag.dag_id),
+            COMBINED_TASK_CONTAINER,
+        ),
+    ).expand(
+        overrides=plan_shards(
+            "{{ params.number }}", "{{ params.shards }}", "{{ run_id }}"
+        )
+    )
+    merge_shards = fargate_task(
+        "merge_shards",
+        task_family(SINGLE_TASK_FAMILY, sharded_dag.dag_id),
+        SINGLE_TASK_CONTAINER,
+        [
+            "python",
+            "number_pipeline.py",
+            "{{ params.number }}",
+            "--parts",
+            "{{ params.shards }}",
+            "--mode",
+            "ordered",
+            "--format",
+            "npy",
+            "--summary-only",
+            *run_directory_args(),
+        ],
+    )
+
+    generate_shards >> merge_shards
@@ -3,12 +3,21 @@
 import aws_cdk as cdk
 
 from infrastructure.AirflowOnFargateStack import AirflowOnFargateStack
+from infrastructure.capacity import load_workload_profile, plan_capacity
 
 app = cdk.App()
 
+# Size the deployment for -c workload='{...}' or -c workload_profile=<file.json>,
+# see infrastructure/capacity.py
+workload_profile = load_workload_profile(
+    app.node.try_get_context("workload"),
+    app.node.try_get_context("workload_profile"),
+)
+
 AirflowOnFargateStack(
     app,
     "AirflowOnFargateStack",
+    capacity_plan=plan_capacity(workload_profile) if workload_profile else None,
 )
 
 app.synth()
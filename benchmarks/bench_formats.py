@@ -0,0 +1,58 @@
+"""Benchmark: text vs. binary .npy intermediate files between the task scripts.
+
+For every format and merge mode the even/odd scripts write their files, then
+number_pipeline.py merges them, each as its own process like the Fargate tasks. It
+reports the bytes on disk handed from the generators to the merge step and the
+generate, merge and end-to-end times.
+
+Usage: python -m benchmarks.bench_formats [--sizes 1e6 1e7] [--modes concat ordered]
+"""
+import tempfile
+from argparse import ArgumentParser
+
+from benchmarks.bench_pipeline import STAGES, directory_size, run_stage, scratch_root
+
+FORMATS = ("text", "npy")
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e6, 1e7])
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=("concat", "ordered"),
+        default=["concat", "ordered"],
+    )
+    args = parser.parse_args()
+    (_, even_script), (_, odd_script), (_, merge_script) = STAGES
+
+    print(
+        f"{'N':>12} {'format':<6} {'mode':<8} {'bytes on disk':>14} "
+        f"{'generate s':>11} {'merge s':>9} {'total s':>9}"
+    )
+    for size in args.sizes:
+        number = int(size)
+        for fmt in FORMATS:
+            for mode in args.modes:
+                with tempfile.TemporaryDirectory(dir=scratch_root()) as volume_root:
+                    generator_args = ["--quiet", "--format", fmt]
+                    generate = sum(
+                        run_stage(script, number, volume_root, generator_args)[0]
+                        for script in (even_script, odd_script)
+                    )
+                    size_on_disk = directory_size(volume_root)
+                    merge, _ = run_stage(
+                        merge_script,
+                        number,
+                        volume_root,
+                        ["--summary-only", "--format", fmt, "--mode", mode],
+                    )
+                print(
+                    f"{number:>12} {fmt:<6} {mode:<8} {size_on_disk:>14,} "
+                    f"{generate:>11.3f} {merge:>9.3f} {generate + merge:>9.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
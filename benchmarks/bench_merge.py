@@ -0,0 +1,68 @@
+"""Benchmark: merge stage modes vs. the original line-by-line copy in number_pipeline.py.
+
+Usage: python -m benchmarks.bench_merge [--sizes 1e6 1e7]
+"""
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+sys.path.insert(0, os.path.join(TASKS_DIR, "multi_task"))
+sys.path.insert(0, os.path.join(TASKS_DIR, "single_task"))
+
+from merge import merge  # noqa: E402
+from number_writer import write_numbers  # noqa: E402
+
+
+def line_by_line(sources, destination: str, log) -> None:
+    # The copy and echo the merge script used to run, kept here as the baseline
+    f_numbers = open(destination, "a")
+    for source in sources:
+        f_source = open(source, "r")
+        for line in f_source:
+            f_numbers.write(line)
+        f_source.close()
+    f_numbers.close()
+    f_numbers = open(destination, "r")
+    for line in f_numbers:
+        print(line, file=log)
+        print("\n", file=log)
+    f_numbers.close()
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e6, 1e7])
+    args = parser.parse_args()
+
+    print(f"{'N':>12} {'variant':<14} {'seconds':>9} {'MB/s':>9}")
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        sources = [os.path.join(tmp, "even.txt"), os.path.join(tmp, "odd.txt")]
+        destination = os.path.join(tmp, "numbers.txt")
+        for size in args.sizes:
+            number = int(size)
+            total = sum(
+                write_numbers(source, start, number, sample=0)
+                for start, source in enumerate(sources)
+            )
+            variants = [
+                ("line-by-line", lambda: line_by_line(sources, destination, devnull)),
+                ("concat", lambda: merge(sources, destination, mode="concat")),
+                ("ordered", lambda: merge(sources, destination, mode="ordered")),
+            ]
+            for name, variant in variants:
+                if os.path.exists(destination):
+                    os.remove(destination)
+                started = time.perf_counter()
+                variant()
+                seconds = time.perf_counter() - started
+                print(
+                    f"{number:>12} {name:<14} {seconds:>9.3f} {total / seconds / 1e6:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
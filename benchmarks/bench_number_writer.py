@@ -0,0 +1,68 @@
+"""Micro-benchmark: batched number writer vs. the original per-item loop.
+
+Usage: python -m benchmarks.bench_number_writer [--sizes 1e6 1e7 1e8]
+"""
+import os
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+sys.path.insert(0, os.path.join(TASKS_DIR, "multi_task"))
+
+from number_writer import write_numbers  # noqa: E402
+
+
+def per_item_loop(file_path: str, number: int, log) -> None:
+    # The loop even_numbers.py used to run, kept here as the baseline
+    f = open(file_path, "a")
+    for i in range(int(number)):
+        if i % 2 == 0:
+            f.write(str(i))
+            print(i, file=log)
+    f.close()
+
+
+def timed(fn, *args, **kwargs) -> float:
+    started = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e6, 1e7, 1e8])
+    parser.add_argument(
+        "--baseline-max",
+        help="skip the per-item baseline above this size",
+        type=float,
+        default=1e7,
+    )
+    args = parser.parse_args()
+
+    print(f"{'N':>12} {'variant':<18} {'seconds':>9} {'numbers/s':>14}")
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        path = os.path.join(tmp, "even.txt")
+        for size in args.sizes:
+            number = int(size)
+            variants = [
+                ("batched (echo)", lambda: write_numbers(path, 0, number, log=devnull)),
+                ("batched (quiet)", lambda: write_numbers(path, 0, number, sample=0)),
+            ]
+            if number <= args.baseline_max:
+                variants.insert(
+                    0, ("per-item loop", lambda: per_item_loop(path, number, devnull))
+                )
+            for name, variant in variants:
+                if os.path.exists(path):
+                    os.remove(path)
+                seconds = timed(variant)
+                print(
+                    f"{number:>12} {name:<18} {seconds:>9.3f} {number / 2 / seconds:>14,.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
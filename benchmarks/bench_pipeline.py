@@ -0,0 +1,104 @@
+"""End-to-end benchmark of the DAG task scripts: even -> odd -> merge.
+
+Each stage runs as its own process, the same way the Fargate tasks do, against
+a scratch directory on tmpfs (``/dev/shm`` where available) passed through
+``SHARED_VOLUME_ROOT``. For every stage it reports wall time, throughput, peak
+RSS and bytes written.
+
+Usage: python -m benchmarks.bench_pipeline [--sizes 1e5 1e6 1e7]
+       [--generator-args="--quiet --workers 2"] [--merge-args="--summary-only"]
+"""
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+TASKS_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+)
+STAGES = [
+    ("even", os.path.join(TASKS_DIR, "multi_task", "even_numbers.py")),
+    ("odd", os.path.join(TASKS_DIR, "multi_task", "odd_numbers.py")),
+    ("merge", os.path.join(TASKS_DIR, "single_task", "number_pipeline.py")),
+]
+
+
+def scratch_root() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def run_stage(script: str, number: int, volume_root: str, extra_args) -> tuple:
+    """Run one script and return its wall time in seconds and peak RSS in KiB."""
+    # The image flattens the task directories into one, locally the shared modules need a path entry
+    env = dict(
+        os.environ,
+        SHARED_VOLUME_ROOT=volume_root,
+        PYTHONPATH=os.path.join(TASKS_DIR, "common"),
+    )
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        process = subprocess.Popen(
+            [sys.executable, script, str(number), *extra_args],
+            cwd=os.path.dirname(script),
+            env=env,
+            stdout=devnull,
+        )
+        _, status, usage = os.wait4(process.pid, 0)
+    seconds = time.perf_counter() - started
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(
+            f"{script} exited with status {os.waitstatus_to_exitcode(status)}"
+        )
+    return seconds, usage.ru_maxrss
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1e5, 1e6, 1e7])
+    parser.add_argument(
+        "--generator-args", default="", help="extra arguments for even/odd_numbers.py"
+    )
+    parser.add_argument(
+        "--merge-args", default="", help="extra arguments for number_pipeline.py"
+    )
+    args = parser.parse_args()
+    stage_args = {
+        "even": shlex.split(args.generator_args),
+        "odd": shlex.split(args.generator_args),
+        "merge": shlex.split(args.merge_args),
+    }
+
+    print(
+        f"{'N':>12} {'stage':<6} {'seconds':>9} {'numbers/s':>14} {'peak RSS MiB':>13} {'bytes':>14}"
+    )
+    for size in args.sizes:
+        number = int(size)
+        with tempfile.TemporaryDirectory(dir=scratch_root()) as volume_root:
+            merged_bytes = 0
+            for name, script in STAGES:
+                before = directory_size(volume_root)
+                seconds, peak_rss = run_stage(
+                    script, number, volume_root, stage_args[name]
+                )
+                if name == "merge":
+                    # number_pipeline.py cleans up after itself, its output is the size of its inputs
+                    written, count = merged_bytes, number
+                else:
+                    written = directory_size(volume_root) - before
+                    merged_bytes += written
+                    count = number // 2
+                print(
+                    f"{number:>12} {name:<6} {seconds:>9.3f} {count / seconds:>14,.0f} "
+                    f"{peak_rss / 1024:>13.1f} {written:>14,}"
+                )
+
+
+if __name__ == "__main__":
+    main()
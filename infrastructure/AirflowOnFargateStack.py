@@ -1,9 +1,18 @@
-from aws_cdk import aws_ec2 as ec2, aws_ecs as ecs, Stack, Tags
+from aws_cdk import aws_ec2 as ec2, aws_ecs as ecs, Annotations, Stack, Tags
 from constructs import Construct
 
+from infrastructure.capacity import CapacityPlan
+from infrastructure.config import (
+    airflow_task_config,
+    default_db_config,
+    default_shared_volume_config,
+    worker_autoscaling_config,
+)
 from infrastructure.constructs.AirflowConstruct import AirflowConstruct
 from infrastructure.constructs.DagTasksConstruct import DagTasksConstruct
+from infrastructure.constructs.DashboardConstruct import DashboardConstruct
 from infrastructure.constructs.DatabaseConstruct import DatabaseConstruct
+from infrastructure.constructs.ImageRegistryConstruct import ImageRegistryConstruct
 
 
 class AirflowOnFargateStack(Stack):
@@ -11,10 +20,26 @@ class AirflowOnFargateStack(Stack):
         self,
         scope: Construct,
         id: str,
+        capacity_plan: CapacityPlan | None = None,
         **kwargs,
     ) -> None:
         super().__init__(scope, id, **kwargs)
 
+        # A capacity plan sized for the workload context replaces the config.py presets
+        task_config, autoscaling_config, db_config = (
+            airflow_task_config,
+            worker_autoscaling_config,
+            default_db_config,
+        )
+        if capacity_plan is not None:
+            task_config = capacity_plan.airflow_task_config
+            autoscaling_config = capacity_plan.worker_autoscaling_config
+            db_config = capacity_plan.db_config
+            Annotations.of(self).add_info(f"Capacity plan: {capacity_plan.summary}")
+
+        # The Airflow services route DAG runs to the access points the DAG tasks mount
+        shared_volume_config = default_shared_volume_config
+
         # Create a VPC with 2 AZs
         vpc = ec2.Vpc(
             self,
@@ -28,6 +53,16 @@ class AirflowOnFargateStack(Stack):
             self,
             "ECSCluster",
             vpc=vpc,
+            # Lets worker services mix FARGATE and FARGATE_SPOT
+            enable_fargate_capacity_providers=True,
+            # Queue depth scaling divides the backlog by the RunningTaskCount insight metric
+            container_insights=any(
+                config.scaling_mode == "queue_depth"
+                for config in [
+                    autoscaling_config,
+                    *(pool.autoscaling_config for pool in task_config.worker_pools),
+                ]
+            ),
         )
 
         # Create a default security group
@@ -37,29 +72,54 @@ class AirflowOnFargateStack(Stack):
             vpc=vpc,
         )
 
+        # Docker images shared between the Airflow services and the DAG tasks
+        image_registry = ImageRegistryConstruct(self, "ImageRegistry")
+
         # Create a database stack with a PostgreSQL database instance for Airflow
         db = DatabaseConstruct(
             self,
             "RDS-PostgreSQL",
             vpc=vpc,
             default_security_group=default_security_group,
+            db_config=db_config,
+            cluster=cluster,
         )
 
         # Create an Airflow stack with a webserver service, a worker service, and a scheduler service
-        AirflowConstruct(
+        airflow = AirflowConstruct(
             self,
             "AirflowService",
             vpc=vpc,
             default_security_group=default_security_group,
             cluster=cluster,
             db_connection_string=db.db_connection_string,
+            db_environment=db.airflow_environment,
+            direct_db_connection_string=db.direct_db_connection_string,
             private_subnet_ids=vpc.private_subnets,
+            image_registry=image_registry,
+            airflow_task_config=task_config,
+            worker_autoscaling_config=autoscaling_config,
+            shared_volume_config=shared_volume_config,
         )
 
+        # Chart Airflow, the metadata database and the DAG tasks when metrics are shipped
+        metrics_config = task_config.metrics_config
+        if metrics_config and metrics_config.dashboard:
+            DashboardConstruct(
+                self,
+                "Dashboard",
+                metrics_config=metrics_config,
+                services=airflow.services,
+                broker=airflow.broker,
+                db=db.db,
+            )
+
         # Create Task Definitions for on-demand Fargate Tasks invoked from DAGs
         DagTasksConstruct(
             self,
             "DagTasks",
             vpc=vpc,
             default_security_group=default_security_group,
+            image_registry=image_registry,
+            shared_volume_config=shared_volume_config,
         )
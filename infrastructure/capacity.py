@@ -0,0 +1,324 @@
+"""Derives consistent config.py presets from the workload a deployment has to carry.
+
+A WorkloadProfile comes from the ``workload`` CDK context (a JSON object) or
+from the JSON file named by the ``workload_profile`` context, e.g.::
+
+    cdk deploy -c workload_profile=workload.json
+    cdk deploy -c workload='{"peak_concurrent_tasks": 64, "dag_count": 120,
+                             "average_task_duration": 300, "runs_per_day": 2000}'
+
+``plan_capacity`` turns it into the Airflow task, worker autoscaling and
+metadata database configs. Everything the workload does not determine (broker,
+result backend, logs, metrics, architecture, ...) is taken from the presets in
+config.py.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import math
+
+from aws_cdk.aws_ec2 import InstanceClass, InstanceSize, InstanceType
+
+from infrastructure.config import (
+    AirflowTaskConfig,
+    AutoScalingConfig,
+    ContainerConfig,
+    DBConfig,
+    WorkerTuningProfile,
+    airflow_task_config,
+    check_fargate_size,
+    default_db_config,
+    worker_autoscaling_config,
+)
+
+# Airflow task sizes tried from the smallest up; the worker service runs the same size
+AIRFLOW_TASK_SIZES = [
+    (1024, 2048),
+    (2048, 4096),
+    (4096, 8192),
+    (8192, 16384),
+    (16384, 32768),
+]
+# Grow the tasks rather than the fleet beyond this many workers
+MAX_WORKERS = 20
+# Scheduler reservation (CPU, MiB) by the most DAGs it parses comfortably
+SCHEDULER_SIZES = [(50, 512, 1024), (200, 1024, 2048), (math.inf, 2048, 4096)]
+WEBSERVER_SIZE = (512, 1024)
+TRIGGERER_SIZE = (256, 512)
+
+# Metadata database instances from the smallest up, with their memory in GiB
+DB_INSTANCES = [
+    (InstanceClass.T3, InstanceSize.SMALL, 2),
+    (InstanceClass.T3, InstanceSize.MEDIUM, 4),
+    (InstanceClass.M5, InstanceSize.LARGE, 8),
+    (InstanceClass.M5, InstanceSize.XLARGE, 16),
+    (InstanceClass.M5, InstanceSize.XLARGE2, 32),
+]
+# Rows, indexes and logs of one task instance in the metadata database
+KIB_PER_TASK_INSTANCE = 10
+
+
+def rds_max_connections(memory_gib: int) -> int:
+    # RDS Postgres default: DBInstanceClassMemory / 9531392, leaving about a tenth of the memory to the OS
+    return min(int(memory_gib * 1024**3 * 0.9) // 9531392, 5000)
+
+
+class WorkloadProfile:
+    """The load Airflow is sized for.
+
+    ``runs_per_day`` counts DAG runs across all ``dag_count`` DAGs, each running
+    ``tasks_per_run`` tasks of ``average_task_duration`` seconds on average.
+    ``workload`` picks the worker tuning profile (``"io_bound"`` or
+    ``"cpu_bound"``) and ``metadata_retention_days`` how many days of task
+    history the metadata database is sized to hold.
+    """
+
+    def __init__(
+        self,
+        peak_concurrent_tasks: int,
+        dag_count: int,
+        average_task_duration: int,
+        runs_per_day: int,
+        tasks_per_run: int = 1,
+        workload: str = "io_bound",
+        metadata_retention_days: int = 90,
+    ):
+        for name, value in [
+            ("peak_concurrent_tasks", peak_concurrent_tasks),
+            ("dag_count", dag_count),
+            ("average_task_duration", average_task_duration),
+            ("runs_per_day", runs_per_day),
+            ("tasks_per_run", tasks_per_run),
+            ("metadata_retention_days", metadata_retention_days),
+        ]:
+            if not isinstance(value, int) or value < 1:
+                raise ValueError(f"{name} must be a positive integer, got {value!r}")
+        if workload not in ("io_bound", "cpu_bound"):
+            raise ValueError(f"Unknown workload {workload!r}")
+        self.peak_concurrent_tasks = peak_concurrent_tasks
+        self.dag_count = dag_count
+        self.average_task_duration = average_task_duration
+        self.runs_per_day = runs_per_day
+        self.tasks_per_run = tasks_per_run
+        self.workload = workload
+        self.metadata_retention_days = metadata_retention_days
+        if self.average_concurrent_tasks > peak_concurrent_tasks:
+            raise ValueError(
+                f"{runs_per_day} runs of {tasks_per_run} tasks taking {average_task_duration}s keep "
+                f"{self.average_concurrent_tasks:.1f} tasks running on average, more than the peak of "
+                f"{peak_concurrent_tasks}"
+            )
+
+    @classmethod
+    def from_dict(cls, values: dict) -> WorkloadProfile:
+        try:
+            return cls(**values)
+        except TypeError as error:
+            raise ValueError(f"Invalid workload profile {values!r}: {error}") from None
+
+    @property
+    def task_instances_per_day(self) -> int:
+        return self.runs_per_day * self.tasks_per_run
+
+    @property
+    def average_concurrent_tasks(self) -> float:
+        # Little's law: arrival rate times time in the system
+        return self.task_instances_per_day * self.average_task_duration / 86400
+
+
+def load_workload_profile(
+    workload: dict | str | None, profile_path: str | None
+) -> WorkloadProfile | None:
+    """Profile from the ``workload`` or ``workload_profile`` context values, None when neither is set."""
+    if workload is not None and profile_path is not None:
+        raise ValueError(
+            "Set either the workload or the workload_profile context, not both"
+        )
+    if profile_path is not None:
+        with open(profile_path) as f:
+            workload = json.load(f)
+    elif isinstance(workload, str):
+        # -c workload='{...}' arrives as a string, a cdk.json value as an object
+        workload = json.loads(workload)
+    if workload is None:
+        return None
+    return WorkloadProfile.from_dict(workload)
+
+
+class CapacityPlan:
+    def __init__(
+        self,
+        profile: WorkloadProfile,
+        airflow_task_config: AirflowTaskConfig,
+        worker_autoscaling_config: AutoScalingConfig,
+        db_config: DBConfig,
+        worker_concurrency: int,
+        db_connections: int,
+    ):
+        self.profile = profile
+        self.airflow_task_config = airflow_task_config
+        self.worker_autoscaling_config = worker_autoscaling_config
+        self.db_config = db_config
+        self.worker_concurrency = worker_concurrency
+        self.db_connections = db_connections
+
+    @property
+    def summary(self) -> str:
+        task = self.airflow_task_config
+        scaling = self.worker_autoscaling_config
+        db = self.db_config
+        return (
+            f"Airflow and worker tasks {task.cpu} CPU/{task.memory} MiB, "
+            f"{scaling.min_capacity}-{scaling.max_capacity} workers of {self.worker_concurrency} slots, "
+            f"parallelism {task.parallelism}, "
+            f"{db.db_instance_type.to_string()} database with {db.db_storage_size} GB "
+            f"for ~{self.db_connections} connections"
+            f"{' through PgBouncer' if db.connection_pooling else ''}"
+        )
+
+
+def resized(config: ContainerConfig, cpu: int, memory: int) -> ContainerConfig:
+    config = copy.copy(config)
+    config.cpu = cpu
+    config.memory = memory
+    return config
+
+
+def plan_capacity(
+    profile: WorkloadProfile,
+    base_task_config: AirflowTaskConfig = airflow_task_config,
+    base_autoscaling_config: AutoScalingConfig = worker_autoscaling_config,
+    base_db_config: DBConfig = default_db_config,
+) -> CapacityPlan:
+    """Sizes the combined Airflow task and a dedicated, autoscaled worker service for ``profile``.
+
+    The task is the smallest that holds the triggerer and (unless they run as
+    their own services) scheduler and webserver reservations and runs the peak
+    load on at most MAX_WORKERS workers. The database is the smallest instance
+    whose ``max_connections`` covers the estimated connections, or the largest
+    behind PgBouncer when none does. The plan always runs the workers as their
+    own service, the only one it can autoscale, and rejects a split
+    ``base_task_config``, whose per-component tasks it does not size.
+    """
+    if base_task_config.topology != "combined":
+        raise ValueError(
+            f"Capacity plans size the combined Airflow task, not the {base_task_config.topology!r} topology"
+        )
+    worker_tuning = copy.copy(base_task_config.worker_tuning or WorkerTuningProfile())
+    worker_tuning.workload = profile.workload
+    scheduler_cpu, scheduler_memory = next(
+        (cpu, memory)
+        for dag_count, cpu, memory in SCHEDULER_SIZES
+        if profile.dag_count <= dag_count
+    )
+    reserved_cpu, reserved_memory = TRIGGERER_SIZE
+    scheduler_tuning = base_task_config.scheduler_tuning
+    if scheduler_tuning is None or not scheduler_tuning.dedicated_service:
+        reserved_cpu += scheduler_cpu
+        reserved_memory += scheduler_memory
+    web_tier_config = base_task_config.web_tier_config
+    if web_tier_config is None:
+        reserved_cpu += WEBSERVER_SIZE[0]
+        reserved_memory += WEBSERVER_SIZE[1]
+
+    for cpu, memory in AIRFLOW_TASK_SIZES:
+        concurrency = worker_tuning.concurrency(cpu, memory)
+        max_workers = math.ceil(profile.peak_concurrent_tasks / concurrency)
+        if (
+            cpu >= reserved_cpu
+            and memory >= reserved_memory
+            and max_workers <= MAX_WORKERS
+        ):
+            break
+    else:
+        raise ValueError(
+            f"{profile.peak_concurrent_tasks} concurrent {profile.workload} tasks need more than "
+            f"{MAX_WORKERS} workers of {cpu} CPU/{memory} MiB, the largest planned size"
+        )
+    check_fargate_size("Airflow", cpu, memory)
+    min_workers = max(
+        base_autoscaling_config.min_capacity,
+        math.ceil(profile.average_concurrent_tasks / concurrency),
+    )
+    parallelism = max_workers * concurrency
+
+    task_config = AirflowTaskConfig(
+        cpu=cpu,
+        memory=memory,
+        webserver_config=resized(base_task_config.webserver_config, *WEBSERVER_SIZE),
+        scheduler_config=resized(
+            base_task_config.scheduler_config, scheduler_cpu, scheduler_memory
+        ),
+        # The worker has its task to itself
+        worker_config=resized(base_task_config.worker_config, cpu, memory),
+        triggerer_config=resized(base_task_config.triggerer_config, *TRIGGERER_SIZE),
+        migration_config=base_task_config.migration_config,
+        log_retention=base_task_config.log_retention,
+        create_worker_pool=True,
+        topology=base_task_config.topology,
+        worker_tuning=worker_tuning,
+        scheduler_tuning=scheduler_tuning,
+        web_tier_config=web_tier_config,
+        result_backend_config=base_task_config.result_backend_config,
+        broker_config=base_task_config.broker_config,
+        worker_pools=base_task_config.worker_pools,
+        architecture=base_task_config.architecture,
+        metrics_config=base_task_config.metrics_config,
+        log_config=base_task_config.log_config,
+        parallelism=parallelism,
+    )
+
+    autoscaling_config = copy.copy(base_autoscaling_config)
+    autoscaling_config.min_capacity = min(min_workers, max_workers)
+    autoscaling_config.max_capacity = max_workers
+    # A full worker's worth of backlog adds a worker
+    autoscaling_config.backlog_per_worker = concurrency
+
+    # One connection per running task, plus a SQLAlchemy pool per worker, scheduler, webserver and triggerer
+    process_pool = (
+        base_db_config.sql_alchemy_pool_size + base_db_config.sql_alchemy_max_overflow
+    )
+    webservers = web_tier_config.max_capacity if web_tier_config is not None else 1
+    processes = max_workers + task_config.scheduler_replicas + webservers + 1
+    connections = math.ceil((parallelism + processes * process_pool) * 1.2)
+    connection_pooling = (
+        base_db_config.connection_pooling
+        or connections > rds_max_connections(DB_INSTANCES[-1][2])
+    )
+    # Behind PgBouncer the database sees its server pool plus the migration's direct connections
+    server_connections = (
+        base_db_config.default_pool_size * 2 if connection_pooling else connections
+    )
+    instance_class, instance_size, _ = next(
+        (
+            (instance_class, instance_size, memory_gib)
+            for instance_class, instance_size, memory_gib in DB_INSTANCES
+            if rds_max_connections(memory_gib) >= server_connections
+        ),
+        DB_INSTANCES[-1],
+    )
+    # Twice the task history kept, in GB
+    history = (
+        profile.task_instances_per_day
+        * profile.metadata_retention_days
+        * KIB_PER_TASK_INSTANCE
+    )
+    storage = max(base_db_config.db_storage_size, math.ceil(2 * history / 1024**2))
+
+    db_config = copy.copy(base_db_config)
+    db_config.db_instance_type = InstanceType.of(instance_class, instance_size)
+    db_config.db_storage_size = storage
+    db_config.connection_pooling = connection_pooling
+    db_config.max_client_connections = max(
+        base_db_config.max_client_connections, connections
+    )
+
+    return CapacityPlan(
+        profile,
+        airflow_task_config=task_config,
+        worker_autoscaling_config=autoscaling_config,
+        db_config=db_config,
+        worker_concurrency=concurrency,
+        db_connections=connections,
+    )
@@ -1,24 +1,370 @@
+from __future__ import annotations
+
 from aws_cdk.aws_logs import RetentionDays
 from aws_cdk.aws_ec2 import InstanceType, InstanceClass, InstanceSize
 
+# CPU architectures for images and Fargate tasks, ARM64 runs on Graviton
+X86_64 = "x86_64"
+ARM64 = "arm64"
+
+
+def check_architecture(architecture: str | None):
+    if architecture not in (None, X86_64, ARM64):
+        raise ValueError(
+            f"Unknown architecture {architecture!r}, expected {X86_64!r} or {ARM64!r}"
+        )
+
+
+# Memory sizes (MiB) Fargate accepts for each task CPU size (CPU units)
+FARGATE_MEMORY = {
+    256: [512, 1024, 2048],
+    512: list(range(1024, 4096 + 1, 1024)),
+    1024: list(range(2048, 8192 + 1, 1024)),
+    2048: list(range(4096, 16384 + 1, 1024)),
+    4096: list(range(8192, 30720 + 1, 1024)),
+    8192: list(range(16384, 61440 + 1, 4096)),
+    16384: list(range(32768, 122880 + 1, 8192)),
+}
+
+
+def check_fargate_size(name: str, cpu: int, memory: int):
+    if memory not in FARGATE_MEMORY.get(cpu, []):
+        raise ValueError(
+            f"{name} task size ({cpu} CPU, {memory} MiB) is not a valid Fargate CPU/memory combination"
+        )
+
 
 class ContainerConfig:
     def __init__(
         self,
         name: str,
-        container_port: int,
+        container_port: int | None,
         entry_point: str,
         cpu: int = 256,
         memory: int = 512,
+        health_check: str | None = None,
+        stop_timeout: int | None = None,
+        architecture: str | None = None,
     ):
+        check_architecture(architecture)
         self.entry_point = entry_point
         self.container_port = container_port
         self.name = name
         self.cpu = cpu
         self.memory = memory
+        self.health_check = health_check
+        self.stop_timeout = stop_timeout
+        self.architecture = architecture
+
+
+class WorkerTuningProfile:
+    """Derives Celery worker settings from the worker's CPU/memory allocation.
+
+    ``workload="io_bound"`` runs ``slots_per_vcpu`` task slots per vCPU for tasks
+    that mostly wait (sensors, API calls, deferred Fargate tasks);
+    ``workload="cpu_bound"`` runs one slot per vCPU. Either way the slot count is
+    capped by the memory left after ``base_memory`` at ``memory_per_slot`` MiB
+    per forked task process.
+    """
+
+    def __init__(
+        self,
+        workload: str = "io_bound",
+        slots_per_vcpu: int = 8,
+        memory_per_slot: int = 192,
+        base_memory: int = 512,
+        autoscale: bool = True,
+    ):
+        if workload not in ("io_bound", "cpu_bound"):
+            raise ValueError(f"Unknown workload {workload!r}")
+        self.workload = workload
+        self.slots_per_vcpu = slots_per_vcpu
+        self.memory_per_slot = memory_per_slot
+        self.base_memory = base_memory
+        self.autoscale = autoscale
+
+    def concurrency(self, cpu: int, memory: int) -> int:
+        vcpus = cpu / 1024
+        by_cpu = vcpus * self.slots_per_vcpu if self.workload == "io_bound" else vcpus
+        by_memory = (memory - self.base_memory) // self.memory_per_slot
+        return max(1, min(int(by_cpu), by_memory))
+
+    def prefetch_multiplier(self) -> int:
+        # Long-running CPU-bound tasks should not be reserved by a busy worker
+        return 1 if self.workload == "cpu_bound" else 2
+
+    def environment(self, cpu: int, memory: int) -> dict[str, str]:
+        concurrency = self.concurrency(cpu, memory)
+        environment = {
+            "AIRFLOW__CELERY__WORKER_CONCURRENCY": str(concurrency),
+            "AIRFLOW__CELERY__WORKER_PREFETCH_MULTIPLIER": str(
+                self.prefetch_multiplier()
+            ),
+        }
+        if self.autoscale:
+            # Takes precedence over worker_concurrency; idle workers shrink to a quarter
+            environment[
+                "AIRFLOW__CELERY__WORKER_AUTOSCALE"
+            ] = f"{concurrency},{max(1, concurrency // 4)}"
+        return environment
+
+
+class SchedulerTuningProfile:
+    """Derives scheduler settings from the scheduler's CPU allocation.
+
+    The DAG file processor runs ``parsing_processes_per_vcpu`` processes per
+    vCPU, and re-parses each file at most every ``file_process_interval_per_vcpu``
+    seconds divided by the vCPUs (never more often than every 30 seconds).
+    ``max_tis_per_query`` grows with the CPU from 64 to 512, and small
+    schedulers heartbeat less often to leave the CPU to scheduling.
+
+    ``replicas`` schedulers (Airflow 2 HA, coordinated through row-level locks
+    in the metadata database) run as their own service, sized by the scheduler
+    ContainerConfig. With ``dedicated_service`` a single scheduler also moves
+    out of the combined task.
+    """
+
+    def __init__(
+        self,
+        parsing_processes_per_vcpu: int = 2,
+        file_process_interval_per_vcpu: int = 60,
+        replicas: int = 1,
+        dedicated_service: bool = False,
+    ):
+        if replicas < 1:
+            raise ValueError("Airflow needs at least one scheduler")
+        self.parsing_processes_per_vcpu = parsing_processes_per_vcpu
+        self.file_process_interval_per_vcpu = file_process_interval_per_vcpu
+        self.replicas = replicas
+        self.dedicated_service = dedicated_service or replicas > 1
+
+    def parsing_processes(self, cpu: int) -> int:
+        return max(1, int(cpu / 1024 * self.parsing_processes_per_vcpu))
+
+    def min_file_process_interval(self, cpu: int) -> int:
+        return max(30, round(self.file_process_interval_per_vcpu / (cpu / 1024)))
+
+    def max_tis_per_query(self, cpu: int) -> int:
+        return min(512, max(64, int(cpu / 1024 * 128)))
+
+    def heartbeat_sec(self, cpu: int) -> int:
+        return 5 if cpu >= 1024 else 10
+
+    def environment(self, cpu: int) -> dict[str, str]:
+        heartbeat = self.heartbeat_sec(cpu)
+        return {
+            "AIRFLOW__SCHEDULER__PARSING_PROCESSES": str(self.parsing_processes(cpu)),
+            "AIRFLOW__SCHEDULER__MIN_FILE_PROCESS_INTERVAL": str(
+                self.min_file_process_interval(cpu)
+            ),
+            "AIRFLOW__SCHEDULER__MAX_TIS_PER_QUERY": str(self.max_tis_per_query(cpu)),
+            "AIRFLOW__SCHEDULER__SCHEDULER_HEARTBEAT_SEC": str(heartbeat),
+            # Keeps the default of six missed heartbeats before a scheduler counts as dead
+            "AIRFLOW__SCHEDULER__SCHEDULER_HEALTH_CHECK_THRESHOLD": str(6 * heartbeat),
+            # Lets the schedulers share the work, the default, spelled out for HA
+            "AIRFLOW__SCHEDULER__USE_ROW_LEVEL_LOCKING": "True",
+        }
+
+
+class WebTierConfig:
+    """Autoscaled webserver service behind an Application Load Balancer.
+
+    The webserver runs as its own service (in either topology) of
+    ``min_capacity`` to ``max_capacity`` tasks sized by the webserver
+    ContainerConfig. The ALB health-checks ``health_check_path`` on the
+    container port. Scaling tracks ``requests_per_target`` requests per task per
+    minute and adds tasks while the p90 response time exceeds
+    ``target_response_time`` seconds. Gunicorn runs ``worker_class`` workers:
+    ``workers_per_vcpu`` per vCPU plus one for ``"sync"``, one per vCPU plus one
+    for the asynchronous ``"gevent"`` and ``"eventlet"``, capped by the memory at
+    ``memory_per_worker`` MiB each.
+    """
+
+    def __init__(
+        self,
+        min_capacity: int = 2,
+        max_capacity: int = 6,
+        requests_per_target: int = 600,
+        target_response_time: float = 1.0,
+        health_check_path: str = "/health",
+        worker_class: str = "sync",
+        workers_per_vcpu: int = 2,
+        memory_per_worker: int = 256,
+        idle_timeout: int = 60,
+    ):
+        if worker_class not in ("sync", "gevent", "eventlet"):
+            raise ValueError(f"Unknown gunicorn worker class {worker_class!r}")
+        if not 1 <= min_capacity <= max_capacity:
+            raise ValueError("The web tier needs 1 <= min_capacity <= max_capacity")
+        self.min_capacity = min_capacity
+        self.max_capacity = max_capacity
+        self.requests_per_target = requests_per_target
+        self.target_response_time = target_response_time
+        self.health_check_path = health_check_path
+        self.worker_class = worker_class
+        self.workers_per_vcpu = workers_per_vcpu
+        self.memory_per_worker = memory_per_worker
+        self.idle_timeout = idle_timeout
+
+    def workers(self, cpu: int, memory: int) -> int:
+        vcpus = cpu / 1024
+        by_cpu = (
+            int(vcpus * self.workers_per_vcpu) + 1
+            if self.worker_class == "sync"
+            else int(vcpus) + 1
+        )
+        by_memory = memory // self.memory_per_worker - 1
+        return max(1, min(by_cpu, by_memory))
+
+    def environment(self, cpu: int, memory: int) -> dict[str, str]:
+        return {
+            "AIRFLOW__WEBSERVER__WORKERS": str(self.workers(cpu, memory)),
+            "AIRFLOW__WEBSERVER__WORKER_CLASS": self.worker_class,
+            # Recycle workers stuck for longer than the ALB waits for an answer
+            "AIRFLOW__WEBSERVER__WEB_SERVER_WORKER_TIMEOUT": str(self.idle_timeout),
+        }
+
+
+class WorkerPoolConfig:
+    """A named Celery worker service consuming its own queue.
+
+    DAG authors route tasks to the pool with ``queue=<queue>``. Workers run
+    ``concurrency`` task slots, or the worker tuning profile's count for
+    ``cpu``/``memory`` when it is left unset.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        queue: str,
+        cpu: int,
+        memory: int,
+        autoscaling_config: AutoScalingConfig,
+        concurrency: int | None = None,
+        architecture: str | None = None,
+    ):
+        check_architecture(architecture)
+        check_fargate_size(f"{name} worker pool", cpu, memory)
+        self.name = name
+        self.queue = queue
+        self.cpu = cpu
+        self.memory = memory
+        self.autoscaling_config = autoscaling_config
+        self.concurrency = concurrency
+        self.architecture = architecture
+
+
+class LogConfig:
+    """How containers ship stdout/stderr to CloudWatch Logs.
+
+    With ``mode="non-blocking"`` writes go to an in-memory buffer of
+    ``max_buffer_size`` (a Docker size such as ``"25m"``) that the awslogs
+    driver drains, so a throttled CloudWatch Logs drops lines instead of
+    stalling the process; ``"blocking"`` keeps every line. Every component logs
+    to its own group kept for ``retention``. With ``firelens`` a Fluent Bit
+    sidecar batches the logs into the group instead.
+
+    The task scripts read ``script_log_level`` as ``$LOG_LEVEL`` and
+    ``script_log_sample`` as ``$LOG_SAMPLE`` (see ``tasks/common/logs.py``).
+    """
+
+    def __init__(
+        self,
+        mode: str = "non-blocking",
+        max_buffer_size: str = "25m",
+        retention: RetentionDays = RetentionDays.ONE_MONTH,
+        firelens: bool = False,
+        fluent_bit_image: str = "public.ecr.aws/aws-observability/aws-for-fluent-bit:stable",
+        script_log_level: str = "INFO",
+        script_log_sample: int | None = None,
+    ):
+        if mode not in ("blocking", "non-blocking"):
+            raise ValueError(f"Unknown log mode {mode!r}")
+        self.mode = mode
+        self.max_buffer_size = max_buffer_size
+        self.retention = retention
+        self.firelens = firelens
+        self.fluent_bit_image = fluent_bit_image
+        self.script_log_level = script_log_level
+        self.script_log_sample = script_log_sample
+
+    @property
+    def script_environment(self) -> dict[str, str]:
+        environment = {"LOG_LEVEL": self.script_log_level}
+        if self.script_log_sample is not None:
+            environment["LOG_SAMPLE"] = str(self.script_log_sample)
+        return environment
+
+
+class MetricsConfig:
+    """Airflow StatsD metrics, shipped to CloudWatch by a CloudWatch agent sidecar.
+
+    Every Airflow task gets an agent container listening for StatsD on
+    ``statsd_port``, which publishes to ``namespace`` every
+    ``collection_interval`` seconds. The sidecar has no CPU or memory
+    reservation of its own. With ``dashboard`` a CloudWatch dashboard charts the
+    scheduler, executor slots, workers, the metadata database and the DAG task
+    scripts. ``agent_image`` is pinned so a deploy never picks up a new agent
+    release unannounced.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "AirflowOnFargate",
+        statsd_port: int = 8125,
+        collection_interval: int = 60,
+        dashboard: bool = True,
+        agent_image: str = "public.ecr.aws/cloudwatch-agent/cloudwatch-agent:1.247350.0b251780",
+    ):
+        self.namespace = namespace
+        self.statsd_port = statsd_port
+        self.collection_interval = collection_interval
+        self.dashboard = dashboard
+        self.agent_image = agent_image
+
+    @property
+    def airflow_environment(self) -> dict[str, str]:
+        return {
+            "AIRFLOW__METRICS__STATSD_ON": "True",
+            "AIRFLOW__METRICS__STATSD_HOST": "localhost",
+            "AIRFLOW__METRICS__STATSD_PORT": str(self.statsd_port),
+            "AIRFLOW__METRICS__STATSD_PREFIX": "airflow",
+        }
+
+    @property
+    def agent_config(self) -> dict:
+        """CloudWatch agent configuration, passed to the sidecar as ``CW_CONFIG_CONTENT``."""
+        return {
+            "agent": {"omit_hostname": True},
+            "metrics": {
+                "namespace": self.namespace,
+                "metrics_collected": {
+                    "statsd": {
+                        "service_address": f":{self.statsd_port}",
+                        "metrics_collection_interval": self.collection_interval,
+                        "metrics_aggregation_interval": self.collection_interval,
+                    }
+                },
+                # Also publish every metric without the metric_type dimension, as charted
+                "aggregation_dimensions": [[]],
+            },
+        }
 
 
 class AirflowTaskConfig:
+    """Sizing and layout of the Airflow services.
+
+    With ``topology="combined"`` the webserver, scheduler, triggerer and worker
+    share one ``cpu``/``memory`` task (the worker gets its own task when
+    ``create_worker_pool`` is set) and each ContainerConfig is a reservation
+    within it. With ``topology="split"`` every component runs as its own service
+    whose task is sized by its ContainerConfig. ``scheduler_tuning`` derives the
+    scheduler settings and can run several schedulers as their own service in
+    either topology, ``web_tier_config`` the webservers behind an autoscaled
+    ALB. ``parallelism`` caps the task
+    instances running at once across all workers; Airflow's default is 32.
+    """
+
     def __init__(
         self,
         cpu: int,
@@ -26,33 +372,243 @@ class AirflowTaskConfig:
         webserver_config: ContainerConfig,
         scheduler_config: ContainerConfig,
         worker_config: ContainerConfig,
+        triggerer_config: ContainerConfig,
+        migration_config: ContainerConfig,
         log_retention: RetentionDays,
         create_worker_pool: bool = False,
+        topology: str = "combined",
+        worker_tuning: WorkerTuningProfile | None = None,
+        scheduler_tuning: SchedulerTuningProfile | None = None,
+        web_tier_config: WebTierConfig | None = None,
+        result_backend_config: ResultBackendConfig | None = None,
+        broker_config: BrokerConfig | None = None,
+        worker_pools: list[WorkerPoolConfig] | None = None,
+        architecture: str = X86_64,
+        metrics_config: MetricsConfig | None = None,
+        log_config: LogConfig | None = None,
+        parallelism: int | None = None,
     ):
+        if topology not in ("combined", "split"):
+            raise ValueError(f"Unknown topology {topology!r}")
+        check_architecture(architecture)
         self.cpu = cpu
         self.memory = memory
         self.webserver_config = webserver_config
         self.scheduler_config = scheduler_config
         self.worker_config = worker_config
+        self.triggerer_config = triggerer_config
+        self.migration_config = migration_config
         self.log_retention = log_retention
         self.create_worker_pool = create_worker_pool
+        self.topology = topology
+        self.worker_tuning = worker_tuning
+        self.scheduler_tuning = scheduler_tuning
+        self.web_tier_config = web_tier_config
+        self.result_backend_config = result_backend_config or ResultBackendConfig()
+        self.broker_config = broker_config or BrokerConfig()
+        self.worker_pools = worker_pools or []
+        self.architecture = architecture
+        self.metrics_config = metrics_config
+        self.log_config = log_config or LogConfig(retention=log_retention)
+        self.parallelism = parallelism
+        self._check_task_sizes()
+        if topology == "combined":
+            self._check_reservations_fit()
+            self._check_shared_architecture()
+
+    @property
+    def container_configs(self) -> list[ContainerConfig]:
+        return [
+            self.webserver_config,
+            self.scheduler_config,
+            self.triggerer_config,
+            self.worker_config,
+        ]
+
+    @property
+    def celery_queues(self) -> list[str]:
+        """Broker queues plus the queues of all worker pools."""
+        queues = list(self.broker_config.queues)
+        for pool in self.worker_pools:
+            if pool.queue not in queues:
+                queues.append(pool.queue)
+        return queues
+
+    @property
+    def parallelism_environment(self) -> dict[str, str]:
+        if self.parallelism is None:
+            return {}
+        return {
+            "AIRFLOW__CORE__PARALLELISM": str(self.parallelism),
+            # Only seeds default_pool when the metadata database is first initialized
+            "AIRFLOW__CORE__DEFAULT_POOL_TASK_SLOT_COUNT": str(self.parallelism),
+        }
+
+    def worker_pool_environment(self, pool: WorkerPoolConfig) -> dict[str, str]:
+        environment = {"CELERY_QUEUES": pool.queue}
+        if pool.concurrency is not None:
+            environment["AIRFLOW__CELERY__WORKER_CONCURRENCY"] = str(pool.concurrency)
+        elif self.worker_tuning is not None:
+            environment.update(self.worker_tuning.environment(pool.cpu, pool.memory))
+        return environment
+
+    @property
+    def worker_resources(self) -> tuple[int, int]:
+        """CPU units and MiB available to the worker container."""
+        if self.topology == "combined" and self.create_worker_pool:
+            return self.cpu, self.memory
+        return self.worker_config.cpu, self.worker_config.memory
+
+    def worker_environment(self) -> dict[str, str]:
+        if self.worker_tuning is None:
+            return {}
+        return self.worker_tuning.environment(*self.worker_resources)
+
+    @property
+    def dedicated_scheduler(self) -> bool:
+        """Whether the combined topology runs the schedulers as their own service."""
+        return (
+            self.topology == "combined"
+            and self.scheduler_tuning is not None
+            and self.scheduler_tuning.dedicated_service
+        )
+
+    @property
+    def scheduler_replicas(self) -> int:
+        return (
+            self.scheduler_tuning.replicas if self.scheduler_tuning is not None else 1
+        )
+
+    def scheduler_environment(self) -> dict[str, str]:
+        if self.scheduler_tuning is None:
+            return {}
+        return self.scheduler_tuning.environment(self.scheduler_config.cpu)
+
+    @property
+    def dedicated_webserver(self) -> bool:
+        """Whether the combined topology runs the webservers as their own service."""
+        return self.topology == "combined" and self.web_tier_config is not None
+
+    def webserver_environment(self) -> dict[str, str]:
+        if self.web_tier_config is None:
+            return {}
+        return self.web_tier_config.environment(
+            self.webserver_config.cpu, self.webserver_config.memory
+        )
+
+    def architecture_of(self, config: ContainerConfig | WorkerPoolConfig) -> str:
+        """Architecture of a component or pool, defaulting to the task-wide one."""
+        return config.architecture or self.architecture
+
+    @property
+    def shared_container_configs(self) -> list[ContainerConfig]:
+        """Components running in the combined Airflow task."""
+        shared = self.container_configs
+        if self.create_worker_pool:
+            shared.remove(self.worker_config)
+        if self.dedicated_scheduler:
+            shared.remove(self.scheduler_config)
+        if self.dedicated_webserver:
+            shared.remove(self.webserver_config)
+        return shared
+
+    def _check_task_sizes(self):
+        if self.topology == "split":
+            for config in self.container_configs:
+                check_fargate_size(config.name, config.cpu, config.memory)
+        else:
+            check_fargate_size("Airflow", self.cpu, self.memory)
+            # Components running as their own service in the combined topology
+            for config, dedicated in [
+                (self.scheduler_config, self.dedicated_scheduler),
+                (self.webserver_config, self.dedicated_webserver),
+            ]:
+                if dedicated:
+                    check_fargate_size(config.name, config.cpu, config.memory)
+        migration = self.migration_config
+        check_fargate_size(migration.name, migration.cpu, migration.memory)
+
+    def _check_shared_architecture(self):
+        for config in self.shared_container_configs:
+            if self.architecture_of(config) != self.architecture:
+                raise ValueError(
+                    f"{config.name} shares the {self.architecture} Airflow task and cannot run on "
+                    f"{config.architecture}, use topology='split' to mix architectures"
+                )
+
+    def _check_reservations_fit(self):
+        shared = self.shared_container_configs
+        cpu = sum(config.cpu for config in shared)
+        memory = sum(config.memory for config in shared)
+        if cpu > self.cpu or memory > self.memory:
+            raise ValueError(
+                f"Container reservations ({cpu} CPU, {memory} MiB) exceed the "
+                f"Airflow task size ({self.cpu} CPU, {self.memory} MiB)"
+            )
+
+
+class CapacityProviderConfig:
+    """Mix of on-demand Fargate and Fargate Spot for a worker service.
+
+    The first ``on_demand_base`` tasks always run on demand; beyond that, tasks
+    are split between FARGATE and FARGATE_SPOT by ``on_demand_weight`` to
+    ``spot_weight``.
+    """
+
+    def __init__(
+        self,
+        on_demand_base: int = 1,
+        on_demand_weight: int = 1,
+        spot_weight: int = 1,
+    ):
+        self.on_demand_base = on_demand_base
+        self.on_demand_weight = on_demand_weight
+        self.spot_weight = spot_weight
 
 
 class AutoScalingConfig:
+    """Scaling settings for a worker service.
+
+    ``scaling_mode="utilization"`` tracks the CPU/memory targets.
+    ``scaling_mode="queue_depth"`` steps the task count on the Celery backlog per
+    running worker (``ApproximateNumberOfMessagesVisible`` plus in-flight messages
+    of ``queue_name``), aiming for ``backlog_per_worker``. With ``min_capacity=0``
+    the service scales to zero when the queue is empty and back out on the first
+    message. ``capacity_provider_config`` runs part of the workers on Fargate Spot.
+    """
+
     def __init__(
         self,
         min_capacity: int,
         max_capacity: int,
         target_memory_utilization: int = 80,
         target_cpu_utilization: int = 80,
+        scaling_mode: str = "utilization",
+        queue_name: str = "default",
+        backlog_per_worker: int = 16,
+        capacity_provider_config: CapacityProviderConfig | None = None,
     ):
+        if scaling_mode not in ("utilization", "queue_depth"):
+            raise ValueError(f"Unknown scaling mode {scaling_mode!r}")
         self.min_capacity = min_capacity
         self.max_capacity = max_capacity
         self.target_memory_utilization = target_memory_utilization
         self.target_cpu_utilization = target_cpu_utilization
+        self.scaling_mode = scaling_mode
+        self.queue_name = queue_name
+        self.backlog_per_worker = backlog_per_worker
+        self.capacity_provider_config = capacity_provider_config
 
 
 class DBConfig:
+    """Metadata database settings.
+
+    With ``connection_pooling`` enabled, Airflow connects through a PgBouncer
+    service in ``pool_mode`` that multiplexes at most ``max_client_connections``
+    clients onto ``default_pool_size`` server connections. The
+    ``sql_alchemy_pool_*`` values size each Airflow process's own pool.
+    """
+
     def __init__(
         self,
         db_name: str,
@@ -61,31 +617,213 @@ class DBConfig:
         db_instance_type: InstanceType,
         db_storage_size: int,
         db_backup_retention: int,
+        connection_pooling: bool = False,
+        pool_mode: str = "transaction",
+        default_pool_size: int = 20,
+        max_client_connections: int = 1000,
+        sql_alchemy_pool_size: int = 5,
+        sql_alchemy_max_overflow: int = 10,
     ):
+        if pool_mode not in ("session", "transaction", "statement"):
+            raise ValueError(f"Unknown PgBouncer pool mode {pool_mode!r}")
         self.db_name = db_name
         self.db_master_user = db_master_user
         self.db_port = db_port
         self.db_instance_type = db_instance_type
         self.db_storage_size = db_storage_size
         self.db_backup_retention = db_backup_retention
+        self.connection_pooling = connection_pooling
+        self.pool_mode = pool_mode
+        self.default_pool_size = default_pool_size
+        self.max_client_connections = max_client_connections
+        self.sql_alchemy_pool_size = sql_alchemy_pool_size
+        self.sql_alchemy_max_overflow = sql_alchemy_max_overflow
+
+
+class BrokerConfig:
+    """Celery SQS broker queues, provisioned up front instead of created by Celery at runtime.
+
+    Every name in ``queues`` becomes an SQS queue with long polling
+    (``wait_time_seconds``) and a dead-letter queue that receives messages
+    delivered more than ``max_receive_count`` times. The visibility timeout is
+    twice ``expected_task_runtime`` (capped at the SQS maximum of 12 hours), so
+    a running task's message does not reappear while it is still executing.
+    """
+
+    def __init__(
+        self,
+        queues: list[str] | None = None,
+        wait_time_seconds: int = 20,
+        expected_task_runtime: int = 3600,
+        max_receive_count: int = 5,
+    ):
+        self.queues = queues or ["default"]
+        self.wait_time_seconds = wait_time_seconds
+        self.expected_task_runtime = expected_task_runtime
+        self.max_receive_count = max_receive_count
+
+    @property
+    def visibility_timeout(self) -> int:
+        return min(2 * self.expected_task_runtime, 43200)
+
+
+class ResultBackendConfig:
+    """Where Celery stores task results.
+
+    ``"database"`` uses the Airflow metadata database, ``"dedicated_database"``
+    a separate Postgres instance described by ``db_config`` and ``"redis"`` an
+    ElastiCache Redis node of ``cache_node_type``. The dedicated instance's
+    identifier is ``<db_name>-results``, so it may reuse the metadata ``db_name``.
+    """
+
+    def __init__(
+        self,
+        backend: str = "database",
+        db_config: DBConfig | None = None,
+        cache_node_type: str = "cache.t3.micro",
+    ):
+        if backend not in ("database", "dedicated_database", "redis"):
+            raise ValueError(f"Unknown result backend {backend!r}")
+        if backend == "dedicated_database" and db_config is None:
+            raise ValueError("A dedicated result backend database needs a db_config")
+        self.backend = backend
+        self.db_config = db_config
+        self.cache_node_type = cache_node_type
+
+
+class SharedVolumeConfig:
+    """EFS file system the DAG task families exchange files through.
+
+    ``throughput_mode`` is ``"bursting"`` (the EFS default), ``"elastic"`` or
+    ``"provisioned"`` (at ``provisioned_throughput_mibps``) and ``performance_mode`` is
+    ``"general_purpose"`` or ``"max_io"``. Each DAG id in ``access_point_dag_ids``
+    gets its own access point, rooted at ``/dags/<dag id>``, and its own task
+    definition families mounting it. With ``per_run_directories`` every DAG run
+    works in a directory named after its run id. Tasks always mount through an
+    access point, which needs transit encryption, so it is always on.
+    """
+
+    def __init__(
+        self,
+        throughput_mode: str = "bursting",
+        provisioned_throughput_mibps: int | None = None,
+        performance_mode: str = "general_purpose",
+        iam_authorization: bool = True,
+        access_point_dag_ids: list[str] | None = None,
+        per_run_directories: bool = False,
+    ):
+        if throughput_mode not in ("elastic", "bursting", "provisioned"):
+            raise ValueError(f"Unknown throughput mode {throughput_mode!r}")
+        if (throughput_mode == "provisioned") != (
+            provisioned_throughput_mibps is not None
+        ):
+            raise ValueError(
+                "provisioned_throughput_mibps goes with, and only with, provisioned throughput"
+            )
+        if performance_mode not in ("general_purpose", "max_io"):
+            raise ValueError(f"Unknown performance mode {performance_mode!r}")
+        if performance_mode == "max_io" and throughput_mode == "elastic":
+            raise ValueError(
+                "Elastic throughput does not support the max_io performance mode"
+            )
+        self.throughput_mode = throughput_mode
+        self.provisioned_throughput_mibps = provisioned_throughput_mibps
+        self.performance_mode = performance_mode
+        self.iam_authorization = iam_authorization
+        self.access_point_dag_ids = access_point_dag_ids or []
+        self.per_run_directories = per_run_directories
+
+
+class DagTaskConfig:
+    """A task definition family run from DAGs with ``EcsRunTaskOperator``.
+
+    Families with ``shared_volume`` mount the shared EFS file system; the
+    others keep their files on the task's own Fargate storage, which
+    ``ephemeral_storage_gib`` grows beyond the default 20 GiB (up to 200).
+    Each family builds the task image for, and runs on, its own ``architecture``.
+    """
+
+    def __init__(
+        self,
+        family: str,
+        container_name: str,
+        cpu: int,
+        memory: int,
+        command: list[str] | None = None,
+        shared_volume: bool = True,
+        ephemeral_storage_gib: int | None = None,
+        architecture: str = X86_64,
+    ):
+        check_architecture(architecture)
+        if ephemeral_storage_gib is not None and not 21 <= ephemeral_storage_gib <= 200:
+            raise ValueError("Fargate ephemeral storage must be between 21 and 200 GiB")
+        check_fargate_size(family, cpu, memory)
+        self.family = family
+        self.container_name = container_name
+        self.cpu = cpu
+        self.memory = memory
+        self.command = command
+        self.shared_volume = shared_volume
+        self.ephemeral_storage_gib = ephemeral_storage_gib
+        self.architecture = architecture
 
 
 worker_autoscaling_config = AutoScalingConfig(
     min_capacity=1,
     max_capacity=5,
     target_cpu_utilization=70,
+    # To scale on the Celery queue backlog instead (and to zero when idle), use
+    # scaling_mode="queue_depth", min_capacity=0
+    # To run workers beyond the first on Fargate Spot, use
+    # capacity_provider_config=CapacityProviderConfig(on_demand_base=1, spot_weight=1)
 )
 
 default_webserver_config = ContainerConfig(
-    name="webserver", container_port=8080, entry_point="/webserver_entry.sh"
+    name="webserver",
+    container_port=8080,
+    entry_point="/webserver_entry.sh",
+    cpu=512,
+    memory=1024,
+    health_check="curl --fail http://localhost:8080/health",
 )
 
 default_scheduler_config = ContainerConfig(
-    name="scheduler", container_port=8081, entry_point="/scheduler_entry.sh"
+    name="scheduler",
+    container_port=8081,
+    entry_point="/scheduler_entry.sh",
+    cpu=512,
+    memory=1024,
+    health_check="airflow jobs check --job-type SchedulerJob --local",
 )
 
 default_worker_config = ContainerConfig(
-    name="worker", container_port=8082, entry_point="/worker_entry.sh"
+    name="worker",
+    container_port=8082,
+    entry_point="/worker_entry.sh",
+    cpu=512,
+    memory=1024,
+    # Probes the worker's own pid: pgrep -f would also match this check's shell, and the SQS
+    # broker does not support Celery's remote control commands such as inspect ping
+    health_check='kill -0 "$(cat /tmp/airflow-worker.pid)"',
+    # Time for a warm shutdown between SIGTERM and SIGKILL, the Fargate maximum
+    stop_timeout=120,
+)
+
+# Runs the async triggers of deferred tasks, e.g. ECS tasks started from DAGs
+default_triggerer_config = ContainerConfig(
+    name="triggerer",
+    container_port=8794,
+    entry_point="/triggerer_entry.sh",
+    health_check="airflow jobs check --job-type TriggererJob --local",
+)
+
+# One-shot task run on every deploy to migrate the database and create the admin user
+default_migration_config = ContainerConfig(
+    name="migration",
+    container_port=None,
+    entry_point="/migration_entry.sh",
+    cpu=512,
+    memory=1024,
 )
 
 airflow_task_config = AirflowTaskConfig(
@@ -94,9 +832,44 @@ airflow_task_config = AirflowTaskConfig(
     webserver_config=default_webserver_config,
     scheduler_config=default_scheduler_config,
     worker_config=default_worker_config,
+    triggerer_config=default_triggerer_config,
+    migration_config=default_migration_config,
     log_retention=RetentionDays.ONE_MONTH,
     # To have a dedicated worker pool, set this to True
     # create_worker_pool=True
+    # To run each component as its own service sized by its ContainerConfig, use
+    # topology="split"
+    # To size Celery concurrency/prefetch from the worker's CPU and memory, set e.g.
+    # worker_tuning=WorkerTuningProfile(workload="io_bound")
+    # To size DAG parsing and scheduling from the scheduler's CPU, and to run two
+    # schedulers as their own service for HA and throughput, set e.g.
+    # scheduler_tuning=SchedulerTuningProfile(replicas=2)
+    # To serve many users and API clients from webservers behind an ALB that scales on
+    # request count and latency, use web_tier_config=WebTierConfig()
+    # To take Celery result traffic off the metadata database, use e.g.
+    # result_backend_config=ResultBackendConfig(backend="redis")
+    # To batch logs through a Fluent Bit sidecar, or to keep every line at the risk of
+    # stalling on CloudWatch Logs throttling, use e.g.
+    # log_config=LogConfig(firelens=True) or LogConfig(mode="blocking")
+    # To let more than Airflow's default 32 task instances run at once, set e.g.
+    # parallelism=64
+    # To ship Airflow's StatsD metrics to CloudWatch and chart them on a dashboard, use
+    # metrics_config=MetricsConfig()
+    # To run on Graviton, set architecture=ARM64 (per component in ContainerConfig
+    # and WorkerPoolConfig with topology="split")
+    # To add right-sized workers for tasks routed with queue="<queue>", use e.g.
+    # worker_pools=[
+    #     WorkerPoolConfig(
+    #         name="HighMemory",
+    #         queue="high_memory",
+    #         cpu=2048,
+    #         memory=16384,
+    #         concurrency=2,
+    #         autoscaling_config=AutoScalingConfig(
+    #             min_capacity=0, max_capacity=4, scaling_mode="queue_depth"
+    #         ),
+    #     )
+    # ]
 )
 
 default_db_config = DBConfig(
@@ -109,4 +882,39 @@ default_db_config = DBConfig(
     ),
     db_storage_size=25,
     db_backup_retention=30,
+    # To route Airflow's connections through PgBouncer, set this to True
+    # connection_pooling=True
 )
+
+# The EcsRunTaskOperator reads DAG task logs back from awslogs streams, so no FireLens here
+dag_task_log_config = LogConfig(
+    # To echo every 1000th number instead of every one, use script_log_sample=1000
+)
+
+default_shared_volume_config = SharedVolumeConfig(
+    # To pay per byte transferred instead of bursting on credits, use throughput_mode="elastic"
+    # To give concurrent runs of a DAG isolated files, use e.g.
+    # access_point_dag_ids=["airflow_on_fargate_numbers"], per_run_directories=True
+)
+
+# Task container with multiple python executables
+default_combined_dag_task_config = DagTaskConfig(
+    family="AirflowOnFargateCombinedTask",
+    container_name="MultiTaskContainer",
+    cpu=512,
+    memory=1024,
+)
+
+# Task container with single python executable
+default_single_dag_task_config = DagTaskConfig(
+    family="AirflowOnFargateSingleTask",
+    container_name="SingleTaskContainer",
+    cpu=256,
+    memory=512,
+    command=["python", "number_pipeline.py", "10"],
+)
+
+# Families whose tasks never hand files to another task can skip EFS with e.g.
+# DagTaskConfig(..., shared_volume=False, ephemeral_storage_gib=50)
+# To run a family on Graviton, use DagTaskConfig(..., architecture=ARM64)
+dag_task_configs = [default_combined_dag_task_config, default_single_dag_task_config]
@@ -1,7 +1,32 @@
-from aws_cdk import aws_ec2 as ec2, aws_ecs as ecs, Stack, CfnOutput
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_iam as iam,
+    aws_secretsmanager as secretsmanager,
+    Duration,
+    Stack,
+    CfnOutput,
+)
 from constructs import Construct
-from aws_cdk.aws_ecr_assets import DockerImageAsset, Platform
-from infrastructure.config import airflow_task_config
+from infrastructure.config import (
+    airflow_task_config,
+    AirflowTaskConfig,
+    AutoScalingConfig,
+    ContainerConfig,
+    default_shared_volume_config,
+    MetricsConfig,
+    SharedVolumeConfig,
+    worker_autoscaling_config,
+)
+from infrastructure.constructs.BrokerConstruct import BrokerConstruct
+from infrastructure.constructs.LogConstruct import LogConstruct
+from infrastructure.constructs.ImageRegistryConstruct import (
+    ImageRegistryConstruct,
+    docker_platform,
+    runtime_platform,
+)
+from infrastructure.constructs.MigrationConstruct import MigrationConstruct
+from infrastructure.constructs.ResultBackendConstruct import ResultBackendConstruct
 from infrastructure.constructs.ServiceConstruct import ServiceConstruct
 from uuid import uuid4
 
@@ -16,92 +41,331 @@ class AirflowConstruct(Construct):
         db_connection_string: str,
         default_security_group: ec2.SecurityGroup,
         private_subnet_ids: list[ec2.ISubnet],
+        image_registry: ImageRegistryConstruct,
+        db_environment: dict[str, str] | None = None,
+        direct_db_connection_string: str | None = None,
+        airflow_task_config: AirflowTaskConfig = airflow_task_config,
+        worker_autoscaling_config: AutoScalingConfig = worker_autoscaling_config,
+        shared_volume_config: SharedVolumeConfig = default_shared_volume_config,
         **kwargs,
     ) -> None:
         super().__init__(scope, id)
         admin_password = str(uuid4())
+        metrics_config = airflow_task_config.metrics_config
+
+        broker = BrokerConstruct(
+            self,
+            "Broker",
+            broker_config=airflow_task_config.broker_config,
+            queues=airflow_task_config.celery_queues,
+        )
+        result_backend = ResultBackendConstruct(
+            self,
+            "ResultBackend",
+            vpc=vpc,
+            default_security_group=default_security_group,
+            result_backend_config=airflow_task_config.result_backend_config,
+            db_connection_string=db_connection_string,
+        )
 
         # Set environment variables
         environment = {
             "AIRFLOW__DATABASE__SQL_ALCHEMY_CONN": db_connection_string,
             "AIRFLOW__CORE__EXECUTOR": "CeleryExecutor",
-            "AIRFLOW__CELERY__BROKER_URL": "sqs://",
-            "AIRFLOW__CELERY__RESULT_BACKEND": f"db+{db_connection_string}",
+            **broker.airflow_environment,
+            "AIRFLOW__CELERY__RESULT_BACKEND": result_backend.result_backend,
             "AIRFLOW__WEBSERVER__RBAC": "True",
             "ADMIN_PASSWORD": admin_password,
             "CLUSTER": cluster.cluster_name,
             "SUBNETS": ",".join([subnet.subnet_id for subnet in private_subnet_ids]),
             "SECURITY_GROUP": default_security_group.security_group_id,
+            # Tells the DAGs which task families and directories to use on the shared volume
+            "SHARED_VOLUME_ACCESS_POINT_DAGS": ",".join(
+                shared_volume_config.access_point_dag_ids
+            ),
+            "SHARED_VOLUME_PER_RUN_DIRECTORIES": str(
+                shared_volume_config.per_run_directories
+            ),
+            **airflow_task_config.parallelism_environment,
+            **(db_environment or {}),
+            **(metrics_config.airflow_environment if metrics_config else {}),
         }
+        # Webservers behind the ALB must sign sessions with one key, or users are logged out between tasks.
+        # The key is injected from Secrets Manager rather than written into the task definitions.
+        secrets: dict[str, ecs.Secret] = {}
+        if airflow_task_config.web_tier_config is not None:
+            secret_key = secretsmanager.Secret(
+                self,
+                "WebserverSecretKey",
+                description="Flask secret key shared by the Airflow webservers",
+                generate_secret_string=secretsmanager.SecretStringGenerator(
+                    exclude_punctuation=True,
+                    password_length=32,
+                ),
+            )
+            secrets["AIRFLOW__WEBSERVER__SECRET_KEY"] = ecs.Secret.from_secrets_manager(
+                secret_key
+            )
 
-        logging = ecs.AwsLogDriver(
-            stream_prefix="AirflowLogs",
-            log_retention=airflow_task_config.log_retention,
-        )
+        # Every component logs to its own group
+        component_logs: dict[str, LogConstruct] = {}
 
-        # Build Airflow docker image
-        airflow_image_asset = DockerImageAsset(
-            self,
-            "AirflowImage",
-            directory="./airflow",
-            platform=Platform.LINUX_AMD64
-        )
+        def component_log(component: str) -> LogConstruct:
+            if component not in component_logs:
+                component_logs[component] = LogConstruct(
+                    self,
+                    f"{component}Logs",
+                    log_config=airflow_task_config.log_config,
+                    stream_prefix="AirflowLogs",
+                )
+            return component_logs[component]
 
-        # Create task definitions
-        airflow_task = ecs.FargateTaskDefinition(
-            self,
-            "AirflowTask",
-            cpu=airflow_task_config.cpu,
-            memory_limit_mib=airflow_task_config.memory,
-        )
-        if airflow_task_config.create_worker_pool:
-            worker_task = ecs.FargateTaskDefinition(
+        # Build the Airflow docker image once per architecture in use
+        def airflow_image(architecture: str) -> ecs.ContainerImage:
+            return image_registry.image(
+                "./airflow", platform=docker_platform(architecture)
+            )
+
+        # Task definition of a component running on its own, sized by its ContainerConfig
+        def component_task(
+            container_config: ContainerConfig,
+        ) -> ecs.FargateTaskDefinition:
+            return ecs.FargateTaskDefinition(
+                self,
+                f"{container_config.name.capitalize()}Task",
+                cpu=container_config.cpu,
+                memory_limit_mib=container_config.memory,
+                runtime_platform=runtime_platform(
+                    airflow_task_config.architecture_of(container_config)
+                ),
+            )
+
+        # Create task definitions and map containers to them
+        if airflow_task_config.topology == "split":
+            task_containers = {
+                container_config: component_task(container_config)
+                for container_config in airflow_task_config.container_configs
+            }
+        else:
+            airflow_task = ecs.FargateTaskDefinition(
                 self,
-                "WorkerTask",
+                "AirflowTask",
                 cpu=airflow_task_config.cpu,
                 memory_limit_mib=airflow_task_config.memory,
+                runtime_platform=runtime_platform(airflow_task_config.architecture),
             )
-        else:
-            worker_task = airflow_task
-
-        # Map containers to task definitions
-        task_containers = {
-            airflow_task_config.webserver_config: airflow_task,
-            airflow_task_config.scheduler_config: airflow_task,
-            airflow_task_config.worker_config: worker_task,
-        }
+            if airflow_task_config.create_worker_pool:
+                worker_task = ecs.FargateTaskDefinition(
+                    self,
+                    "WorkerTask",
+                    cpu=airflow_task_config.cpu,
+                    memory_limit_mib=airflow_task_config.memory,
+                    runtime_platform=runtime_platform(
+                        airflow_task_config.architecture_of(
+                            airflow_task_config.worker_config
+                        )
+                    ),
+                )
+            else:
+                worker_task = airflow_task
+            # The schedulers and the web tier stop sharing CPU with each other when they scale out
+            scheduler_task = (
+                component_task(airflow_task_config.scheduler_config)
+                if airflow_task_config.dedicated_scheduler
+                else airflow_task
+            )
+            webserver_task = (
+                component_task(airflow_task_config.webserver_config)
+                if airflow_task_config.dedicated_webserver
+                else airflow_task
+            )
+            task_containers = {
+                airflow_task_config.webserver_config: webserver_task,
+                airflow_task_config.scheduler_config: scheduler_task,
+                airflow_task_config.triggerer_config: airflow_task,
+                airflow_task_config.worker_config: worker_task,
+            }
 
         # Create containers
         for container_config, task_definition in task_containers.items():
-            container = task_definition.add_container(
-                container_config.name,
-                image=ecs.ContainerImage.from_docker_image_asset(airflow_image_asset),
-                environment=environment,
-                logging=logging,
-                entry_point=[container_config.entry_point],
-            )
-            container.add_port_mappings(
-                ecs.PortMapping(container_port=container_config.container_port)
+            container_environment = environment
+            if container_config is airflow_task_config.worker_config:
+                container_environment = {
+                    **environment,
+                    **airflow_task_config.worker_environment(),
+                }
+            elif container_config is airflow_task_config.scheduler_config:
+                container_environment = {
+                    **environment,
+                    **airflow_task_config.scheduler_environment(),
+                }
+            elif container_config is airflow_task_config.webserver_config:
+                container_environment = {
+                    **environment,
+                    **airflow_task_config.webserver_environment(),
+                }
+            self.add_airflow_container(
+                task_definition,
+                container_config,
+                image=airflow_image(
+                    airflow_task_config.architecture_of(container_config)
+                ),
+                environment=container_environment,
+                secrets=secrets,
+                logging=component_log(container_config.name.capitalize()).log_driver(
+                    task_definition
+                ),
             )
 
-        # Create service
-        ServiceConstruct(
+        # One CloudWatch agent per task receives the StatsD metrics of its Airflow containers
+        if metrics_config:
+            for task_definition in dict.fromkeys(task_containers.values()):
+                self.add_metrics_agent(
+                    task_definition,
+                    metrics_config,
+                    component_log("MetricsAgent").log_driver(task_definition),
+                )
+
+        # Migrate the database once per deploy, the services wait for it in their entry scripts
+        migration_architecture = airflow_task_config.architecture_of(
+            airflow_task_config.migration_config
+        )
+        MigrationConstruct(
             self,
-            "AirflowService",
+            "Migration",
             cluster=cluster,
-            task_definition=airflow_task,
-            vpc=vpc,
+            image=airflow_image(migration_architecture),
+            architecture=migration_architecture,
+            container_config=airflow_task_config.migration_config,
+            # Migrations take session-level advisory locks, which a transaction pooler would break
+            environment={
+                **environment,
+                "AIRFLOW__DATABASE__SQL_ALCHEMY_CONN": direct_db_connection_string
+                or db_connection_string,
+            },
+            log=component_log("Migration"),
             default_security_group=default_security_group,
+            private_subnet_ids=private_subnet_ids,
         )
-        if airflow_task_config.create_worker_pool:
-            ServiceConstruct(
+
+        # Create services
+        self._broker = broker
+        self._services: dict[str, ServiceConstruct] = {}
+        if airflow_task_config.topology == "split":
+            for container_config, task_definition in task_containers.items():
+                self._services[container_config.name] = ServiceConstruct(
+                    self,
+                    f"{container_config.name.capitalize()}Service",
+                    cluster=cluster,
+                    task_definition=task_definition,
+                    broker=broker,
+                    vpc=vpc,
+                    default_security_group=default_security_group,
+                    is_worker_service=container_config
+                    is airflow_task_config.worker_config,
+                    load_balanced=container_config
+                    is airflow_task_config.webserver_config,
+                    autoscaling_config=worker_autoscaling_config,
+                    desired_count=(
+                        airflow_task_config.scheduler_replicas
+                        if container_config is airflow_task_config.scheduler_config
+                        else None
+                    ),
+                    web_tier_config=(
+                        airflow_task_config.web_tier_config
+                        if container_config is airflow_task_config.webserver_config
+                        else None
+                    ),
+                )
+        else:
+            self._services["airflow"] = ServiceConstruct(
+                self,
+                "AirflowService",
+                cluster=cluster,
+                task_definition=airflow_task,
+                broker=broker,
+                vpc=vpc,
+                default_security_group=default_security_group,
+                load_balanced=not airflow_task_config.dedicated_webserver,
+            )
+            if airflow_task_config.create_worker_pool:
+                self._services["worker"] = ServiceConstruct(
+                    self,
+                    "WorkerService",
+                    cluster=cluster,
+                    task_definition=worker_task,
+                    broker=broker,
+                    vpc=vpc,
+                    default_security_group=default_security_group,
+                    is_worker_service=True,
+                    autoscaling_config=worker_autoscaling_config,
+                )
+            if airflow_task_config.dedicated_scheduler:
+                self._services["scheduler"] = ServiceConstruct(
+                    self,
+                    "SchedulerService",
+                    cluster=cluster,
+                    task_definition=scheduler_task,
+                    broker=broker,
+                    vpc=vpc,
+                    default_security_group=default_security_group,
+                    load_balanced=False,
+                    desired_count=airflow_task_config.scheduler_replicas,
+                )
+            if airflow_task_config.dedicated_webserver:
+                self._services["webserver"] = ServiceConstruct(
+                    self,
+                    "WebserverService",
+                    cluster=cluster,
+                    task_definition=webserver_task,
+                    broker=broker,
+                    vpc=vpc,
+                    default_security_group=default_security_group,
+                    load_balanced=True,
+                    web_tier_config=airflow_task_config.web_tier_config,
+                )
+
+        # Create one autoscaled worker service per pool, consuming only the pool's queue
+        for pool in airflow_task_config.worker_pools:
+            pool_task = ecs.FargateTaskDefinition(
+                self,
+                f"{pool.name}WorkerTask",
+                cpu=pool.cpu,
+                memory_limit_mib=pool.memory,
+                runtime_platform=runtime_platform(
+                    airflow_task_config.architecture_of(pool)
+                ),
+            )
+            self.add_airflow_container(
+                pool_task,
+                airflow_task_config.worker_config,
+                image=airflow_image(airflow_task_config.architecture_of(pool)),
+                environment={
+                    **environment,
+                    **airflow_task_config.worker_pool_environment(pool),
+                },
+                secrets=secrets,
+                logging=component_log(f"{pool.name}Worker").log_driver(pool_task),
+                cpu=pool.cpu,
+                memory=pool.memory,
+            )
+            if metrics_config:
+                self.add_metrics_agent(
+                    pool_task,
+                    metrics_config,
+                    component_log("MetricsAgent").log_driver(pool_task),
+                )
+            self._services[f"{pool.name}Worker"] = ServiceConstruct(
                 self,
-                "WorkerService",
+                f"{pool.name}WorkerService",
                 cluster=cluster,
-                task_definition=worker_task,
+                task_definition=pool_task,
+                broker=broker,
                 vpc=vpc,
                 default_security_group=default_security_group,
                 is_worker_service=True,
+                autoscaling_config=pool.autoscaling_config,
+                celery_queue=pool.queue,
             )
 
         # Output admin password
@@ -110,3 +374,82 @@ class AirflowConstruct(Construct):
             "AdminPassword",
             value=admin_password,
         )
+
+    @property
+    def broker(self) -> BrokerConstruct:
+        return self._broker
+
+    @property
+    def services(self) -> dict[str, ServiceConstruct]:
+        """Airflow services by component, ``"airflow"`` for the combined task, or worker pool."""
+        return self._services
+
+    @staticmethod
+    def add_metrics_agent(
+        task_definition: ecs.FargateTaskDefinition,
+        metrics_config: MetricsConfig,
+        logging: ecs.LogDriver,
+    ) -> ecs.ContainerDefinition:
+        task_definition.task_role.add_managed_policy(
+            iam.ManagedPolicy.from_aws_managed_policy_name(
+                "CloudWatchAgentServerPolicy"
+            )
+        )
+        return task_definition.add_container(
+            "cloudwatch-agent",
+            image=ecs.ContainerImage.from_registry(metrics_config.agent_image),
+            environment={
+                "CW_CONFIG_CONTENT": Stack.of(task_definition).to_json_string(
+                    metrics_config.agent_config
+                ),
+            },
+            logging=logging,
+            # Losing metrics must not take Airflow down with it
+            essential=False,
+        )
+
+    def add_airflow_container(
+        self,
+        task_definition: ecs.FargateTaskDefinition,
+        container_config: ContainerConfig,
+        image: ecs.ContainerImage,
+        environment: dict[str, str],
+        logging: ecs.LogDriver,
+        cpu: int | None = None,
+        memory: int | None = None,
+        secrets: dict[str, ecs.Secret] | None = None,
+    ) -> ecs.ContainerDefinition:
+        container = task_definition.add_container(
+            container_config.name,
+            image=image,
+            environment=environment,
+            secrets=secrets,
+            logging=logging,
+            entry_point=[container_config.entry_point],
+            cpu=cpu or container_config.cpu,
+            memory_reservation_mib=memory or container_config.memory,
+            health_check=self.create_health_check(container_config),
+            stop_timeout=(
+                Duration.seconds(container_config.stop_timeout)
+                if container_config.stop_timeout is not None
+                else None
+            ),
+        )
+        container.add_port_mappings(
+            ecs.PortMapping(container_port=container_config.container_port)
+        )
+        return container
+
+    @staticmethod
+    def create_health_check(
+        container_config: ContainerConfig,
+    ) -> ecs.HealthCheck | None:
+        if container_config.health_check is None:
+            return None
+        return ecs.HealthCheck(
+            command=["CMD-SHELL", container_config.health_check],
+            interval=Duration.seconds(30),
+            timeout=Duration.seconds(10),
+            retries=3,
+            start_period=Duration.seconds(300),
+        )
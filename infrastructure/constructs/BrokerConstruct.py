@@ -0,0 +1,79 @@
+from aws_cdk import (
+    Duration,
+    Stack,
+    aws_iam as iam,
+    aws_sqs as sqs,
+)
+from constructs import Construct
+
+from infrastructure.config import BrokerConfig
+
+
+class BrokerConstruct(Construct):
+    """SQS queues backing the Celery broker, handed to Celery as ``predefined_queues``.
+
+    With predefined queues Celery neither lists nor creates queues at runtime,
+    and the task roles only need access to these queues.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        broker_config: BrokerConfig,
+        queues: list[str] | None = None,
+    ) -> None:
+        super().__init__(scope, id)
+        self._broker_config = broker_config
+
+        self._queues: dict[str, sqs.Queue] = {}
+        for name in queues or broker_config.queues:
+            dead_letter_queue = sqs.Queue(
+                self,
+                f"{name}-DLQ",
+                retention_period=Duration.days(14),
+            )
+            self._queues[name] = sqs.Queue(
+                self,
+                f"{name}-Queue",
+                receive_message_wait_time=Duration.seconds(
+                    broker_config.wait_time_seconds
+                ),
+                visibility_timeout=Duration.seconds(broker_config.visibility_timeout),
+                dead_letter_queue=sqs.DeadLetterQueue(
+                    queue=dead_letter_queue,
+                    max_receive_count=broker_config.max_receive_count,
+                ),
+            )
+
+    @property
+    def queues(self) -> dict[str, sqs.Queue]:
+        return self._queues
+
+    @property
+    def transport_options(self) -> str:
+        """JSON ``broker_transport_options`` read by ``celery_config.py`` in the Airflow image."""
+        return Stack.of(self).to_json_string(
+            {
+                "region": Stack.of(self).region,
+                "wait_time_seconds": self._broker_config.wait_time_seconds,
+                "visibility_timeout": self._broker_config.visibility_timeout,
+                "predefined_queues": {
+                    name: {"url": queue.queue_url}
+                    for name, queue in self._queues.items()
+                },
+            }
+        )
+
+    @property
+    def airflow_environment(self) -> dict[str, str]:
+        return {
+            "AIRFLOW__CELERY__BROKER_URL": "sqs://",
+            "AIRFLOW__CELERY__CELERY_CONFIG_OPTIONS": "celery_config.CELERY_CONFIG",
+            "CELERY_BROKER_TRANSPORT_OPTIONS": self.transport_options,
+        }
+
+    def grant(self, grantee: iam.IGrantable) -> None:
+        for queue in self._queues.values():
+            queue.grant_send_messages(grantee)
+            queue.grant_consume_messages(grantee)
@@ -1,12 +1,40 @@
 from aws_cdk import (
+    Size,
     aws_efs as efs,
     aws_ec2 as ec2,
-    aws_ecs as ecs,
     aws_logs as logs,
 )
 from constructs import Construct
+from infrastructure.config import (
+    dag_task_configs,
+    dag_task_log_config,
+    default_shared_volume_config,
+    DagTaskConfig,
+    LogConfig,
+    SharedVolumeConfig,
+)
+from infrastructure.constructs.ImageRegistryConstruct import (
+    ImageRegistryConstruct,
+    docker_platform,
+)
+from infrastructure.constructs.LogConstruct import LogConstruct
 from infrastructure.constructs.TaskConstruct import TaskConstruct
 
+THROUGHPUT_MODES = {
+    "elastic": efs.ThroughputMode.ELASTIC,
+    "bursting": efs.ThroughputMode.BURSTING,
+    "provisioned": efs.ThroughputMode.PROVISIONED,
+}
+PERFORMANCE_MODES = {
+    "general_purpose": efs.PerformanceMode.GENERAL_PURPOSE,
+    "max_io": efs.PerformanceMode.MAX_IO,
+}
+
+
+def dag_task_family(family: str, dag_id: str | None = None) -> str:
+    """Task definition family of ``family`` mounting the access point of ``dag_id``."""
+    return family if dag_id is None else f"{family}-{dag_id}"
+
 
 class DagTasksConstruct(Construct):
     def __init__(
@@ -15,16 +43,29 @@ class DagTasksConstruct(Construct):
         id: str,
         vpc: ec2.Vpc,
         default_security_group: ec2.SecurityGroup,
+        image_registry: ImageRegistryConstruct,
+        shared_volume_config: SharedVolumeConfig = default_shared_volume_config,
+        task_configs: list[DagTaskConfig] | None = None,
+        log_config: LogConfig = dag_task_log_config,
     ) -> None:
         super().__init__(scope, id)
+        task_configs = task_configs or dag_task_configs
+        if log_config.firelens:
+            raise ValueError(
+                "The DAGs read task logs back from awslogs streams, DAG tasks cannot use FireLens"
+            )
 
-        logging = ecs.AwsLogDriver(
+        # One named group for all families, the DAGs fetch task logs from it
+        log = LogConstruct(
+            self,
+            "AirflowOnFargateDagTaskLogs",
+            log_config=log_config,
             stream_prefix="AirflowOnFargateDagTaskLogging",
             log_group=logs.LogGroup(
                 self,
                 "AirflowOnFargateDagTaskLogGroup",
                 log_group_name="AirflowOnFargateDagTaskLogGroup",
-                retention=logs.RetentionDays.ONE_MONTH,
+                retention=log_config.retention,
             ),
         )
 
@@ -33,35 +74,72 @@ class DagTasksConstruct(Construct):
             "AirflowOnFargateDagTaskFileSystem",
             vpc=vpc,
             security_group=default_security_group,
+            throughput_mode=THROUGHPUT_MODES[shared_volume_config.throughput_mode],
+            provisioned_throughput_per_second=(
+                Size.mebibytes(shared_volume_config.provisioned_throughput_mibps)
+                if shared_volume_config.provisioned_throughput_mibps is not None
+                else None
+            ),
+            performance_mode=PERFORMANCE_MODES[shared_volume_config.performance_mode],
         )
         shared_efs_file_system.connections.allow_internally(ec2.Port.tcp(2049))
 
-        # Task container with multiple python executables
-        TaskConstruct(
-            self,
-            "AirflowOnFargateCombinedTask",
-            task_family_name="AirflowOnFargateCombinedTask",
-            container_name="MultiTaskContainer",
-            container_asset_dir="./infrastructure/tasks/multi_task",
-            cpu=512,
-            memory=1024,
-            logging=logging,
-            efs_volume_name="AirflowSharedVolume",
-            efs_file_system_id=shared_efs_file_system.file_system_id,
-            efs_container_path="/airflow-shared-volume",
-        )
+        # Access points pin every task to a directory and a non-root POSIX user, which
+        # IAM authorization needs as it squashes root. DAGs listed in the config get their
+        # own directory so their runs cannot touch each other's files.
+        access_points = {
+            dag_id: shared_efs_file_system.add_access_point(
+                "SharedAccessPoint" if dag_id is None else f"{dag_id}AccessPoint",
+                path="/shared" if dag_id is None else f"/dags/{dag_id}",
+                create_acl=efs.Acl(
+                    owner_uid="1000", owner_gid="1000", permissions="755"
+                ),
+                posix_user=efs.PosixUser(uid="1000", gid="1000"),
+            )
+            for dag_id in [None, *shared_volume_config.access_point_dag_ids]
+        }
 
-        # Task container with single python executable
-        TaskConstruct(
-            self,
-            "AirflowOnFargateSingleTask",
-            task_family_name="AirflowOnFargateSingleTask",
-            container_name="SingleTaskContainer",
-            container_asset_dir="./infrastructure/tasks/single_task",
-            cpu=256,
-            memory=512,
-            logging=logging,
-            efs_volume_name="AirflowSharedVolume",
-            efs_file_system_id=shared_efs_file_system.file_system_id,
-            efs_container_path="/airflow-shared-volume",
-        )
+        for task_config in task_configs:
+            # All task families run scripts from the same image, built once per architecture
+            task_image = image_registry.image(
+                "./infrastructure/tasks",
+                platform=docker_platform(task_config.architecture),
+            )
+            if not task_config.shared_volume:
+                TaskConstruct(
+                    self,
+                    task_config.family,
+                    task_family_name=task_config.family,
+                    container_name=task_config.container_name,
+                    image=task_image,
+                    command=task_config.command,
+                    cpu=task_config.cpu,
+                    memory=task_config.memory,
+                    architecture=task_config.architecture,
+                    ephemeral_storage_gib=task_config.ephemeral_storage_gib,
+                    log=log,
+                    efs_volume_name=None,
+                    efs_file_system=None,
+                    efs_container_path=None,
+                )
+                continue
+            for dag_id, access_point in access_points.items():
+                family = dag_task_family(task_config.family, dag_id)
+                TaskConstruct(
+                    self,
+                    family,
+                    task_family_name=family,
+                    container_name=task_config.container_name,
+                    image=task_image,
+                    command=task_config.command,
+                    cpu=task_config.cpu,
+                    memory=task_config.memory,
+                    architecture=task_config.architecture,
+                    ephemeral_storage_gib=task_config.ephemeral_storage_gib,
+                    log=log,
+                    efs_volume_name="AirflowSharedVolume",
+                    efs_file_system=shared_efs_file_system,
+                    efs_access_point=access_point,
+                    shared_volume_config=shared_volume_config,
+                    efs_container_path="/airflow-shared-volume",
+                )
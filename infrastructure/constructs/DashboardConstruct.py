@@ -0,0 +1,171 @@
+from aws_cdk import (
+    Duration,
+    aws_cloudwatch as cloudwatch,
+    aws_rds as rds,
+)
+from constructs import Construct
+
+from infrastructure.config import MetricsConfig
+from infrastructure.constructs.BrokerConstruct import BrokerConstruct
+from infrastructure.constructs.ServiceConstruct import ServiceConstruct
+
+# Must match DEFAULT_NAMESPACE and the Script dimensions in tasks/common/metrics.py
+DAG_TASK_NAMESPACE = "AirflowOnFargate/DagTasks"
+DAG_TASK_SCRIPTS = {
+    "even_numbers": "WriteTime",
+    "odd_numbers": "WriteTime",
+    "numbers": "MergeTime",
+}
+
+
+class DashboardConstruct(Construct):
+    """CloudWatch dashboard for the scheduler, executor, workers, metadata database and DAG tasks.
+
+    The Airflow graphs chart the StatsD metrics the CloudWatch agent sidecars
+    publish to ``metrics_config.namespace``, the DAG task graphs the Embedded
+    Metric Format documents the task scripts log.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        metrics_config: MetricsConfig,
+        services: dict[str, ServiceConstruct],
+        broker: BrokerConstruct,
+        db: rds.DatabaseInstance,
+    ) -> None:
+        super().__init__(scope, id)
+        period = Duration.seconds(metrics_config.collection_interval)
+
+        def airflow_metric(
+            name: str, statistic: str = "Average", label: str | None = None
+        ) -> cloudwatch.Metric:
+            return cloudwatch.Metric(
+                namespace=metrics_config.namespace,
+                metric_name=f"airflow.{name}",
+                statistic=statistic,
+                period=period,
+                label=label or name,
+            )
+
+        def graph(
+            title: str, metrics: list[cloudwatch.IMetric], **kwargs
+        ) -> cloudwatch.GraphWidget:
+            return cloudwatch.GraphWidget(title=title, left=metrics, width=8, **kwargs)
+
+        scheduler_row = [
+            graph(
+                "Scheduler loop duration (ms)",
+                [
+                    airflow_metric("scheduler.scheduler_loop_duration"),
+                    airflow_metric("scheduler.scheduler_loop_duration", "p99", "p99"),
+                ],
+            ),
+            graph(
+                "Scheduler critical section (ms)",
+                [
+                    airflow_metric("scheduler.critical_section_duration"),
+                    airflow_metric("scheduler.critical_section_busy", "Sum"),
+                ],
+            ),
+            graph(
+                "DAG parse time (s)",
+                [airflow_metric("dag_processing.total_parse_time")],
+            ),
+        ]
+        executor_row = [
+            graph(
+                "Executor slots",
+                [
+                    airflow_metric("executor.open_slots"),
+                    airflow_metric("executor.queued_tasks"),
+                    airflow_metric("executor.running_tasks"),
+                ],
+            ),
+            graph(
+                "default_pool slots",
+                [
+                    airflow_metric("pool.open_slots.default_pool"),
+                    airflow_metric("pool.queued_slots.default_pool"),
+                    airflow_metric("pool.running_slots.default_pool"),
+                ],
+            ),
+            graph(
+                "Celery queue backlog",
+                [
+                    queue.metric_approximate_number_of_messages_visible(
+                        period=period, label=name
+                    )
+                    for name, queue in broker.queues.items()
+                ],
+                right=[
+                    queue.metric_approximate_age_of_oldest_message(
+                        period=period, label=f"{name} age"
+                    )
+                    for name, queue in broker.queues.items()
+                ],
+            ),
+        ]
+        service_row = [
+            graph(
+                "Service CPU utilization (%)",
+                [
+                    service.fargate_service.metric_cpu_utilization(
+                        period=period, label=name
+                    )
+                    for name, service in services.items()
+                ],
+            ),
+            graph(
+                "Service memory utilization (%)",
+                [
+                    service.fargate_service.metric_memory_utilization(
+                        period=period, label=name
+                    )
+                    for name, service in services.items()
+                ],
+            ),
+            graph(
+                "Task instances",
+                [
+                    airflow_metric("ti_successes", "Sum"),
+                    airflow_metric("ti_failures", "Sum"),
+                    airflow_metric("scheduler.tasks.starving", label="starving"),
+                ],
+            ),
+        ]
+        db_row = [
+            graph(
+                "Metadata DB latency (s)",
+                [
+                    db.metric("ReadLatency", period=period),
+                    db.metric("WriteLatency", period=period),
+                ],
+            ),
+            graph(
+                "Metadata DB load",
+                [db.metric_database_connections(period=period)],
+                right=[db.metric_cpu_utilization(period=period)],
+            ),
+            graph(
+                "DAG task phases (ms)",
+                [
+                    cloudwatch.Metric(
+                        namespace=DAG_TASK_NAMESPACE,
+                        metric_name=metric_name,
+                        dimensions_map={"Script": script},
+                        statistic="Average",
+                        period=period,
+                        label=script,
+                    )
+                    for script, metric_name in DAG_TASK_SCRIPTS.items()
+                ],
+            ),
+        ]
+
+        cloudwatch.Dashboard(
+            self,
+            "Dashboard",
+            widgets=[scheduler_row, executor_row, service_row, db_row],
+        )
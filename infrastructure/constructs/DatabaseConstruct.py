@@ -5,10 +5,12 @@ from aws_cdk import (
     aws_rds as rds,
     aws_secretsmanager as secretsmanager,
     aws_ec2 as ec2,
+    aws_ecs as ecs,
     Stack,
 )
 from constructs import Construct
 from infrastructure.config import default_db_config, DBConfig
+from infrastructure.constructs.PgBouncerConstruct import PgBouncerConstruct
 
 
 class DatabaseConstruct(Construct):
@@ -18,10 +20,13 @@ class DatabaseConstruct(Construct):
         id: str,
         vpc: ec2.Vpc,
         default_security_group: ec2.SecurityGroup,
-        db_config: default_db_config = default_db_config,
+        db_config: DBConfig = default_db_config,
+        cluster: ecs.Cluster | None = None,
+        instance_identifier: str | None = None,
         **kwargs,
     ) -> None:
         super().__init__(scope, id)
+        self._db_config = db_config
 
         backend_secret = secretsmanager.Secret(
             self,
@@ -53,21 +58,38 @@ class DatabaseConstruct(Construct):
             ),
             instance_type=db_config.db_instance_type,
             vpc=vpc,
-            instance_identifier=default_db_config.db_name,
+            instance_identifier=instance_identifier or db_config.db_name,
             security_groups=[default_security_group],
             storage_encrypted=True,
             deletion_protection=False,
-            backup_retention=Duration.days(default_db_config.db_backup_retention),
-            database_name=default_db_config.db_name,
+            backup_retention=Duration.days(db_config.db_backup_retention),
+            database_name=db_config.db_name,
             credentials=rds.Credentials.from_password(
-                username=default_db_config.db_master_user,
+                username=db_config.db_master_user,
                 password=self._db_password,
             ),
-            allocated_storage=default_db_config.db_storage_size,
+            allocated_storage=db_config.db_storage_size,
             auto_minor_version_upgrade=False,
-            port=default_db_config.db_port,
+            port=db_config.db_port,
         )
 
+        # Optionally pool the Airflow connections through PgBouncer
+        self._pgbouncer = None
+        if db_config.connection_pooling:
+            if cluster is None:
+                raise ValueError(
+                    "Connection pooling needs the ECS cluster to run PgBouncer on"
+                )
+            self._pgbouncer = PgBouncerConstruct(
+                self,
+                "PgBouncer",
+                cluster=cluster,
+                default_security_group=default_security_group,
+                db_config=db_config,
+                db_endpoint=self._db.db_instance_endpoint_address,
+                db_secret=backend_secret,
+            )
+
     @property
     def db(self):
         return self._db
@@ -76,17 +98,60 @@ class DatabaseConstruct(Construct):
     def db_password(self):
         return self._db_password
 
+    @property
+    def pgbouncer(self) -> PgBouncerConstruct | None:
+        return self._pgbouncer
+
     @property
     def db_connection_string(self):
         return get_db_connection_string(
-            default_db_config,
+            self._db_config,
             self.db.db_instance_endpoint_address,
             self.db_password.to_string(),
+            pooler_endpoint=self._pgbouncer.endpoint
+            if self._pgbouncer is not None
+            else None,
         )
 
+    @property
+    def direct_db_connection_string(self):
+        """Connection string bypassing PgBouncer, for session-level work such as migrations."""
+        return get_db_connection_string(
+            self._db_config,
+            self.db.db_instance_endpoint_address,
+            self.db_password.to_string(),
+        )
+
+    @property
+    def airflow_environment(self) -> dict[str, str]:
+        return get_sql_alchemy_pool_environment(self._db_config)
 
-def get_db_connection_string(db_config: DBConfig, endpoint: str, password: str) -> str:
+
+def get_db_connection_string(
+    db_config: DBConfig,
+    endpoint: str,
+    password: str,
+    pooler_endpoint: str | None = None,
+) -> str:
+    # Connections go through the pooler when there is one, it listens on the database port
+    host = pooler_endpoint if pooler_endpoint is not None else endpoint
     return (
-        f"postgresql+psycopg2://{db_config.db_master_user}:{password}@{endpoint}:{db_config.db_port}"
+        f"postgresql+psycopg2://{db_config.db_master_user}:{password}@{host}:{db_config.db_port}"
         f"/{db_config.db_name}"
     )
+
+
+def get_sql_alchemy_pool_environment(db_config: DBConfig) -> dict[str, str]:
+    if not db_config.connection_pooling:
+        return {}
+    return {
+        "AIRFLOW__DATABASE__SQL_ALCHEMY_POOL_ENABLED": "True",
+        "AIRFLOW__DATABASE__SQL_ALCHEMY_POOL_SIZE": str(
+            db_config.sql_alchemy_pool_size
+        ),
+        "AIRFLOW__DATABASE__SQL_ALCHEMY_MAX_OVERFLOW": str(
+            db_config.sql_alchemy_max_overflow
+        ),
+        # PgBouncer may drop idle server connections, check before handing one out
+        "AIRFLOW__DATABASE__SQL_ALCHEMY_POOL_PRE_PING": "True",
+    }
@@ -0,0 +1,73 @@
+import hashlib
+import json
+
+from aws_cdk import aws_ecs as ecs
+from aws_cdk.aws_ecr_assets import DockerImageAsset, Platform
+from constructs import Construct
+
+from infrastructure.config import ARM64, X86_64
+
+
+class ImageRegistryConstruct(Construct):
+    """Builds each distinct Docker image once and shares it between task definitions.
+
+    Images are keyed by build directory, Dockerfile, build args and platform, so
+    requesting the same combination twice returns the same asset instead of
+    emitting (and building, pushing and pulling) a second copy.
+    """
+
+    def __init__(self, scope: Construct, id: str) -> None:
+        super().__init__(scope, id)
+        self._assets: dict[str, DockerImageAsset] = {}
+
+    def asset(
+        self,
+        directory: str,
+        file: str | None = None,
+        build_args: dict[str, str] | None = None,
+        platform: Platform | None = None,
+    ) -> DockerImageAsset:
+        key = json.dumps(
+            {
+                "directory": directory,
+                "file": file or "Dockerfile",
+                "build_args": build_args or {},
+                "platform": platform.platform if platform is not None else None,
+            },
+            sort_keys=True,
+        )
+        if key not in self._assets:
+            self._assets[key] = DockerImageAsset(
+                self,
+                f"Image-{hashlib.sha256(key.encode()).hexdigest()[:12]}",
+                directory=directory,
+                file=file,
+                build_args=build_args,
+                platform=platform,
+            )
+        return self._assets[key]
+
+    def image(
+        self,
+        directory: str,
+        file: str | None = None,
+        build_args: dict[str, str] | None = None,
+        platform: Platform | None = None,
+    ) -> ecs.ContainerImage:
+        return ecs.ContainerImage.from_docker_image_asset(
+            self.asset(directory, file=file, build_args=build_args, platform=platform)
+        )
+
+
+def docker_platform(architecture: str) -> Platform:
+    return {X86_64: Platform.LINUX_AMD64, ARM64: Platform.LINUX_ARM64}[architecture]
+
+
+def runtime_platform(architecture: str) -> ecs.RuntimePlatform:
+    return ecs.RuntimePlatform(
+        cpu_architecture={
+            X86_64: ecs.CpuArchitecture.X86_64,
+            ARM64: ecs.CpuArchitecture.ARM64,
+        }[architecture],
+        operating_system_family=ecs.OperatingSystemFamily.LINUX,
+    )
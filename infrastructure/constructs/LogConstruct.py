@@ -0,0 +1,86 @@
+from aws_cdk import (
+    Stack,
+    aws_ecs as ecs,
+    aws_logs as logs,
+)
+from constructs import Construct
+
+from infrastructure.config import LogConfig
+
+LOG_ROUTER_NAME = "log-router"
+
+
+class LogConstruct(Construct):
+    """Log group of one component and the log drivers writing to it.
+
+    ``log_driver`` is called once per task definition: besides the driver it
+    grants the right role write access to the group and, with FireLens, adds
+    the Fluent Bit log router to the task.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        log_config: LogConfig,
+        stream_prefix: str,
+        log_group: logs.ILogGroup | None = None,
+    ) -> None:
+        super().__init__(scope, id)
+        self._log_config = log_config
+        self._stream_prefix = stream_prefix
+        self._log_group = log_group or logs.LogGroup(
+            self,
+            "LogGroup",
+            retention=log_config.retention,
+        )
+
+    @property
+    def log_config(self) -> LogConfig:
+        return self._log_config
+
+    @property
+    def log_group(self) -> logs.ILogGroup:
+        return self._log_group
+
+    def awslogs_driver(self, task_definition: ecs.TaskDefinition) -> ecs.LogDriver:
+        # AwsLogDriver has no max-buffer-size option yet, so the awslogs options are spelled out
+        options = {
+            "awslogs-group": self._log_group.log_group_name,
+            "awslogs-region": Stack.of(self).region,
+            "awslogs-stream-prefix": self._stream_prefix,
+        }
+        if self._log_config.mode == "non-blocking":
+            options["mode"] = "non-blocking"
+            options["max-buffer-size"] = self._log_config.max_buffer_size
+        self._log_group.grant_write(task_definition.obtain_execution_role())
+        return ecs.GenericLogDriver(log_driver="awslogs", options=options)
+
+    def log_driver(self, task_definition: ecs.TaskDefinition) -> ecs.LogDriver:
+        if not self._log_config.firelens:
+            return self.awslogs_driver(task_definition)
+        if task_definition.node.try_find_child(LOG_ROUTER_NAME) is None:
+            task_definition.add_firelens_log_router(
+                LOG_ROUTER_NAME,
+                image=ecs.ContainerImage.from_registry(
+                    self._log_config.fluent_bit_image
+                ),
+                firelens_config=ecs.FirelensConfig(
+                    type=ecs.FirelensLogRouterType.FLUENTBIT
+                ),
+                # The router logs about itself through awslogs
+                logging=self.awslogs_driver(task_definition),
+                memory_reservation_mib=50,
+                # Losing logs must not take Airflow down, and keeps the Airflow container the default one
+                essential=False,
+            )
+        self._log_group.grant_write(task_definition.task_role)
+        return ecs.LogDrivers.firelens(
+            options={
+                "Name": "cloudwatch_logs",
+                "region": Stack.of(self).region,
+                "log_group_name": self._log_group.log_group_name,
+                "log_stream_prefix": f"{self._stream_prefix}/",
+                "auto_create_group": "false",
+            }
+        )
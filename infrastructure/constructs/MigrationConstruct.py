@@ -0,0 +1,115 @@
+from aws_cdk import (
+    CustomResource,
+    Duration,
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    custom_resources as cr,
+)
+from constructs import Construct
+
+from infrastructure.config import ContainerConfig, X86_64
+from infrastructure.constructs.ImageRegistryConstruct import runtime_platform
+from infrastructure.constructs.LogConstruct import LogConstruct
+
+
+class MigrationConstruct(Construct):
+    """One-shot Fargate task that migrates the metadata database and creates the admin user.
+
+    The task is started by a custom resource whenever its task definition
+    changes, i.e. once per deploy, so the long-running services only wait for
+    the migrations instead of each running ``airflow db init`` themselves. The
+    deploy waits up to ``timeout`` minutes for the task to stop and fails unless
+    the migration exited with 0 (see ``functions/run_migration.py``).
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        cluster: ecs.Cluster,
+        image: ecs.ContainerImage,
+        container_config: ContainerConfig,
+        environment: dict[str, str],
+        log: LogConstruct,
+        default_security_group: ec2.SecurityGroup,
+        private_subnet_ids: list[ec2.ISubnet],
+        architecture: str = X86_64,
+        timeout: int = 30,
+    ) -> None:
+        super().__init__(scope, id)
+
+        self._task_definition = ecs.FargateTaskDefinition(
+            self,
+            "MigrationTask",
+            cpu=container_config.cpu,
+            memory_limit_mib=container_config.memory,
+            runtime_platform=runtime_platform(architecture),
+        )
+        self._task_definition.add_container(
+            container_config.name,
+            image=image,
+            environment=environment,
+            logging=log.log_driver(self._task_definition),
+            entry_point=[container_config.entry_point],
+        )
+
+        def handler(name: str, entry_point: str) -> lambda_.Function:
+            return lambda_.Function(
+                self,
+                name,
+                runtime=lambda_.Runtime.PYTHON_3_9,
+                code=lambda_.Code.from_asset("./infrastructure/functions"),
+                handler=f"run_migration.{entry_point}",
+                timeout=Duration.seconds(30),
+            )
+
+        on_event = handler("RunMigrationFunction", "on_event")
+        on_event.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["ecs:RunTask"],
+                resources=[self._task_definition.task_definition_arn],
+            )
+        )
+        on_event.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["iam:PassRole"],
+                resources=[
+                    self._task_definition.task_role.role_arn,
+                    self._task_definition.obtain_execution_role().role_arn,
+                ],
+            )
+        )
+        is_complete = handler("WaitForMigrationFunction", "is_complete")
+        is_complete.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["ecs:DescribeTasks"],
+                resources=["*"],
+                conditions={"ArnEquals": {"ecs:cluster": cluster.cluster_arn}},
+            )
+        )
+        provider = cr.Provider(
+            self,
+            "MigrationProvider",
+            on_event_handler=on_event,
+            is_complete_handler=is_complete,
+            query_interval=Duration.seconds(30),
+            total_timeout=Duration.minutes(timeout),
+        )
+        CustomResource(
+            self,
+            "RunMigration",
+            service_token=provider.service_token,
+            properties={
+                "Cluster": cluster.cluster_name,
+                "TaskDefinition": self._task_definition.task_definition_arn,
+                "ContainerName": container_config.name,
+                "Subnets": [subnet.subnet_id for subnet in private_subnet_ids],
+                "SecurityGroups": [default_security_group.security_group_id],
+            },
+        )
+
+    @property
+    def task_definition(self) -> ecs.FargateTaskDefinition:
+        return self._task_definition
@@ -0,0 +1,85 @@
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_ecs as ecs,
+    aws_logs as logs,
+    aws_secretsmanager as secretsmanager,
+)
+from constructs import Construct
+
+from infrastructure.config import DBConfig
+
+PGBOUNCER_IMAGE = "edoburu/pgbouncer:1.18.0"
+CLOUD_MAP_NAMESPACE = "airflow.local"
+
+
+class PgBouncerConstruct(Construct):
+    """PgBouncer service pooling the Airflow connections to the metadata database.
+
+    The service registers as ``pgbouncer.<namespace>`` in the cluster's Cloud Map
+    namespace so that Airflow can reach it by name.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        cluster: ecs.Cluster,
+        default_security_group: ec2.SecurityGroup,
+        db_config: DBConfig,
+        db_endpoint: str,
+        db_secret: secretsmanager.ISecret,
+    ) -> None:
+        super().__init__(scope, id)
+
+        if cluster.default_cloud_map_namespace is None:
+            cluster.add_default_cloud_map_namespace(name=CLOUD_MAP_NAMESPACE)
+        self._namespace_name = cluster.default_cloud_map_namespace.namespace_name
+
+        task_definition = ecs.FargateTaskDefinition(
+            self,
+            "PgBouncerTask",
+            cpu=256,
+            memory_limit_mib=512,
+        )
+        container = task_definition.add_container(
+            "pgbouncer",
+            image=ecs.ContainerImage.from_registry(PGBOUNCER_IMAGE),
+            environment={
+                "DB_HOST": db_endpoint,
+                "DB_PORT": str(db_config.db_port),
+                "DB_USER": db_config.db_master_user,
+                "DB_NAME": db_config.db_name,
+                "LISTEN_PORT": str(db_config.db_port),
+                "AUTH_TYPE": "scram-sha-256",
+                "POOL_MODE": db_config.pool_mode,
+                "DEFAULT_POOL_SIZE": str(db_config.default_pool_size),
+                "MAX_CLIENT_CONN": str(db_config.max_client_connections),
+            },
+            secrets={
+                "DB_PASSWORD": ecs.Secret.from_secrets_manager(db_secret, "password"),
+            },
+            logging=ecs.AwsLogDriver(
+                stream_prefix="PgBouncer",
+                log_retention=logs.RetentionDays.ONE_MONTH,
+            ),
+        )
+        container.add_port_mappings(ecs.PortMapping(container_port=db_config.db_port))
+
+        self._service = ecs.FargateService(
+            self,
+            "PgBouncerService",
+            cluster=cluster,
+            task_definition=task_definition,
+            platform_version=ecs.FargatePlatformVersion.VERSION1_4,
+            security_groups=[default_security_group],
+            cloud_map_options=ecs.CloudMapOptions(name="pgbouncer"),
+        )
+        self._service.connections.allow_internally(ec2.Port.tcp(db_config.db_port))
+
+    @property
+    def endpoint(self) -> str:
+        return f"pgbouncer.{self._namespace_name}"
+
+    @property
+    def service(self) -> ecs.FargateService:
+        return self._service
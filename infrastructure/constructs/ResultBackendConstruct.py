@@ -0,0 +1,81 @@
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_elasticache as elasticache,
+)
+from constructs import Construct
+
+from infrastructure.config import ResultBackendConfig
+from infrastructure.constructs.DatabaseConstruct import DatabaseConstruct
+
+REDIS_PORT = 6379
+
+
+class ResultBackendConstruct(Construct):
+    """Celery result backend, kept off the metadata database unless configured otherwise."""
+
+    def __init__(
+        self,
+        scope: Construct,
+        id: str,
+        vpc: ec2.Vpc,
+        default_security_group: ec2.SecurityGroup,
+        result_backend_config: ResultBackendConfig,
+        db_connection_string: str,
+    ) -> None:
+        super().__init__(scope, id)
+
+        if result_backend_config.backend == "dedicated_database":
+            db_config = result_backend_config.db_config
+            result_db = DatabaseConstruct(
+                self,
+                "ResultBackendDB",
+                vpc=vpc,
+                default_security_group=default_security_group,
+                db_config=db_config,
+                # Never the metadata database's identifier, even when both use the same db_name
+                instance_identifier=f"{db_config.db_name}-results",
+            )
+            self._result_backend = f"db+{result_db.db_connection_string}"
+        elif result_backend_config.backend == "redis":
+            self._result_backend = self.create_redis(
+                vpc, default_security_group, result_backend_config
+            )
+        else:
+            self._result_backend = f"db+{db_connection_string}"
+
+    def create_redis(
+        self,
+        vpc: ec2.Vpc,
+        default_security_group: ec2.SecurityGroup,
+        result_backend_config: ResultBackendConfig,
+    ) -> str:
+        security_group = ec2.SecurityGroup(
+            self,
+            "RedisSecurityGroup",
+            vpc=vpc,
+            description="Celery result backend",
+        )
+        security_group.add_ingress_rule(
+            default_security_group, ec2.Port.tcp(REDIS_PORT)
+        )
+        subnet_group = elasticache.CfnSubnetGroup(
+            self,
+            "RedisSubnetGroup",
+            description="Celery result backend",
+            subnet_ids=[subnet.subnet_id for subnet in vpc.private_subnets],
+        )
+        redis = elasticache.CfnCacheCluster(
+            self,
+            "Redis",
+            engine="redis",
+            cache_node_type=result_backend_config.cache_node_type,
+            num_cache_nodes=1,
+            port=REDIS_PORT,
+            cache_subnet_group_name=subnet_group.ref,
+            vpc_security_group_ids=[security_group.security_group_id],
+        )
+        return f"redis://{redis.attr_redis_endpoint_address}:{redis.attr_redis_endpoint_port}/0"
+
+    @property
+    def result_backend(self) -> str:
+        return self._result_backend
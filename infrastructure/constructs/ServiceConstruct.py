@@ -2,6 +2,8 @@ from aws_cdk import (
     CfnOutput,
     Duration,
     Stack,
+    aws_applicationautoscaling as appscaling,
+    aws_cloudwatch as cloudwatch,
     aws_ec2 as ec2,
     aws_ecs as ecs,
     aws_elasticloadbalancingv2 as elbv2,
@@ -9,7 +11,12 @@ from aws_cdk import (
 from aws_cdk.aws_iam import ManagedPolicy
 from constructs import Construct
 
-from infrastructure.config import worker_autoscaling_config
+from infrastructure.config import (
+    AutoScalingConfig,
+    WebTierConfig,
+    worker_autoscaling_config,
+)
+from infrastructure.constructs.BrokerConstruct import BrokerConstruct
 
 
 class ServiceConstruct(Construct):
@@ -21,14 +28,22 @@ class ServiceConstruct(Construct):
         default_security_group: ec2.SecurityGroup,
         cluster: ecs.Cluster,
         task_definition: ecs.FargateTaskDefinition,
+        broker: BrokerConstruct,
         is_worker_service: bool = False,
+        load_balanced: bool | None = None,
+        autoscaling_config: AutoScalingConfig = worker_autoscaling_config,
+        celery_queue: str | None = None,
+        desired_count: int | None = None,
+        web_tier_config: WebTierConfig | None = None,
         **kwargs,
     ) -> None:
         super().__init__(scope, id)
+        self._autoscaling_config = autoscaling_config
+        # Queue whose backlog drives queue depth scaling
+        self._celery_queue = celery_queue or autoscaling_config.queue_name
 
         # Attach required policies to the Task Role
         policies = [
-            ManagedPolicy.from_aws_managed_policy_name("AmazonSQSFullAccess"),
             ManagedPolicy.from_aws_managed_policy_name("AmazonECS_FullAccess"),
             ManagedPolicy.from_aws_managed_policy_name(
                 "AmazonElasticFileSystemClientReadWriteAccess"
@@ -37,6 +52,12 @@ class ServiceConstruct(Construct):
         ]
         for policy in policies:
             task_definition.task_role.add_managed_policy(policy)
+        broker.grant(task_definition.task_role)
+        self._broker = broker
+
+        # Worker services autoscale, every other service sits behind a load balancer unless told otherwise
+        if load_balanced is None:
+            load_balanced = not is_worker_service
 
         # Create a Fargate Service for Airflow
         self._fargate_service = ecs.FargateService(
@@ -44,8 +65,16 @@ class ServiceConstruct(Construct):
             id,
             cluster=cluster,
             task_definition=task_definition,
+            desired_count=web_tier_config.min_capacity
+            if web_tier_config
+            else desired_count,
             platform_version=ecs.FargatePlatformVersion.VERSION1_4,
             security_groups=[default_security_group],
+            # Give the entry scripts time to pass their readiness checks
+            health_check_grace_period=Duration.seconds(300) if load_balanced else None,
+            capacity_provider_strategies=(
+                self.capacity_provider_strategies() if is_worker_service else None
+            ),
         )
         allowed_ports = ec2.Port(
             protocol=ec2.Protocol.TCP,
@@ -56,9 +85,16 @@ class ServiceConstruct(Construct):
         self._fargate_service.connections.allow_from_any_ipv4(allowed_ports)
         if is_worker_service:
             self.configure_autoscaling()
-        else:
+        self._load_balancer_dns_name = None
+        if load_balanced:
             self._load_balancer_dns_name = CfnOutput(
-                self, "LoadBalancerDNSName", value=self.attach_load_balancer(vpc)
+                self,
+                "LoadBalancerDNSName",
+                value=(
+                    self.attach_application_load_balancer(vpc, web_tier_config)
+                    if web_tier_config is not None
+                    else self.attach_load_balancer(vpc)
+                ),
             )
 
     def attach_load_balancer(self, vpc: ec2.Vpc) -> str:
@@ -82,7 +118,10 @@ class ServiceConstruct(Construct):
             f"{id}TargetGroup",
             port=80,
             targets=[self._fargate_service],
+            # Only route to tasks whose webserver actually answers
             health_check=elbv2.HealthCheck(
+                protocol=elbv2.Protocol.HTTP,
+                path="/health",
                 healthy_threshold_count=2,
                 unhealthy_threshold_count=2,
             ),
@@ -90,31 +129,166 @@ class ServiceConstruct(Construct):
         target_group.set_attribute("deregistration_delay.timeout_seconds", "60")
         return load_balancer.load_balancer_dns_name
 
+    def attach_application_load_balancer(
+        self, vpc: ec2.Vpc, web_tier_config: WebTierConfig
+    ) -> str:
+        load_balancer = elbv2.ApplicationLoadBalancer(
+            self,
+            "WebLoadBalancer",
+            vpc=vpc,
+            internet_facing=True,
+            idle_timeout=Duration.seconds(web_tier_config.idle_timeout),
+        )
+        listener = load_balancer.add_listener("WebListener", port=80)
+        target_group = listener.add_targets(
+            "WebTargetGroup",
+            # The webserver's container port, not the listener's
+            port=self._fargate_service.task_definition.default_container.container_port,
+            protocol=elbv2.ApplicationProtocol.HTTP,
+            targets=[self._fargate_service],
+            health_check=elbv2.HealthCheck(
+                path=web_tier_config.health_check_path,
+                healthy_http_codes="200",
+                interval=Duration.seconds(15),
+                timeout=Duration.seconds(5),
+                healthy_threshold_count=2,
+                unhealthy_threshold_count=3,
+            ),
+            deregistration_delay=Duration.seconds(60),
+        )
+        self.configure_web_autoscaling(target_group, web_tier_config)
+        return load_balancer.load_balancer_dns_name
+
+    def configure_web_autoscaling(
+        self, target_group: elbv2.ApplicationTargetGroup, web_tier_config: WebTierConfig
+    ):
+        scaling = self._fargate_service.auto_scale_task_count(
+            min_capacity=web_tier_config.min_capacity,
+            max_capacity=web_tier_config.max_capacity,
+        )
+        scaling.scale_on_request_count(
+            "RequestCountScaling",
+            requests_per_target=web_tier_config.requests_per_target,
+            target_group=target_group,
+            scale_in_cooldown=Duration.seconds(300),
+            scale_out_cooldown=Duration.seconds(60),
+        )
+        # Slow responses add tasks even below the request target, e.g. for expensive API calls.
+        # Scaling in is left to the request count policy.
+        target_response_time = web_tier_config.target_response_time
+        scaling.scale_on_metric(
+            "LatencyScaling",
+            metric=target_group.metrics.target_response_time(
+                statistic="p90",
+                period=Duration.minutes(1),
+            ),
+            adjustment_type=appscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+            scaling_steps=[
+                appscaling.ScalingInterval(upper=target_response_time, change=0),
+                appscaling.ScalingInterval(lower=target_response_time, change=+1),
+                appscaling.ScalingInterval(lower=target_response_time * 3, change=+2),
+            ],
+            cooldown=Duration.seconds(120),
+            evaluation_periods=2,
+        )
+
+    def capacity_provider_strategies(self) -> list[ecs.CapacityProviderStrategy] | None:
+        capacity_provider_config = self._autoscaling_config.capacity_provider_config
+        if capacity_provider_config is None:
+            return None
+        return [
+            ecs.CapacityProviderStrategy(
+                capacity_provider="FARGATE",
+                base=capacity_provider_config.on_demand_base,
+                weight=capacity_provider_config.on_demand_weight,
+            ),
+            ecs.CapacityProviderStrategy(
+                capacity_provider="FARGATE_SPOT",
+                weight=capacity_provider_config.spot_weight,
+            ),
+        ]
+
     def configure_autoscaling(self):
         # Create an autoscaling policy for the service
         scaling = self._fargate_service.auto_scale_task_count(
-            max_capacity=worker_autoscaling_config.max_capacity,
-            min_capacity=worker_autoscaling_config.min_capacity,
+            max_capacity=self._autoscaling_config.max_capacity,
+            min_capacity=self._autoscaling_config.min_capacity,
         )
-        if worker_autoscaling_config.target_cpu_utilization is not None:
+        if self._autoscaling_config.scaling_mode == "queue_depth":
+            self.configure_queue_depth_scaling(scaling)
+            return
+        if self._autoscaling_config.target_cpu_utilization is not None:
             scaling.scale_on_cpu_utilization(
                 "CpuScaling",
-                target_utilization_percent=worker_autoscaling_config.target_cpu_utilization,
+                target_utilization_percent=self._autoscaling_config.target_cpu_utilization,
                 scale_in_cooldown=Duration.seconds(60),
                 scale_out_cooldown=Duration.seconds(60),
             )
-        if worker_autoscaling_config.target_memory_utilization is not None:
+        if self._autoscaling_config.target_memory_utilization is not None:
             scaling.scale_on_memory_utilization(
                 "MemoryScaling",
-                target_utilization_percent=worker_autoscaling_config.target_memory_utilization,
+                target_utilization_percent=self._autoscaling_config.target_memory_utilization,
                 scale_in_cooldown=Duration.seconds(60),
                 scale_out_cooldown=Duration.seconds(60),
             )
 
+    def configure_queue_depth_scaling(self, scaling: ecs.ScalableTaskCount):
+        queue = self._broker.queues.get(self._celery_queue)
+        if queue is None:
+            raise ValueError(
+                f"Celery queue {self._celery_queue!r} is not in the broker config"
+            )
+        backlog_per_worker = self._autoscaling_config.backlog_per_worker
+        period = Duration.minutes(1)
+        # Celery backlog per running worker. With no running workers the backlog is
+        # scaled up so that a single message is enough to scale out from zero.
+        # Container Insights may publish no RunningTaskCount at all while a service
+        # has no tasks, FILL keeps the expression (and the alarms) from going empty.
+        backlog_per_task = cloudwatch.MathExpression(
+            expression=(
+                "IF(FILL(running, 0) > 0, (visible + in_flight) / FILL(running, 0), "
+                f"(visible + in_flight) * {backlog_per_worker})"
+            ),
+            using_metrics={
+                "visible": queue.metric_approximate_number_of_messages_visible(
+                    statistic="Maximum",
+                    period=period,
+                ),
+                "in_flight": queue.metric_approximate_number_of_messages_not_visible(
+                    statistic="Maximum",
+                    period=period,
+                ),
+                "running": cloudwatch.Metric(
+                    namespace="ECS/ContainerInsights",
+                    metric_name="RunningTaskCount",
+                    dimensions_map={
+                        "ClusterName": self._fargate_service.cluster.cluster_name,
+                        "ServiceName": self._fargate_service.service_name,
+                    },
+                    statistic="Average",
+                    period=period,
+                ),
+            },
+            label="Celery backlog per worker",
+            period=period,
+        )
+        scaling.scale_on_metric(
+            "QueueDepthScaling",
+            metric=backlog_per_task,
+            adjustment_type=appscaling.AdjustmentType.CHANGE_IN_CAPACITY,
+            scaling_steps=[
+                appscaling.ScalingInterval(upper=backlog_per_worker / 2, change=-1),
+                appscaling.ScalingInterval(lower=backlog_per_worker, change=+1),
+                appscaling.ScalingInterval(lower=backlog_per_worker * 3, change=+3),
+            ],
+            cooldown=Duration.seconds(60),
+            evaluation_periods=2,
+        )
+
     @property
     def fargate_service(self) -> ecs.FargateService:
         return self._fargate_service
 
     @property
-    def load_balancer_dns_name(self) -> CfnOutput:
+    def load_balancer_dns_name(self) -> CfnOutput | None:
         return self._load_balancer_dns_name
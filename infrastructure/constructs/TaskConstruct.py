@@ -1,11 +1,14 @@
 from aws_cdk import (
     aws_ec2 as ec2,
     aws_ecs as ecs,
+    aws_efs as efs,
 )
-from aws_cdk.aws_ecr_assets import DockerImageAsset
-from aws_cdk.aws_iam import ManagedPolicy
 from constructs import Construct
 
+from infrastructure.config import SharedVolumeConfig, X86_64
+from infrastructure.constructs.ImageRegistryConstruct import runtime_platform
+from infrastructure.constructs.LogConstruct import LogConstruct
+
 
 class TaskConstruct(Construct):
     def __init__(
@@ -14,15 +17,21 @@ class TaskConstruct(Construct):
         id: str,
         task_family_name: str,
         container_name: str,
-        container_asset_dir: str,
+        image: ecs.ContainerImage,
         cpu: int,
         memory: int,
-        logging: ecs.LogDriver,
+        log: LogConstruct,
         efs_volume_name: str | None,
         efs_container_path: str | None,
-        efs_file_system_id: str | None,
+        efs_file_system: efs.FileSystem | None,
+        command: list[str] | None = None,
+        architecture: str = X86_64,
+        efs_access_point: efs.AccessPoint | None = None,
+        shared_volume_config: SharedVolumeConfig | None = None,
+        ephemeral_storage_gib: int | None = None,
     ) -> None:
         super().__init__(scope, f"{id}-TaskConstruct")
+        shared_volume_config = shared_volume_config or SharedVolumeConfig()
 
         worker_task = ecs.FargateTaskDefinition(
             self,
@@ -30,33 +39,47 @@ class TaskConstruct(Construct):
             family=task_family_name,
             cpu=cpu,
             memory_limit_mib=memory,
+            runtime_platform=runtime_platform(architecture),
+            ephemeral_storage_gib=ephemeral_storage_gib,
         )
-        if efs_file_system_id is not None:
+        if efs_file_system is not None:
             worker_task.add_volume(
                 name=efs_volume_name,
                 efs_volume_configuration=ecs.EfsVolumeConfiguration(
-                    file_system_id=efs_file_system_id,
+                    file_system_id=efs_file_system.file_system_id,
+                    # Access points only work with transit encryption
+                    transit_encryption="ENABLED",
+                    authorization_config=ecs.AuthorizationConfig(
+                        access_point_id=efs_access_point.access_point_id
+                        if efs_access_point
+                        else None,
+                        iam="ENABLED"
+                        if shared_volume_config.iam_authorization
+                        else "DISABLED",
+                    ),
                 ),
             )
 
-            worker_task.task_role.add_managed_policy(
-                ManagedPolicy.from_aws_managed_policy_name(
-                    "AmazonElasticFileSystemClientReadWriteAccess"
-                )
+            # With IAM authorization the mount is allowed by the task role, not just the network
+            efs_file_system.grant(
+                worker_task.task_role,
+                "elasticfilesystem:ClientMount",
+                "elasticfilesystem:ClientWrite",
             )
 
-        worker_image_asset = DockerImageAsset(
-            self,
-            f"{container_name}-BuildImage",
-            directory=container_asset_dir,
-        )
+        # Tell the task scripts how much to log and where the shared volume is mounted
+        environment = dict(log.log_config.script_environment)
+        if efs_file_system is not None:
+            environment["SHARED_VOLUME_ROOT"] = efs_container_path
 
         container = worker_task.add_container(
             container_name,
-            image=ecs.ContainerImage.from_docker_image_asset(worker_image_asset),
-            logging=logging,
+            image=image,
+            logging=log.log_driver(worker_task),
+            environment=environment,
+            command=command,
         )
-        if efs_file_system_id is not None:
+        if efs_file_system is not None:
             container.add_mount_points(
                 ecs.MountPoint(
                     container_path=efs_container_path,
@@ -0,0 +1,66 @@
+"""Custom resource handlers that run the one-shot migration task and wait for it.
+
+``on_event`` starts the task and fails the deploy when ECS cannot place it.
+``is_complete`` is polled by the provider framework until the task stops and
+fails the deploy unless the migration container exited with 0, so a broken
+migration rolls the stack back instead of leaving the services waiting for it.
+"""
+import boto3
+
+
+def ecs_client():
+    return boto3.client("ecs")
+
+
+def on_event(event, context):
+    if event["RequestType"] == "Delete":
+        return {"PhysicalResourceId": event["PhysicalResourceId"]}
+    properties = event["ResourceProperties"]
+    response = ecs_client().run_task(
+        cluster=properties["Cluster"],
+        taskDefinition=properties["TaskDefinition"],
+        launchType="FARGATE",
+        platformVersion="1.4.0",
+        networkConfiguration={
+            "awsvpcConfiguration": {
+                "subnets": properties["Subnets"],
+                "securityGroups": properties["SecurityGroups"],
+                "assignPublicIp": "DISABLED",
+            }
+        },
+    )
+    if response["failures"]:
+        raise RuntimeError(
+            f"Could not start the migration task: {response['failures']}"
+        )
+    return {
+        # A new task definition revision (new image or environment) runs the migration again
+        "PhysicalResourceId": properties["TaskDefinition"],
+        "Data": {"TaskArn": response["tasks"][0]["taskArn"]},
+    }
+
+
+def is_complete(event, context):
+    if event["RequestType"] == "Delete":
+        return {"IsComplete": True}
+    properties = event["ResourceProperties"]
+    task_arn = event["Data"]["TaskArn"]
+    task = ecs_client().describe_tasks(cluster=properties["Cluster"], tasks=[task_arn])[
+        "tasks"
+    ][0]
+    if task["lastStatus"] != "STOPPED":
+        return {"IsComplete": False}
+    exit_code = next(
+        (
+            container.get("exitCode")
+            for container in task["containers"]
+            if container["name"] == properties["ContainerName"]
+        ),
+        None,
+    )
+    if exit_code != 0:
+        raise RuntimeError(
+            f"Migration task {task_arn} stopped with exit code {exit_code}: "
+            f"{task.get('stoppedReason', 'no reason given')}"
+        )
+    return {"IsComplete": True}
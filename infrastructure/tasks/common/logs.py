@@ -0,0 +1,26 @@
+"""Log level and number sampling shared by the task scripts.
+
+``$LOG_LEVEL`` (default ``INFO``) filters the scripts' messages: ``DEBUG``
+adds a line per file touched, ``WARNING`` leaves only problems. ``$LOG_SAMPLE``
+is the default of the scripts' ``--sample`` option: 1 echoes every number,
+N every Nth one and 0 none. Numbers are echoed to stdout in blocks, outside
+the ``logging`` module, so sampling is what keeps them off the critical path.
+"""
+import logging
+import os
+import sys
+
+DEFAULT_SAMPLE = 1
+
+
+def get_logger(name: str) -> logging.Logger:
+    logging.basicConfig(
+        stream=sys.stdout,
+        format="%(message)s",
+        level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    )
+    return logging.getLogger(name)
+
+
+def default_sample() -> int:
+    return int(os.environ.get("LOG_SAMPLE", DEFAULT_SAMPLE))
@@ -0,0 +1,106 @@
+"""Per-phase timings, counts and byte totals for the task scripts.
+
+Metrics are collected in memory and written as a single document when the
+script calls ``flush``. The sink is chosen with ``$METRICS_SINK``:
+
+* ``emf`` (the default) prints CloudWatch Embedded Metric Format JSON to
+  stdout, which CloudWatch Logs turns into metrics in ``$METRICS_NAMESPACE``.
+* ``json`` writes the plain values as one JSON line to ``$METRICS_FILE``
+  (stdout when unset), for local runs and tests.
+* ``none`` drops them.
+
+Usage::
+
+    metrics = Metrics.from_environment(Script="even_numbers")
+    with metrics.phase("Write"):
+        written = write_numbers(...)
+    metrics.put("Bytes", written, "Bytes")
+    metrics.flush()
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+SINKS = ("emf", "json", "none")
+DEFAULT_NAMESPACE = "AirflowOnFargate/DagTasks"
+
+
+class Metrics:
+    def __init__(
+        self,
+        sink: str = "emf",
+        namespace: str = DEFAULT_NAMESPACE,
+        path: Optional[str] = None,
+        **dimensions: str,
+    ):
+        if sink not in SINKS:
+            raise ValueError(f"Unknown metrics sink {sink!r}, expected one of {SINKS}")
+        self.sink = sink
+        self.namespace = namespace
+        self.path = path
+        self.dimensions = dimensions
+        self.values: Dict[str, float] = {}
+        self.units: Dict[str, str] = {}
+
+    @classmethod
+    def from_environment(cls, **dimensions: str) -> "Metrics":
+        return cls(
+            os.environ.get("METRICS_SINK", "emf"),
+            os.environ.get("METRICS_NAMESPACE", DEFAULT_NAMESPACE),
+            os.environ.get("METRICS_FILE") or None,
+            **dimensions,
+        )
+
+    def put(self, name: str, value: float, unit: str = "Count") -> None:
+        """Add ``value`` to the metric ``name``."""
+        self.values[name] = self.values.get(name, 0) + value
+        self.units[name] = unit
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the block as ``<name>Time`` in milliseconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(
+                f"{name}Time", (time.perf_counter() - started) * 1000, "Milliseconds"
+            )
+
+    def document(self) -> dict:
+        if self.sink == "json":
+            return {**self.dimensions, **self.values}
+        metric_definitions: List[Dict[str, str]] = [
+            {"Name": name, "Unit": self.units[name]} for name in self.values
+        ]
+        dimension_sets: List[List[str]] = [sorted(self.dimensions)]
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": dimension_sets,
+                        "Metrics": metric_definitions,
+                    }
+                ],
+            },
+            **self.dimensions,
+            **self.values,
+        }
+
+    def flush(self) -> None:
+        """Write the collected metrics to the sink and start over."""
+        if self.sink != "none" and self.values:
+            line = json.dumps(self.document()) + "\n"
+            if self.path is not None and self.sink == "json":
+                with open(self.path, "a") as f:
+                    f.write(line)
+            else:
+                sys.stdout.write(line)
+                sys.stdout.flush()
+        self.values.clear()
+        self.units.clear()
@@ -0,0 +1,86 @@
+"""Reader and writer for the binary intermediate files, one-dimensional int64 ``.npy`` arrays.
+
+The files follow the NumPy ``.npy`` format version 1.0: a magic string, a
+header describing a ``<i8`` array of ``count`` numbers, padded to 64 bytes,
+and then the numbers as fixed-width little-endian int64. NumPy can load them
+with ``numpy.load``, but the task scripts only need the standard library.
+
+``mapped`` exposes the numbers of a file as a memoryview over an mmap, so the
+merge step reads them without copying or parsing.
+"""
+import ast
+import mmap
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Tuple
+
+MAGIC = b"\x93NUMPY\x01\x00"
+DTYPE = "<i8"
+ITEM_SIZE = 8
+ALIGNMENT = 64
+EXTENSION = ".npy"
+
+
+def header(count: int) -> bytes:
+    """Return the ``.npy`` header for ``count`` little-endian int64 numbers."""
+    description = (
+        f"{{'descr': '{DTYPE}', 'fortran_order': False, 'shape': ({count},), }}"
+    )
+    # Pad with spaces so the data starts on an ALIGNMENT boundary, the header ends in a newline
+    length = len(MAGIC) + 2 + len(description) + 1
+    description += " " * (-length % ALIGNMENT) + "\n"
+    return MAGIC + struct.pack("<H", len(description)) + description.encode("latin1")
+
+
+def read_header(f) -> Tuple[int, int]:
+    """Read the header of the ``.npy`` file ``f`` and return its count and data offset."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a version 1.0 .npy file")
+    (length,) = struct.unpack("<H", f.read(2))
+    description = ast.literal_eval(f.read(length).decode("latin1"))
+    if (
+        description["descr"] != DTYPE
+        or description["fortran_order"]
+        or len(description["shape"]) != 1
+    ):
+        raise ValueError(f"{f.name} does not hold a one-dimensional {DTYPE} array")
+    return description["shape"][0], len(MAGIC) + 2 + length
+
+
+def pack(numbers: Iterable[int]) -> bytes:
+    """Return ``numbers`` as little-endian int64 bytes."""
+    packed = array("q", numbers)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def count(file_path: str) -> int:
+    with open(file_path, "rb") as f:
+        return read_header(f)[0]
+
+
+@contextmanager
+def mapped(file_path: str) -> Iterator[memoryview]:
+    """Map ``file_path`` read-only and yield its numbers as a memoryview of int64."""
+    with open(file_path, "rb") as f:
+        _, offset = read_header(f)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            data = memoryview(buffer)[offset:]
+            try:
+                if sys.byteorder == "little":
+                    numbers = data.cast("q")
+                else:
+                    # Big-endian hosts pay for a byte-swapped copy instead of the zero-copy view
+                    swapped = array("q", data.tobytes())
+                    swapped.byteswap()
+                    numbers = memoryview(swapped)
+                try:
+                    yield numbers
+                finally:
+                    # The mmap cannot close while views of it are alive
+                    numbers.release()
+            finally:
+                data.release()
@@ -1,16 +1,7 @@
-from argparse import ArgumentParser
+from number_writer import build_parser, run
 
-parser = ArgumentParser(description="Airflow Fargate Example")
-parser.add_argument("number", help="number", type=int)
+parser = build_parser(description="Airflow Fargate Example")
 
 if __name__ == "__main__":
     args = parser.parse_args()
-    number = args.number
-
-    print("Printing Even numbers in given range")
-    f = open("/shared-volume/even.txt", "a")
-    for i in range(int(number)):
-        if i % 2 == 0:
-            f.write(str(i))
-            print(i)
-    f.close()
+    run(args, "even.txt", start=0, label="Even")
@@ -0,0 +1,265 @@
+"""Batched writer shared by the even/odd number generator tasks.
+
+Numbers are written as newline-delimited decimal text (one number per line,
+every line terminated by ``\\n``), or with ``--format npy`` as a binary int64
+``.npy`` array (see ``npy``). Instead of one ``write()`` and one ``print()``
+per number, each range is rendered in chunks of ``chunk_size`` numbers with a
+single ``str.join`` or ``array`` and written with a single call.
+
+With more than one shard the range is split into contiguous shards that are
+written to ``<name>.<index>.txt`` by a process pool, alongside a
+``<name>.manifest.json`` listing the shard files in order for the merge step.
+
+When the range is fanned out over several tasks instead, ``--part-index I
+--part-count K`` makes a run write only the Ith of K contiguous parts, to
+``<name>.<I>.txt`` (which can in turn be sharded across processes).
+
+Each run reports its write time, numbers and bytes written through ``metrics``.
+"""
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import npy
+from logs import default_sample, get_logger
+from metrics import Metrics
+
+FORMATS = ("text", "npy")
+EXTENSIONS = {"text": ".txt", "npy": npy.EXTENSION}
+DEFAULT_CHUNK_SIZE = 1 << 16
+DEFAULT_VOLUME_ROOT = "/shared-volume"
+MANIFEST_SUFFIX = ".manifest.json"
+
+logger = get_logger(__name__)
+
+
+def build_parser(description: str) -> ArgumentParser:
+    parser = ArgumentParser(description=description)
+    parser.add_argument("number", help="number", type=int)
+    parser.add_argument(
+        "--volume-root",
+        help="directory shared with the merge task (defaults to $SHARED_VOLUME_ROOT)",
+        default=os.environ.get("SHARED_VOLUME_ROOT", DEFAULT_VOLUME_ROOT),
+    )
+    parser.add_argument(
+        "--run-id",
+        help="keep this DAG run's files in their own directory under the volume root",
+        default="",
+    )
+    parser.add_argument(
+        "--format",
+        help="write decimal text or a binary int64 .npy array",
+        choices=FORMATS,
+        default="text",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="numbers rendered per write call",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+    )
+    log_mode = parser.add_mutually_exclusive_group()
+    log_mode.add_argument(
+        "--quiet",
+        help="only log a summary line instead of every number",
+        action="store_true",
+    )
+    log_mode.add_argument(
+        "--sample",
+        help="log every Nth number instead of every number (defaults to $LOG_SAMPLE or 1)",
+        type=int,
+        default=default_sample(),
+        metavar="N",
+    )
+    parser.add_argument(
+        "--workers",
+        help="number of processes writing shards in parallel",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--shards",
+        help="number of contiguous shards to split the range into (defaults to --workers)",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--part-index",
+        help="only write this part of the range, when it is fanned out over several tasks",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--part-count",
+        help="number of parts the range is fanned out over",
+        type=int,
+        default=1,
+    )
+    return parser
+
+
+def write_numbers(
+    file_path: str,
+    start: int,
+    stop: int,
+    step: int = 2,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    sample: int = 1,
+    log=sys.stdout,
+    fmt: str = "text",
+) -> int:
+    """Write ``range(start, stop, step)`` to ``file_path`` in ``fmt`` and return the bytes written.
+
+    ``sample`` controls what is echoed to ``log``: 1 echoes every number,
+    N echoes every Nth number and 0 echoes nothing.
+    """
+    written = 0
+    chunk_span = step * chunk_size
+    sample_span = step * sample
+    with open(file_path, "wb") as f:
+        if fmt == "npy":
+            written += f.write(npy.header(len(range(start, stop, step))))
+        for chunk_start in range(start, stop, chunk_span):
+            chunk_stop = min(chunk_start + chunk_span, stop)
+            numbers = range(chunk_start, chunk_stop, step)
+            block = None
+            if fmt == "text" or sample == 1:
+                block = "\n".join(map(str, numbers)) + "\n"
+            written += f.write(npy.pack(numbers) if fmt == "npy" else block.encode())
+            if sample == 1:
+                log.write(block)
+            elif sample > 1:
+                # First sampled number at or after chunk_start, aligned to start
+                offset = -(-(chunk_start - start) // sample_span) * sample_span
+                sampled = range(start + offset, chunk_stop, sample_span)
+                if sampled:
+                    log.write("\n".join(map(str, sampled)) + "\n")
+    return written
+
+
+def manifest_path(file_path: str) -> str:
+    return os.path.splitext(file_path)[0] + MANIFEST_SUFFIX
+
+
+def shard_path(file_path: str, index: int) -> str:
+    base, ext = os.path.splitext(file_path)
+    return f"{base}.{index:05d}{ext}"
+
+
+def split_range(start: int, stop: int, step: int, shards: int) -> List[Tuple[int, int]]:
+    """Split ``range(start, stop, step)`` into at most ``shards`` contiguous, step-aligned ranges."""
+    count = len(range(start, stop, step))
+    shards = max(1, min(shards, count))
+    per_shard, remainder = divmod(count, shards)
+    bounds = []
+    shard_start = start
+    for index in range(shards):
+        shard_stop = min(shard_start + (per_shard + (index < remainder)) * step, stop)
+        bounds.append((shard_start, shard_stop))
+        shard_start = shard_stop
+    return bounds
+
+
+def _write_shard(
+    file_path: str, start: int, stop: int, step: int, chunk_size: int, fmt: str
+) -> int:
+    return write_numbers(
+        file_path, start, stop, step=step, chunk_size=chunk_size, sample=0, fmt=fmt
+    )
+
+
+def write_sharded(
+    file_path: str,
+    start: int,
+    stop: int,
+    step: int = 2,
+    shards: int = 1,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    fmt: str = "text",
+) -> int:
+    """Write ``range(start, stop, step)`` as shard files plus a manifest and return the bytes written.
+
+    Shards do not echo numbers; each one logs a summary line once it is written.
+    """
+    bounds = split_range(start, stop, step, shards)
+    paths = [shard_path(file_path, index) for index in range(len(bounds))]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _write_shard, path, shard_start, shard_stop, step, chunk_size, fmt
+            )
+            for path, (shard_start, shard_stop) in zip(paths, bounds)
+        ]
+        sizes = []
+        for path, future in zip(paths, futures):
+            sizes.append(future.result())
+            logger.info(f"Wrote shard {path} ({sizes[-1]} bytes)")
+
+    manifest = {
+        "format": fmt,
+        "step": step,
+        "shards": [
+            {
+                "path": os.path.basename(path),
+                "start": shard_start,
+                "stop": shard_stop,
+                "bytes": size,
+            }
+            for path, (shard_start, shard_stop), size in zip(paths, bounds, sizes)
+        ],
+    }
+    # Write the manifest last so the merge step never sees a partial shard set
+    with open(manifest_path(file_path), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return sum(sizes)
+
+
+def run(args, file_name: str, start: int, label: str) -> int:
+    logger.info(f"Printing {label} numbers in given range")
+    metrics = Metrics.from_environment(Script=f"{label.lower()}_numbers")
+    file_name = os.path.splitext(file_name)[0] + EXTENSIONS[args.format]
+    file_path = os.path.join(args.volume_root, args.run_id, file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    stop = args.number
+    if args.part_index is not None:
+        parts = split_range(start, stop, 2, args.part_count)
+        # Parts past the end of a short range are written empty so the merge finds all of them
+        start, stop = (
+            parts[args.part_index] if args.part_index < len(parts) else (stop, stop)
+        )
+        file_path = shard_path(file_path, args.part_index)
+    shards = args.shards if args.shards is not None else args.workers
+    if shards > 1:
+        metrics.put("Shards", shards)
+        with metrics.phase("Write"):
+            written = write_sharded(
+                file_path,
+                start=start,
+                stop=stop,
+                shards=shards,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                fmt=args.format,
+            )
+    else:
+        # Drop a manifest left over from an earlier sharded run so the merge reads this file
+        if os.path.exists(manifest_path(file_path)):
+            os.remove(manifest_path(file_path))
+        with metrics.phase("Write"):
+            written = write_numbers(
+                file_path,
+                start=start,
+                stop=stop,
+                chunk_size=args.chunk_size,
+                sample=0 if args.quiet else args.sample,
+                fmt=args.format,
+            )
+    logger.info(f"Wrote {written} bytes of {label.lower()} numbers to {file_path}")
+    metrics.put("Numbers", len(range(start, stop, 2)))
+    metrics.put("Bytes", written, "Bytes")
+    metrics.flush()
+    return written
@@ -0,0 +1,210 @@
+"""Merge stage for the number files written by the multi_task scripts.
+
+Two modes are available:
+
+* ``concat`` appends the sources to the destination byte for byte, using
+  ``os.copy_file_range`` so the data never passes through Python, and a large
+  buffered ``shutil.copyfileobj`` where the kernel does not support it.
+* ``ordered`` performs a streaming k-way merge of already sorted sources with
+  ``heapq.merge``; memory use is bounded by the read buffers, not file size.
+
+Sources are newline-delimited text or binary int64 ``.npy`` arrays (see
+``npy``). Binary sources are memory-mapped and merged without parsing; their
+concatenation copies the data sections behind a single new header. Either
+format can be exported as either, at the cost of converting every number.
+
+A source written in shards is described by a ``<name>.manifest.json`` next to
+``<name>.txt``; ``resolve_sources`` expands it to the shard files in order.
+A source fanned out over K tasks consists of the parts ``<name>.<index>.txt``,
+each of which may be sharded again.
+"""
+import heapq
+import json
+import os
+import shutil
+from contextlib import ExitStack
+from itertools import chain, islice
+from typing import Iterable, List, Optional, Tuple
+
+import npy
+
+MODES = ("concat", "ordered")
+FORMATS = ("text", "npy")
+EXTENSIONS = {"text": ".txt", "npy": npy.EXTENSION}
+BUFFER_SIZE = 1 << 20
+WRITE_BATCH = 1 << 14
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(file_path: str) -> str:
+    return os.path.splitext(file_path)[0] + MANIFEST_SUFFIX
+
+
+def shard_path(file_path: str, index: int) -> str:
+    base, ext = os.path.splitext(file_path)
+    return f"{base}.{index:05d}{ext}"
+
+
+def resolve_sources(file_path: str, parts: int = 1) -> List[str]:
+    """Return the files that make up ``file_path``, in order.
+
+    With ``parts`` > 1 these are the files of each part; otherwise the shard
+    files listed in the manifest for ``file_path``, or ``file_path`` itself.
+    Raises ``FileNotFoundError`` when any of them is missing, so a lost part
+    fails the merge instead of silently dropping its numbers.
+    """
+    if parts > 1:
+        return [
+            source
+            for index in range(parts)
+            for source in resolve_sources(shard_path(file_path, index))
+        ]
+    manifest_file = manifest_path(file_path)
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+        directory = os.path.dirname(manifest_file)
+        sources = [
+            os.path.join(directory, shard["path"]) for shard in manifest["shards"]
+        ]
+    else:
+        sources = [file_path]
+    for source in sources:
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Missing merge source {source}")
+    return sources
+
+
+def _copy_file_range(src, dst, size: int) -> int:
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(src.fileno(), dst.fileno(), size - copied)
+        if count == 0:
+            break
+        copied += count
+    return copied
+
+
+def _append(source: str, dst, offset: int = 0) -> None:
+    """Append ``source`` from ``offset`` on to the unbuffered file ``dst``."""
+    # Unbuffered on both ends so the kernel copy and the fallback share file offsets
+    with open(source, "rb", buffering=0) as src:
+        src.seek(offset)
+        try:
+            _copy_file_range(src, dst, os.fstat(src.fileno()).st_size - offset)
+        except (AttributeError, OSError):
+            # No copy_file_range on this platform or across these file
+            # systems, continue from wherever the kernel copy stopped
+            shutil.copyfileobj(src, dst, BUFFER_SIZE)
+
+
+def concatenate(sources: List[str], destination: str) -> int:
+    """Concatenate ``sources`` into ``destination`` and return the bytes written."""
+    with open(destination, "wb", buffering=0) as dst:
+        for source in sources:
+            _append(source, dst)
+        return dst.tell()
+
+
+def concatenate_npy(sources: List[str], destination: str) -> Tuple[int, int]:
+    """Concatenate the ``.npy`` arrays ``sources`` into ``destination``.
+
+    Returns the numbers and bytes written, the numbers taken from the headers.
+    """
+    headers = []
+    for source in sources:
+        with open(source, "rb") as f:
+            headers.append(npy.read_header(f))
+    count = sum(count for count, _ in headers)
+    with open(destination, "wb", buffering=0) as dst:
+        dst.write(npy.header(count))
+        for source, (_, offset) in zip(sources, headers):
+            _append(source, dst, offset)
+        return count, dst.tell()
+
+
+def read_numbers(source: str, fmt: str, stack: ExitStack) -> Iterable[int]:
+    """Return the numbers in ``source``, kept open until ``stack`` closes."""
+    if fmt == "npy":
+        return stack.enter_context(npy.mapped(source))
+    return map(int, stack.enter_context(open(source, "r", buffering=BUFFER_SIZE)))
+
+
+def write_numbers(numbers: Iterable[int], dst, fmt: str, count: int = 0) -> int:
+    """Write ``numbers`` to the binary file ``dst`` in ``fmt`` and return the bytes written.
+
+    ``count`` must be the number of numbers for ``.npy``, whose header comes first.
+    """
+    written = dst.write(npy.header(count)) if fmt == "npy" else 0
+    numbers = iter(numbers)
+    while True:
+        batch = list(islice(numbers, WRITE_BATCH))
+        if not batch:
+            break
+        if fmt == "npy":
+            written += dst.write(npy.pack(batch))
+        else:
+            written += dst.write(("\n".join(map(str, batch)) + "\n").encode())
+    return written
+
+
+def ordered_merge(sources: List[str], destination: str) -> Tuple[int, int]:
+    """Merge numerically sorted ``sources`` into ``destination`` and return the numbers and bytes written."""
+    readers = [open(source, "r", buffering=BUFFER_SIZE) for source in sources]
+    count = written = 0
+    try:
+        merged = heapq.merge(*readers, key=int)
+        with open(destination, "w", buffering=BUFFER_SIZE) as dst:
+            while True:
+                batch = list(islice(merged, WRITE_BATCH))
+                if not batch:
+                    break
+                count += len(batch)
+                written += dst.write("".join(batch))
+    finally:
+        for reader in readers:
+            reader.close()
+    return count, written
+
+
+def merge(
+    sources: List[str],
+    destination: str,
+    mode: str = "concat",
+    fmt: str = "text",
+    export: Optional[str] = None,
+) -> Tuple[Optional[int], int]:
+    """Merge ``sources`` in ``fmt`` into ``destination`` in ``export`` (defaults to ``fmt``).
+
+    Returns the numbers and bytes written. The numbers are ``None`` for a text
+    ``concat``, which copies bytes without ever seeing the numbers in them.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown merge mode {mode!r}, expected one of {MODES}")
+    export = export or fmt
+    if (fmt, export) == ("text", "text"):
+        if mode == "concat":
+            return None, concatenate(sources, destination)
+        return ordered_merge(sources, destination)
+    if (fmt, mode, export) == ("npy", "concat", "npy"):
+        return concatenate_npy(sources, destination)
+    # Converting between formats goes through Python ints
+    with ExitStack() as stack:
+        readers = [read_numbers(source, fmt, stack) for source in sources]
+        # Cheap for .npy sources, whose headers hold it; text sources need it for the .npy header
+        count = sum(count_numbers(source, fmt) for source in sources)
+        merged = chain(*readers) if mode == "concat" else heapq.merge(*readers)
+        with open(destination, "wb", buffering=BUFFER_SIZE) as dst:
+            return count, write_numbers(merged, dst, export, count)
+
+
+def count_numbers(file_path: str, fmt: str = "text") -> int:
+    return npy.count(file_path) if fmt == "npy" else count_lines(file_path)
+
+
+def count_lines(file_path: str) -> int:
+    lines = 0
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(BUFFER_SIZE), b""):
+            lines += block.count(b"\n")
+    return lines
@@ -0,0 +1,150 @@
+from argparse import ArgumentParser
+from contextlib import ExitStack
+from itertools import islice
+import os
+import shutil
+import sys
+
+from merge import (
+    BUFFER_SIZE,
+    EXTENSIONS,
+    FORMATS,
+    MODES,
+    manifest_path,
+    merge,
+    read_numbers,
+    resolve_sources,
+    shard_path,
+    write_numbers,
+)
+from logs import default_sample, get_logger
+from metrics import Metrics
+
+parser = ArgumentParser(description="Airflow Fargate Example")
+parser.add_argument("number", help="number", type=int)
+parser.add_argument(
+    "--volume-root",
+    help="directory shared with the multi_task scripts (defaults to $SHARED_VOLUME_ROOT)",
+    default=os.environ.get("SHARED_VOLUME_ROOT", "/shared-volume"),
+)
+parser.add_argument(
+    "--run-id",
+    help="DAG run whose directory under the volume root holds the files",
+    default="",
+)
+parser.add_argument(
+    "--mode",
+    help="concat copies even.txt then odd.txt, ordered merges them in numeric order",
+    choices=MODES,
+    default="concat",
+)
+parser.add_argument(
+    "--format",
+    help="format the multi_task scripts wrote even/odd numbers in",
+    choices=FORMATS,
+    default="text",
+)
+parser.add_argument(
+    "--export",
+    help="format to write numbers in (defaults to --format)",
+    choices=FORMATS,
+    default=None,
+)
+parser.add_argument(
+    "--parts",
+    help="number of parts even/odd numbers were fanned out over",
+    type=int,
+    default=1,
+)
+log_mode = parser.add_mutually_exclusive_group()
+log_mode.add_argument(
+    "--summary-only",
+    help="log line and byte counts instead of echoing numbers.txt",
+    action="store_true",
+)
+log_mode.add_argument(
+    "--sample",
+    help="echo every Nth number instead of every number (defaults to $LOG_SAMPLE or 1)",
+    type=int,
+    default=default_sample(),
+    metavar="N",
+)
+
+logger = get_logger(__name__)
+
+
+def delete_file(file_path):
+    try:
+        os.remove(file_path)
+        logger.debug("Successfully deleted file: " + file_path)
+    except OSError:
+        logger.info("File not found: " + file_path)
+        pass
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    number = args.number
+    logger.info("Printing all numbers in given range")
+    metrics = Metrics.from_environment(Script="numbers")
+
+    run_root = os.path.join(args.volume_root, args.run_id)
+    export = args.export or args.format
+    inputs = [
+        os.path.join(run_root, name + EXTENSIONS[args.format])
+        for name in ("even", "odd")
+    ]
+    sources = [
+        source
+        for file_path in inputs
+        for source in resolve_sources(file_path, args.parts)
+    ]
+    destination = os.path.join(run_root, "numbers" + EXTENSIONS[export])
+    with metrics.phase("Merge"):
+        count, written = merge(
+            sources, destination, mode=args.mode, fmt=args.format, export=export
+        )
+    metrics.put("Sources", len(sources))
+    if count is not None:
+        # A text concat never sees the numbers, the even/odd scripts report theirs
+        metrics.put("Numbers", count)
+    metrics.put("Bytes", written, "Bytes")
+
+    if args.summary_only or args.sample == 0:
+        merged = (
+            f"{count} numbers ({written} bytes)"
+            if count is not None
+            else f"{written} bytes"
+        )
+        logger.info(f"Merged {merged} into {destination}")
+    else:
+        sys.stdout.flush()
+        with metrics.phase("Echo"):
+            if export == "npy" or args.sample > 1:
+                # Echo binary or sampled output as text
+                with ExitStack() as stack:
+                    sampled = islice(
+                        read_numbers(destination, export, stack), 0, None, args.sample
+                    )
+                    write_numbers(sampled, sys.stdout.buffer, "text")
+            else:
+                with open(destination, "rb") as f_numbers:
+                    shutil.copyfileobj(f_numbers, sys.stdout.buffer, BUFFER_SIZE)
+            sys.stdout.buffer.flush()
+
+    # Deleting all files, to avoid EFS cost
+    with metrics.phase("Cleanup"):
+        for source in sources:
+            delete_file(source)
+        for file_path in inputs:
+            parts = [file_path]
+            if args.parts > 1:
+                parts = [shard_path(file_path, index) for index in range(args.parts)]
+            for part in parts:
+                if os.path.exists(manifest_path(part)):
+                    delete_file(manifest_path(part))
+        delete_file(destination)
+        delete_file(destination)  # Will result in File not found message
+        if args.run_id:
+            os.rmdir(run_root)
+    metrics.flush()
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+from aws_cdk import App, Stack, aws_ec2 as ec2, aws_ecs as ecs
+from aws_cdk.assertions import Template
+from aws_cdk.aws_logs import RetentionDays
+
+from infrastructure.config import (
+    AirflowTaskConfig,
+    default_migration_config,
+    default_scheduler_config,
+    default_triggerer_config,
+    default_webserver_config,
+    default_worker_config,
+)
+from infrastructure.constructs.AirflowConstruct import AirflowConstruct
+from infrastructure.constructs.ImageRegistryConstruct import ImageRegistryConstruct
+
+# Asset paths in the constructs are relative to the repository root, like under `cdk synth`
+os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def task_config(**overrides) -> AirflowTaskConfig:
+    """The default Airflow task config with ``overrides`` applied."""
+    return AirflowTaskConfig(
+        **{
+            "cpu": 2048,
+            "memory": 4096,
+            "webserver_config": default_webserver_config,
+            "scheduler_config": default_scheduler_config,
+            "worker_config": default_worker_config,
+            "triggerer_config": default_triggerer_config,
+            "migration_config": default_migration_config,
+            "log_retention": RetentionDays.ONE_MONTH,
+            **overrides,
+        }
+    )
+
+
+class Network:
+    """VPC, cluster, security group and image registry the constructs under test share."""
+
+    def __init__(self, stack: Stack):
+        self.vpc = ec2.Vpc(stack, "VPC", max_azs=2)
+        self.cluster = ecs.Cluster(
+            stack, "ECSCluster", vpc=self.vpc, enable_fargate_capacity_providers=True
+        )
+        self.security_group = ec2.SecurityGroup(stack, "SecurityGroup", vpc=self.vpc)
+        self.image_registry = ImageRegistryConstruct(stack, "ImageRegistry")
+
+
+@pytest.fixture
+def stack() -> Stack:
+    return Stack(App(), "TestStack")
+
+
+@pytest.fixture
+def network(stack) -> Network:
+    return Network(stack)
+
+
+@pytest.fixture
+def airflow(stack, network):
+    """Builds an AirflowConstruct on ``network`` and returns it with its template."""
+
+    def build(**kwargs) -> tuple[AirflowConstruct, Template]:
+        construct = AirflowConstruct(
+            stack,
+            "AirflowService",
+            vpc=network.vpc,
+            cluster=network.cluster,
+            default_security_group=network.security_group,
+            private_subnet_ids=network.vpc.private_subnets,
+            image_registry=network.image_registry,
+            **{
+                "db_connection_string": "postgresql+psycopg2://airflow:password@db:5432/airflow",
+                **kwargs,
+            },
+        )
+        return construct, Template.from_stack(stack)
+
+    return build
+
+
+def resources(template: Template, type: str) -> dict[str, dict]:
+    return template.find_resources(type)
+
+
+def container_definitions(template: Template) -> dict[str, dict]:
+    """Container definitions of all task definitions in ``template`` by container name."""
+    return {
+        container["Name"]: container
+        for task_definition in resources(template, "AWS::ECS::TaskDefinition").values()
+        for container in task_definition["Properties"]["ContainerDefinitions"]
+    }
+
+
+def environment(container: dict) -> dict[str, object]:
+    return {
+        variable["Name"]: variable["Value"]
+        for variable in container.get("Environment", [])
+    }
+
+
+def task_definitions(template: Template, container_name: str) -> list[dict]:
+    """Properties of the task definitions in ``template`` running ``container_name``."""
+    return [
+        task_definition["Properties"]
+        for task_definition in resources(template, "AWS::ECS::TaskDefinition").values()
+        if any(
+            container["Name"] == container_name
+            for container in task_definition["Properties"]["ContainerDefinitions"]
+        )
+    ]
@@ -0,0 +1,300 @@
+import subprocess
+
+from aws_cdk.assertions import Match, Template
+
+from infrastructure.config import (
+    AutoScalingConfig,
+    CapacityProviderConfig,
+    SchedulerTuningProfile,
+    WebTierConfig,
+    default_worker_config,
+)
+from tests.conftest import (
+    container_definitions,
+    environment,
+    task_config,
+    task_definitions,
+)
+
+COMPONENTS = ["webserver", "scheduler", "triggerer", "worker"]
+
+
+def template_logical_id(template: Template, task_definition: dict) -> str:
+    return next(
+        logical_id
+        for logical_id, resource in template.find_resources(
+            "AWS::ECS::TaskDefinition"
+        ).items()
+        if resource["Properties"] == task_definition
+    )
+
+
+def container_names(task_definition: dict) -> list[str]:
+    return [container["Name"] for container in task_definition["ContainerDefinitions"]]
+
+
+def test_combined_topology_runs_one_task(airflow):
+    construct, template = airflow(airflow_task_config=task_config())
+    (airflow_task,) = task_definitions(template, "scheduler")
+    assert sorted(container_names(airflow_task)) == sorted(COMPONENTS)
+    assert (airflow_task["Cpu"], airflow_task["Memory"]) == ("2048", "4096")
+    assert list(construct.services) == ["airflow"]
+    template.resource_count_is("AWS::ECS::Service", 1)
+    template.resource_count_is("AWS::ElasticLoadBalancingV2::LoadBalancer", 1)
+
+
+def test_split_topology_runs_one_service_per_component(airflow):
+    config = task_config(topology="split")
+    construct, template = airflow(airflow_task_config=config)
+    for container_config in config.container_configs:
+        (task_definition,) = task_definitions(template, container_config.name)
+        assert container_names(task_definition) == [container_config.name]
+        assert task_definition["Cpu"] == str(container_config.cpu)
+        assert task_definition["Memory"] == str(container_config.memory)
+    assert sorted(construct.services) == sorted(COMPONENTS)
+    template.resource_count_is("AWS::ECS::Service", 4)
+    # Only the webserver is load balanced, only the workers autoscale
+    template.resource_count_is("AWS::ElasticLoadBalancingV2::LoadBalancer", 1)
+    (scalable_target,) = template.find_resources(
+        "AWS::ApplicationAutoScaling::ScalableTarget"
+    )
+    assert scalable_target.startswith("AirflowServiceWorkerService")
+
+
+def test_split_topology_services_share_the_broker(airflow):
+    _, template = airflow(airflow_task_config=task_config(topology="split"))
+    template.resource_count_is("AWS::SQS::Queue", 2)
+    broker_url = {"Name": "AIRFLOW__CELERY__BROKER_URL", "Value": "sqs://"}
+    for name in COMPONENTS:
+        (task_definition,) = task_definitions(template, name)
+        (container,) = task_definition["ContainerDefinitions"]
+        assert broker_url in container["Environment"]
+
+
+def test_worker_stops_warmly_and_checks_its_own_pid(airflow):
+    _, template = airflow(airflow_task_config=task_config(topology="split"))
+    worker = container_definitions(template)["worker"]
+    # Fargate's maximum, for a Celery warm shutdown between SIGTERM and SIGKILL
+    assert worker["StopTimeout"] == 120
+    assert worker["HealthCheck"]["Command"] == [
+        "CMD-SHELL",
+        'kill -0 "$(cat /tmp/airflow-worker.pid)"',
+    ]
+
+
+def test_worker_health_check_fails_without_the_worker(tmp_path):
+    pid_file = tmp_path / "airflow-worker.pid"
+    health_check = default_worker_config.health_check.replace(
+        "/tmp/airflow-worker.pid", str(pid_file)
+    )
+
+    def healthy() -> bool:
+        return subprocess.run(["sh", "-c", health_check]).returncode == 0
+
+    assert not healthy()
+    with subprocess.Popen(["sleep", "30"]) as worker:
+        pid_file.write_text(f"{worker.pid}\n")
+        assert healthy()
+        worker.kill()
+    assert not healthy()
+
+
+def test_only_workers_run_on_spot(airflow):
+    _, template = airflow(
+        airflow_task_config=task_config(topology="split"),
+        worker_autoscaling_config=AutoScalingConfig(
+            min_capacity=1,
+            max_capacity=5,
+            capacity_provider_config=CapacityProviderConfig(
+                on_demand_base=2, on_demand_weight=1, spot_weight=3
+            ),
+        ),
+    )
+    strategies = {
+        logical_id: service["Properties"].get("CapacityProviderStrategy")
+        for logical_id, service in template.find_resources("AWS::ECS::Service").items()
+    }
+    (worker,) = [
+        logical_id
+        for logical_id in strategies
+        if logical_id.startswith("AirflowServiceWorkerService")
+    ]
+    assert strategies.pop(worker) == [
+        {"CapacityProvider": "FARGATE", "Base": 2, "Weight": 1},
+        {"CapacityProvider": "FARGATE_SPOT", "Weight": 3},
+    ]
+    # The scheduler, triggerer and webserver stay on on-demand Fargate
+    assert list(strategies.values()) == [None] * 3
+
+
+def test_no_spot_by_default(airflow):
+    _, template = airflow(airflow_task_config=task_config(topology="split"))
+    for service in template.find_resources("AWS::ECS::Service").values():
+        assert "CapacityProviderStrategy" not in service["Properties"]
+        assert service["Properties"]["LaunchType"] == "FARGATE"
+
+
+def test_scheduler_replicas_run_as_their_own_service(airflow):
+    config = task_config(scheduler_tuning=SchedulerTuningProfile(replicas=2))
+    construct, template = airflow(airflow_task_config=config)
+    assert sorted(construct.services) == ["airflow", "scheduler"]
+    (scheduler_task,) = task_definitions(template, "scheduler")
+    assert container_names(scheduler_task) == ["scheduler"]
+    # Sized by the scheduler ContainerConfig, tuned for its 512 CPU units
+    assert (scheduler_task["Cpu"], scheduler_task["Memory"]) == ("512", "1024")
+    scheduler_environment = environment(scheduler_task["ContainerDefinitions"][0])
+    assert scheduler_environment["AIRFLOW__SCHEDULER__PARSING_PROCESSES"] == "1"
+    (airflow_task,) = task_definitions(template, "triggerer")
+    assert "scheduler" not in container_names(airflow_task)
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "DesiredCount": 2,
+            "TaskDefinition": {"Ref": template_logical_id(template, scheduler_task)},
+        },
+    )
+
+
+def test_web_tier_runs_behind_an_autoscaled_alb(airflow):
+    config = task_config(web_tier_config=WebTierConfig(min_capacity=2, max_capacity=6))
+    construct, template = airflow(airflow_task_config=config)
+    assert sorted(construct.services) == ["airflow", "webserver"]
+    (webserver_task,) = task_definitions(template, "webserver")
+    assert container_names(webserver_task) == ["webserver"]
+    webserver_environment = environment(webserver_task["ContainerDefinitions"][0])
+    assert webserver_environment["AIRFLOW__WEBSERVER__WORKERS"] == "2"
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "DesiredCount": 2,
+            "TaskDefinition": {"Ref": template_logical_id(template, webserver_task)},
+        },
+    )
+
+    # The only load balancer is the ALB in front of the webservers
+    template.resource_count_is("AWS::ElasticLoadBalancingV2::LoadBalancer", 1)
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::LoadBalancer",
+        {
+            "Type": "application",
+            "Scheme": "internet-facing",
+            "LoadBalancerAttributes": Match.array_with(
+                [{"Key": "idle_timeout.timeout_seconds", "Value": "60"}]
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::Listener", {"Port": 80, "Protocol": "HTTP"}
+    )
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::TargetGroup",
+        {
+            "Port": 8080,
+            "Protocol": "HTTP",
+            "TargetType": "ip",
+            "HealthCheckPath": "/health",
+            "Matcher": {"HttpCode": "200"},
+            "TargetGroupAttributes": Match.array_with(
+                [{"Key": "deregistration_delay.timeout_seconds", "Value": "60"}]
+            ),
+        },
+    )
+
+    # Scaled on requests per task, and out on slow responses
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {"MinCapacity": 2, "MaxCapacity": 6},
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "TargetTrackingScaling",
+            "TargetTrackingScalingPolicyConfiguration": Match.object_like(
+                {
+                    "PredefinedMetricSpecification": Match.object_like(
+                        {"PredefinedMetricType": "ALBRequestCountPerTarget"}
+                    ),
+                    "TargetValue": 600,
+                }
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "StepScaling",
+            "StepScalingPolicyConfiguration": Match.object_like(
+                {
+                    "StepAdjustments": Match.array_with(
+                        [
+                            Match.object_like(
+                                {"MetricIntervalLowerBound": 2, "ScalingAdjustment": 2}
+                            )
+                        ]
+                    )
+                }
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "MetricName": "TargetResponseTime",
+            "ExtendedStatistic": "p90",
+            "Threshold": 1,
+        },
+    )
+
+
+def test_web_tier_secret_key_stays_out_of_the_task_definitions(airflow):
+    _, template = airflow(
+        airflow_task_config=task_config(web_tier_config=WebTierConfig())
+    )
+    template.resource_count_is("AWS::SecretsManager::Secret", 1)
+    for name in COMPONENTS:
+        container = container_definitions(template)[name]
+        assert "AIRFLOW__WEBSERVER__SECRET_KEY" not in environment(container)
+        assert [secret["Name"] for secret in container["Secrets"]] == [
+            "AIRFLOW__WEBSERVER__SECRET_KEY"
+        ]
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": Match.array_with(
+                    [
+                        Match.object_like(
+                            {
+                                "Action": [
+                                    "secretsmanager:GetSecretValue",
+                                    "secretsmanager:DescribeSecret",
+                                ]
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+
+
+def test_no_secret_key_without_web_tier(airflow):
+    _, template = airflow(airflow_task_config=task_config())
+    template.resource_count_is("AWS::SecretsManager::Secret", 0)
+    assert "Secrets" not in container_definitions(template)["webserver"]
+
+
+def test_provider_waits_for_the_migration(airflow):
+    _, template = airflow()
+    template.has_resource_properties(
+        "AWS::CloudFormation::CustomResource",
+        {"Cluster": Match.any_value(), "ContainerName": "migration"},
+    )
+    template.has_resource_properties(
+        "AWS::Lambda::Function", {"Handler": "run_migration.on_event"}
+    )
+    template.has_resource_properties(
+        "AWS::Lambda::Function", {"Handler": "run_migration.is_complete"}
+    )
+    # The provider framework polls is_complete from a state machine
+    template.resource_count_is("AWS::StepFunctions::StateMachine", 1)
@@ -0,0 +1,96 @@
+import copy
+
+import pytest
+from aws_cdk.assertions import Template
+
+from infrastructure.config import ARM64, X86_64, DagTaskConfig, default_worker_config
+from infrastructure.constructs.DagTasksConstruct import DagTasksConstruct
+from tests.conftest import task_config, task_definitions
+
+
+def cpu_architecture(task_definition: dict) -> str:
+    return task_definition["RuntimePlatform"]["CpuArchitecture"]
+
+
+def test_airflow_on_graviton(airflow):
+    _, template = airflow(airflow_task_config=task_config(architecture=ARM64))
+    for name in ("scheduler", "migration"):
+        (task_definition,) = task_definitions(template, name)
+        assert cpu_architecture(task_definition) == "ARM64"
+
+
+def test_split_topology_mixes_architectures(airflow, network):
+    worker_config = copy.copy(default_worker_config)
+    worker_config.architecture = ARM64
+    _, template = airflow(
+        airflow_task_config=task_config(topology="split", worker_config=worker_config)
+    )
+    (worker_task,) = task_definitions(template, "worker")
+    assert cpu_architecture(worker_task) == "ARM64"
+    for name in ("webserver", "scheduler", "triggerer"):
+        (task_definition,) = task_definitions(template, name)
+        assert cpu_architecture(task_definition) == "X86_64"
+    # One Airflow image per architecture
+    assert len(network.image_registry.node.children) == 2
+
+
+def test_combined_task_cannot_mix_architectures():
+    worker_config = copy.copy(default_worker_config)
+    worker_config.architecture = ARM64
+    with pytest.raises(ValueError, match="use topology='split' to mix architectures"):
+        task_config(worker_config=worker_config)
+
+
+def test_unknown_architecture():
+    with pytest.raises(ValueError, match="Unknown architecture"):
+        task_config(architecture="riscv64")
+    with pytest.raises(ValueError, match="Unknown architecture"):
+        DagTaskConfig(
+            family="Task",
+            container_name="Container",
+            cpu=256,
+            memory=512,
+            architecture="amd64",
+        )
+
+
+def test_dag_task_families_pick_their_architecture(stack, network):
+    DagTasksConstruct(
+        stack,
+        "DagTasks",
+        vpc=network.vpc,
+        default_security_group=network.security_group,
+        image_registry=network.image_registry,
+        task_configs=[
+            DagTaskConfig(
+                family="IntelTask", container_name="IntelContainer", cpu=256, memory=512
+            ),
+            DagTaskConfig(
+                family="GravitonTask",
+                container_name="GravitonContainer",
+                cpu=256,
+                memory=512,
+                architecture=ARM64,
+            ),
+            DagTaskConfig(
+                family="OtherGravitonTask",
+                container_name="OtherGravitonContainer",
+                cpu=256,
+                memory=512,
+                architecture=ARM64,
+            ),
+        ],
+    )
+    template = Template.from_stack(stack)
+    (intel,) = task_definitions(template, "IntelContainer")
+    (graviton,) = task_definitions(template, "GravitonContainer")
+    assert cpu_architecture(intel) == "X86_64"
+    assert cpu_architecture(graviton) == "ARM64"
+    # The task image is built once per architecture, not once per family
+    assert len(network.image_registry.node.children) == 2
+    assert (
+        DagTaskConfig(
+            family="Task", container_name="Container", cpu=256, memory=512
+        ).architecture
+        == X86_64
+    )
@@ -0,0 +1,74 @@
+import json
+
+from aws_cdk import aws_iam as iam
+from aws_cdk.assertions import Template
+
+from infrastructure.config import BrokerConfig
+from infrastructure.constructs.BrokerConstruct import BrokerConstruct
+
+
+def test_queues_long_poll_with_dead_letter_queues(stack):
+    BrokerConstruct(
+        stack, "Broker", broker_config=BrokerConfig(queues=["default", "high_memory"])
+    )
+    template = Template.from_stack(stack)
+    # A queue and a dead-letter queue per Celery queue
+    template.resource_count_is("AWS::SQS::Queue", 4)
+    queues = template.find_resources(
+        "AWS::SQS::Queue", {"Properties": {"ReceiveMessageWaitTimeSeconds": 20}}
+    )
+    assert len(queues) == 2
+    for queue in queues.values():
+        properties = queue["Properties"]
+        assert properties["VisibilityTimeout"] == 7200
+        assert properties["RedrivePolicy"]["maxReceiveCount"] == 5
+    template.has_resource_properties(
+        "AWS::SQS::Queue", {"MessageRetentionPeriod": 1209600}
+    )
+
+
+def test_visibility_timeout_is_capped():
+    assert BrokerConfig(expected_task_runtime=600).visibility_timeout == 1200
+    assert BrokerConfig(expected_task_runtime=86400).visibility_timeout == 43200
+
+
+def test_airflow_uses_the_predefined_queues(stack):
+    broker = BrokerConstruct(
+        stack,
+        "Broker",
+        broker_config=BrokerConfig(wait_time_seconds=10),
+        queues=["default", "gpu"],
+    )
+    assert sorted(broker.queues) == ["default", "gpu"]
+    environment = broker.airflow_environment
+    assert environment["AIRFLOW__CELERY__BROKER_URL"] == "sqs://"
+    # Parse the JSON around the region and queue URL tokens
+    _, parts = stack.resolve(environment["CELERY_BROKER_TRANSPORT_OPTIONS"])["Fn::Join"]
+    options = json.loads(
+        "".join(part if isinstance(part, str) else "token" for part in parts)
+    )
+    assert options["wait_time_seconds"] == 10
+    assert options["visibility_timeout"] == 7200
+    assert options["predefined_queues"] == {
+        "default": {"url": "token"},
+        "gpu": {"url": "token"},
+    }
+
+
+def test_grant_is_scoped_to_the_broker_queues(stack):
+    broker = BrokerConstruct(stack, "Broker", broker_config=BrokerConfig())
+    role = iam.Role(
+        stack, "Role", assumed_by=iam.ServicePrincipal("ecs-tasks.amazonaws.com")
+    )
+    broker.grant(role)
+    template = Template.from_stack(stack)
+    queue = next(
+        logical_id
+        for logical_id in template.find_resources("AWS::SQS::Queue")
+        if logical_id.startswith("BrokerdefaultQueue")
+    )
+    (policy,) = template.find_resources("AWS::IAM::Policy").values()
+    for statement in policy["Properties"]["PolicyDocument"]["Statement"]:
+        # Celery neither lists nor creates queues, and only reaches the broker's own queue
+        assert statement["Resource"] == {"Fn::GetAtt": [queue, "Arn"]}
+        assert not {"sqs:ListQueues", "sqs:CreateQueue"} & set(statement["Action"])
@@ -0,0 +1,142 @@
+import json
+
+import pytest
+
+from infrastructure.capacity import (
+    MAX_WORKERS,
+    WorkloadProfile,
+    load_workload_profile,
+    plan_capacity,
+    rds_max_connections,
+)
+from infrastructure.config import SchedulerTuningProfile, WebTierConfig
+from tests.conftest import task_config
+
+SMALL = dict(
+    peak_concurrent_tasks=10, dag_count=20, average_task_duration=60, runs_per_day=100
+)
+BUSY = dict(
+    peak_concurrent_tasks=200,
+    dag_count=300,
+    average_task_duration=600,
+    runs_per_day=5000,
+    tasks_per_run=5,
+    workload="cpu_bound",
+)
+
+
+def test_profile_rejects_invalid_values():
+    with pytest.raises(ValueError, match="dag_count must be a positive integer"):
+        WorkloadProfile(**{**SMALL, "dag_count": 0})
+    with pytest.raises(ValueError, match="Unknown workload"):
+        WorkloadProfile(**{**SMALL, "workload": "memory_bound"})
+    with pytest.raises(ValueError, match="Invalid workload profile"):
+        WorkloadProfile.from_dict({**SMALL, "peak_tasks": 10})
+
+
+def test_profile_peak_covers_the_average():
+    # 100000 one-minute tasks a day keep ~69 tasks running
+    with pytest.raises(ValueError, match="more than the peak of 10"):
+        WorkloadProfile(**{**SMALL, "runs_per_day": 100000})
+    assert WorkloadProfile(**BUSY).average_concurrent_tasks == pytest.approx(
+        173.6, abs=0.1
+    )
+
+
+def test_load_profile_from_context(tmp_path):
+    assert load_workload_profile(None, None) is None
+    assert load_workload_profile(json.dumps(SMALL), None).peak_concurrent_tasks == 10
+    assert load_workload_profile(SMALL, None).dag_count == 20
+    profile_path = tmp_path / "workload.json"
+    profile_path.write_text(json.dumps(BUSY))
+    assert load_workload_profile(None, str(profile_path)).workload == "cpu_bound"
+    with pytest.raises(ValueError, match="not both"):
+        load_workload_profile(SMALL, str(profile_path))
+
+
+def test_small_workload_keeps_the_defaults():
+    plan = plan_capacity(WorkloadProfile(**SMALL))
+    task = plan.airflow_task_config
+    # Triggerer, scheduler and webserver reservations do not fit 1 vCPU
+    assert (task.cpu, task.memory) == (2048, 4096)
+    assert task.create_worker_pool
+    assert plan.worker_concurrency == 16
+    assert (
+        plan.worker_autoscaling_config.min_capacity,
+        plan.worker_autoscaling_config.max_capacity,
+    ) == (1, 1)
+    assert task.parallelism == 16
+    assert plan.db_config.db_instance_type.to_string() == "t3.small"
+    assert plan.db_config.db_storage_size == 25
+    assert not plan.db_config.connection_pooling
+
+
+def test_busy_workload_scales_workers_and_database():
+    plan = plan_capacity(WorkloadProfile(**BUSY))
+    task = plan.airflow_task_config
+    scaling = plan.worker_autoscaling_config
+    # CPU-bound tasks get one slot per vCPU on the largest task
+    assert (task.cpu, task.memory) == (16384, 32768)
+    assert plan.worker_concurrency == 16
+    assert scaling.max_capacity == 13 <= MAX_WORKERS
+    # Enough workers for the ~174 tasks running on average
+    assert scaling.min_capacity == 11
+    assert scaling.backlog_per_worker == 16
+    assert task.parallelism == 13 * 16
+    assert task.scheduler_config.cpu == 2048
+    assert rds_max_connections(8) >= plan.db_connections
+    assert plan.db_config.db_instance_type.to_string() == "m5.large"
+    # Twice 90 days of 25000 task instances a day
+    assert plan.db_config.db_storage_size == 43
+
+
+def test_pooling_beyond_the_largest_database():
+    plan = plan_capacity(
+        WorkloadProfile(
+            peak_concurrent_tasks=2560,
+            dag_count=50,
+            average_task_duration=60,
+            runs_per_day=1000,
+        )
+    )
+    assert plan.worker_autoscaling_config.max_capacity == MAX_WORKERS
+    assert plan.db_connections > rds_max_connections(32)
+    assert plan.db_config.connection_pooling
+    assert plan.db_config.max_client_connections >= plan.db_connections
+    # PgBouncer's server pool fits the smallest database
+    assert plan.db_config.db_instance_type.to_string() == "t3.small"
+
+
+def test_workload_beyond_the_largest_fleet():
+    with pytest.raises(ValueError, match="need more than 20 workers"):
+        plan_capacity(
+            WorkloadProfile(
+                **{**BUSY, "peak_concurrent_tasks": 1000, "average_task_duration": 60}
+            )
+        )
+
+
+def test_dedicated_services_free_the_airflow_task():
+    base = task_config(
+        scheduler_tuning=SchedulerTuningProfile(replicas=2),
+        web_tier_config=WebTierConfig(),
+    )
+    plan = plan_capacity(WorkloadProfile(**SMALL), base_task_config=base)
+    task = plan.airflow_task_config
+    # Only the triggerer is left in the Airflow task
+    assert (task.cpu, task.memory) == (1024, 2048)
+    assert task.scheduler_replicas == 2
+    assert task.dedicated_webserver
+    assert (plan.worker_concurrency, plan.worker_autoscaling_config.max_capacity) == (
+        8,
+        2,
+    )
+    # Connection pools of up to six webservers outgrow the smallest database
+    assert plan.db_config.db_instance_type.to_string() == "t3.medium"
+
+
+def test_split_topology_is_rejected():
+    with pytest.raises(ValueError, match="not the 'split' topology"):
+        plan_capacity(
+            WorkloadProfile(**SMALL), base_task_config=task_config(topology="split")
+        )
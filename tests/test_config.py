@@ -0,0 +1,126 @@
+import pytest
+
+from infrastructure.config import (
+    SchedulerTuningProfile,
+    WebTierConfig,
+    WorkerTuningProfile,
+)
+from tests.conftest import task_config
+
+
+@pytest.mark.parametrize(
+    "workload, cpu, memory, concurrency",
+    [
+        # Bound by CPU: 8 slots per vCPU
+        ("io_bound", 1024, 4096, 8),
+        ("io_bound", 4096, 16384, 32),
+        # Bound by memory: (memory - 512) // 192 forked task processes
+        ("io_bound", 512, 1024, 2),
+        ("io_bound", 4096, 4096, 18),
+        # One slot per vCPU
+        ("cpu_bound", 4096, 8192, 4),
+        ("cpu_bound", 1024, 2048, 1),
+        # Never below one slot
+        ("cpu_bound", 256, 512, 1),
+        ("io_bound", 256, 512, 1),
+    ],
+)
+def test_worker_concurrency(workload, cpu, memory, concurrency):
+    assert (
+        WorkerTuningProfile(workload=workload).concurrency(cpu, memory) == concurrency
+    )
+
+
+def test_worker_environment():
+    assert WorkerTuningProfile(workload="io_bound").environment(1024, 4096) == {
+        "AIRFLOW__CELERY__WORKER_CONCURRENCY": "8",
+        "AIRFLOW__CELERY__WORKER_PREFETCH_MULTIPLIER": "2",
+        "AIRFLOW__CELERY__WORKER_AUTOSCALE": "8,2",
+    }
+    assert WorkerTuningProfile(workload="cpu_bound", autoscale=False).environment(
+        4096, 8192
+    ) == {
+        "AIRFLOW__CELERY__WORKER_CONCURRENCY": "4",
+        "AIRFLOW__CELERY__WORKER_PREFETCH_MULTIPLIER": "1",
+    }
+
+
+def test_unknown_workload():
+    with pytest.raises(ValueError, match="Unknown workload"):
+        WorkerTuningProfile(workload="gpu_bound")
+
+
+def test_worker_sized_by_its_own_task():
+    tuning = WorkerTuningProfile()
+    # The dedicated worker task is as large as the Airflow task
+    dedicated = task_config(create_worker_pool=True, worker_tuning=tuning)
+    assert dedicated.worker_resources == (2048, 4096)
+    assert dedicated.worker_environment()["AIRFLOW__CELERY__WORKER_CONCURRENCY"] == "16"
+    # Sharing the Airflow task, the worker only gets its own reservation
+    shared = task_config(worker_tuning=tuning)
+    assert shared.worker_resources == (512, 1024)
+    assert shared.worker_environment()["AIRFLOW__CELERY__WORKER_CONCURRENCY"] == "2"
+    assert task_config().worker_environment() == {}
+
+
+@pytest.mark.parametrize(
+    "cpu, processes, interval, tis_per_query, heartbeat",
+    [
+        (512, 1, 120, 64, 10),
+        (1024, 2, 60, 128, 5),
+        (2048, 4, 30, 256, 5),
+        (8192, 16, 30, 512, 5),
+    ],
+)
+def test_scheduler_environment(cpu, processes, interval, tis_per_query, heartbeat):
+    environment = SchedulerTuningProfile().environment(cpu)
+    assert environment["AIRFLOW__SCHEDULER__PARSING_PROCESSES"] == str(processes)
+    assert environment["AIRFLOW__SCHEDULER__MIN_FILE_PROCESS_INTERVAL"] == str(interval)
+    assert environment["AIRFLOW__SCHEDULER__MAX_TIS_PER_QUERY"] == str(tis_per_query)
+    assert environment["AIRFLOW__SCHEDULER__SCHEDULER_HEARTBEAT_SEC"] == str(heartbeat)
+    assert environment["AIRFLOW__SCHEDULER__SCHEDULER_HEALTH_CHECK_THRESHOLD"] == str(
+        6 * heartbeat
+    )
+
+
+def test_scheduler_replicas():
+    with pytest.raises(ValueError, match="at least one scheduler"):
+        SchedulerTuningProfile(replicas=0)
+    # More than one scheduler always runs as its own service
+    assert SchedulerTuningProfile(replicas=2).dedicated_service
+    assert not SchedulerTuningProfile().dedicated_service
+    assert (
+        task_config(
+            scheduler_tuning=SchedulerTuningProfile(replicas=3)
+        ).scheduler_replicas
+        == 3
+    )
+    assert task_config().scheduler_replicas == 1
+    assert not task_config(
+        topology="split", scheduler_tuning=SchedulerTuningProfile(replicas=2)
+    ).dedicated_scheduler
+
+
+@pytest.mark.parametrize(
+    "worker_class, cpu, memory, workers",
+    [
+        # workers_per_vcpu per vCPU plus one
+        ("sync", 512, 1024, 2),
+        ("sync", 2048, 8192, 5),
+        # One per vCPU plus one
+        ("gevent", 2048, 8192, 3),
+        # Capped at one worker per 256 MiB, leaving room for the arbiter
+        ("sync", 4096, 1024, 3),
+    ],
+)
+def test_webserver_workers(worker_class, cpu, memory, workers):
+    assert WebTierConfig(worker_class=worker_class).workers(cpu, memory) == workers
+
+
+def test_web_tier_validation():
+    with pytest.raises(ValueError, match="Unknown gunicorn worker class"):
+        WebTierConfig(worker_class="uvicorn")
+    with pytest.raises(ValueError, match="min_capacity <= max_capacity"):
+        WebTierConfig(min_capacity=4, max_capacity=2)
+    assert task_config(web_tier_config=WebTierConfig()).dedicated_webserver
+    assert not task_config().dedicated_webserver
@@ -0,0 +1,163 @@
+import pytest
+from aws_cdk.assertions import Match, Template
+
+from infrastructure.config import DagTaskConfig, SharedVolumeConfig
+from infrastructure.constructs.DagTasksConstruct import DagTasksConstruct
+from tests.conftest import environment, resources
+
+SHARED_TASK = DagTaskConfig(
+    family="SharedTask", container_name="SharedContainer", cpu=256, memory=512
+)
+LOCAL_TASK = DagTaskConfig(
+    family="LocalTask",
+    container_name="LocalContainer",
+    cpu=256,
+    memory=512,
+    shared_volume=False,
+    ephemeral_storage_gib=50,
+)
+
+
+@pytest.fixture
+def dag_tasks(stack, network):
+    """Builds a DagTasksConstruct and returns the stack's template."""
+
+    def build(**kwargs) -> Template:
+        DagTasksConstruct(
+            stack,
+            "DagTasks",
+            vpc=network.vpc,
+            default_security_group=network.security_group,
+            image_registry=network.image_registry,
+            **{"task_configs": [SHARED_TASK, LOCAL_TASK], **kwargs},
+        )
+        return Template.from_stack(stack)
+
+    return build
+
+
+def task_definition(template: Template, family: str) -> dict:
+    (task,) = [
+        task["Properties"]
+        for task in resources(template, "AWS::ECS::TaskDefinition").values()
+        if task["Properties"]["Family"] == family
+    ]
+    return task
+
+
+def access_point(template: Template, path: str) -> str:
+    (logical_id,) = [
+        logical_id
+        for logical_id, access_point in resources(
+            template, "AWS::EFS::AccessPoint"
+        ).items()
+        if access_point["Properties"]["RootDirectory"]["Path"] == path
+    ]
+    return logical_id
+
+
+def test_file_system_keeps_the_efs_defaults(dag_tasks):
+    template = dag_tasks()
+    (file_system,) = resources(template, "AWS::EFS::FileSystem").values()
+    assert file_system["Properties"]["Encrypted"] is True
+    assert file_system["Properties"]["ThroughputMode"] == "bursting"
+    assert file_system["Properties"]["PerformanceMode"] == "generalPurpose"
+
+
+def test_access_points_run_as_a_non_root_user(dag_tasks):
+    template = dag_tasks(
+        shared_volume_config=SharedVolumeConfig(access_point_dag_ids=["numbers"])
+    )
+    template.resource_count_is("AWS::EFS::AccessPoint", 2)
+    for path in ("/shared", "/dags/numbers"):
+        template.has_resource_properties(
+            "AWS::EFS::AccessPoint",
+            {
+                "PosixUser": {"Uid": "1000", "Gid": "1000"},
+                "RootDirectory": {
+                    "Path": path,
+                    "CreationInfo": {
+                        "OwnerUid": "1000",
+                        "OwnerGid": "1000",
+                        "Permissions": "755",
+                    },
+                },
+            },
+        )
+    # Only families on the shared volume get a variant per DAG
+    families = {
+        task["Properties"]["Family"]
+        for task in resources(template, "AWS::ECS::TaskDefinition").values()
+    }
+    assert families == {"SharedTask", "SharedTask-numbers", "LocalTask"}
+
+
+@pytest.mark.parametrize("iam", [True, False])
+def test_shared_volume_mounts_through_its_access_point(dag_tasks, iam):
+    template = dag_tasks(
+        shared_volume_config=SharedVolumeConfig(
+            iam_authorization=iam, access_point_dag_ids=["numbers"]
+        )
+    )
+    for family, path in (
+        ("SharedTask", "/shared"),
+        ("SharedTask-numbers", "/dags/numbers"),
+    ):
+        task = task_definition(template, family)
+        (volume,) = task["Volumes"]
+        efs_config = volume["EFSVolumeConfiguration"]
+        assert efs_config["TransitEncryption"] == "ENABLED"
+        assert efs_config["AuthorizationConfig"] == {
+            "AccessPointId": {"Ref": access_point(template, path)},
+            "IAM": "ENABLED" if iam else "DISABLED",
+        }
+        (container,) = task["ContainerDefinitions"]
+        assert container["MountPoints"] == [
+            {
+                "ContainerPath": "/airflow-shared-volume",
+                "SourceVolume": volume["Name"],
+                "ReadOnly": False,
+            }
+        ]
+        assert environment(container)["SHARED_VOLUME_ROOT"] == "/airflow-shared-volume"
+
+
+def test_task_roles_may_mount_the_file_system(dag_tasks):
+    template = dag_tasks()
+    (file_system,) = resources(template, "AWS::EFS::FileSystem")
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": Match.array_with(
+                    [
+                        Match.object_like(
+                            {
+                                "Action": [
+                                    "elasticfilesystem:ClientMount",
+                                    "elasticfilesystem:ClientWrite",
+                                ],
+                                "Resource": {"Fn::GetAtt": [file_system, "Arn"]},
+                            }
+                        )
+                    ]
+                )
+            },
+            "Roles": [
+                {
+                    "Ref": Match.string_like_regexp(
+                        "DagTasksSharedTaskTaskConstructSharedTaskTaskDefinitionTaskRole"
+                    )
+                }
+            ],
+        },
+    )
+
+
+def test_local_storage_family_skips_the_volume(dag_tasks):
+    task = task_definition(dag_tasks(), "LocalTask")
+    assert task["EphemeralStorage"] == {"SizeInGiB": 50}
+    assert "Volumes" not in task
+    (container,) = task["ContainerDefinitions"]
+    assert "MountPoints" not in container
+    assert "SHARED_VOLUME_ROOT" not in environment(container)
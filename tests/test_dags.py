@@ -0,0 +1,138 @@
+import os
+import sys
+import tempfile
+from unittest import mock
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DAGS_DIR = os.path.join(REPO_ROOT, "airflow", "dags")
+
+os.environ.setdefault("AIRFLOW_HOME", tempfile.mkdtemp())
+os.environ.setdefault("AIRFLOW__CORE__LOAD_EXAMPLES", "False")
+
+
+def import_airflow(module: str):
+    # The repository's airflow/ directory, the Docker build context, shadows the airflow package
+    path = sys.path
+    sys.path = [
+        entry for entry in path if os.path.abspath(entry or os.curdir) != REPO_ROOT
+    ]
+    try:
+        return pytest.importorskip(module)
+    finally:
+        sys.path = path
+
+
+DagBag = import_airflow("airflow.models").DagBag
+TaskDeferred = import_airflow("airflow.exceptions").TaskDeferred
+MappedOperator = import_airflow("airflow.models.mappedoperator").MappedOperator
+EcsRunTaskOperator = import_airflow(
+    "airflow.providers.amazon.aws.operators.ecs"
+).EcsRunTaskOperator
+
+ENVIRONMENT = {
+    "CLUSTER": "airflow-cluster",
+    "SUBNETS": "subnet-1,subnet-2",
+    "SECURITY_GROUP": "sg-1",
+}
+
+
+@pytest.fixture
+def dagbag(monkeypatch):
+    for name, value in ENVIRONMENT.items():
+        monkeypatch.setenv(name, value)
+    return DagBag(dag_folder=DAGS_DIR, include_examples=False)
+
+
+@pytest.fixture
+def ecs_client():
+    client = mock.MagicMock()
+    client.run_task.return_value = {
+        "tasks": [
+            {"taskArn": "arn:aws:ecs:us-east-1:123456789012:task/airflow-cluster/abc"}
+        ],
+        "failures": [],
+    }
+    with mock.patch.object(EcsRunTaskOperator, "client", client):
+        yield client
+
+
+def test_dags_import(dagbag):
+    assert dagbag.import_errors == {}
+    assert set(dagbag.dag_ids) == {
+        "airflow_on_fargate_numbers",
+        "airflow_on_fargate_numbers_sharded",
+    }
+
+
+def test_numbers_dag_runs_fargate_tasks_deferred(dagbag):
+    dag = dagbag.dags["airflow_on_fargate_numbers"]
+    assert dag.get_task("merge_numbers").upstream_task_ids == {
+        "even_numbers",
+        "odd_numbers",
+    }
+    for task in dag.tasks:
+        assert isinstance(task, EcsRunTaskOperator)
+        assert task.deferrable
+        assert task.launch_type == "FARGATE"
+        assert task.cluster == "airflow-cluster"
+        assert task.network_configuration["awsvpcConfiguration"]["subnets"] == [
+            "subnet-1",
+            "subnet-2",
+        ]
+
+
+def test_fargate_task_defers_to_the_triggerer(dagbag, ecs_client):
+    task = dagbag.dags["airflow_on_fargate_numbers"].get_task("even_numbers")
+    with pytest.raises(TaskDeferred) as deferred:
+        task.execute({})
+    ecs_client.run_task.assert_called_once()
+    run_task = ecs_client.run_task.call_args.kwargs
+    assert run_task["taskDefinition"] == "AirflowOnFargateCombinedTask"
+    assert run_task["launchType"] == "FARGATE"
+    assert (
+        run_task["overrides"]["containerOverrides"][0]["name"] == "MultiTaskContainer"
+    )
+    trigger = deferred.value.trigger
+    assert (
+        trigger.task_arn
+        == "arn:aws:ecs:us-east-1:123456789012:task/airflow-cluster/abc"
+    )
+    assert trigger.cluster == "airflow-cluster"
+    # The worker slot is released while the triggerer waits for the Fargate task
+    assert deferred.value.method_name == "execute_complete"
+
+
+def test_sharded_dag_maps_generation_over_shards(dagbag):
+    dag = dagbag.dags["airflow_on_fargate_numbers_sharded"]
+    plan, generate, merge = (
+        dag.get_task(task_id)
+        for task_id in ("plan_shards", "generate_shard", "merge_shards")
+    )
+    assert isinstance(generate, MappedOperator)
+    assert generate.operator_class is EcsRunTaskOperator
+    assert generate.partial_kwargs["deferrable"]
+    assert generate.upstream_task_ids == {"plan_shards"}
+    # One merge fans the mapped shards back in
+    assert merge.upstream_task_ids == {"generate_shard"}
+    assert not isinstance(merge, MappedOperator)
+    assert "--parts" in merge.overrides["containerOverrides"][0]["command"]
+    assert plan.downstream_task_ids == {"generate_shard"}
+
+
+def test_plan_shards_covers_both_parities(dagbag):
+    plan = dagbag.dags["airflow_on_fargate_numbers_sharded"].get_task("plan_shards")
+    overrides = plan.python_callable(100, "3", "manual__1")
+    commands = [override["containerOverrides"][0]["command"] for override in overrides]
+    assert len(commands) == 6
+    assert [
+        (command[1], command[command.index("--part-index") + 1]) for command in commands
+    ] == [
+        (script, str(index))
+        for script in ("even_numbers.py", "odd_numbers.py")
+        for index in range(3)
+    ]
+    for command in commands:
+        assert command[command.index("--part-count") + 1] == "3"
+        assert command[command.index("--format") + 1] == "npy"
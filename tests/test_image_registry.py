@@ -0,0 +1,67 @@
+import copy
+import glob
+import os
+import sys
+
+from aws_cdk.aws_ecr_assets import DockerImageAsset, Platform
+
+from infrastructure.config import ARM64
+from infrastructure.constructs.DagTasksConstruct import DagTasksConstruct
+from tests.conftest import container_definitions, task_config
+
+
+def assets(network) -> list[DockerImageAsset]:
+    return [
+        child
+        for child in network.image_registry.node.children
+        if isinstance(child, DockerImageAsset)
+    ]
+
+
+def test_same_image_is_built_once(network):
+    first = network.image_registry.asset("./airflow")
+    assert network.image_registry.asset("./airflow") is first
+    assert network.image_registry.asset("./airflow", build_args={"A": "1"}) is not first
+    assert (
+        network.image_registry.asset("./airflow", platform=Platform.LINUX_ARM64)
+        is not first
+    )
+    assert len(assets(network)) == 3
+
+
+def test_airflow_services_share_one_asset(airflow, network):
+    _, template = airflow(airflow_task_config=task_config(topology="split"))
+    containers = container_definitions(template)
+    components = ["webserver", "scheduler", "worker", "triggerer", "migration"]
+    assert len({str(containers[name]["Image"]) for name in components}) == 1
+    assert len(assets(network)) == 1
+
+
+def test_dag_task_families_share_one_asset(stack, network):
+    DagTasksConstruct(
+        stack,
+        "DagTasks",
+        vpc=network.vpc,
+        default_security_group=network.security_group,
+        image_registry=network.image_registry,
+    )
+    assert len(assets(network)) == 1
+
+
+def test_one_asset_per_architecture(airflow, network):
+    worker_config = copy.copy(task_config().worker_config)
+    worker_config.architecture = ARM64
+    airflow(
+        airflow_task_config=task_config(topology="split", worker_config=worker_config)
+    )
+    assert len(assets(network)) == 2
+
+
+def test_task_image_modules_do_not_clash():
+    # The task image copies every family's scripts into one directory on sys.path
+    scripts = [
+        os.path.splitext(os.path.basename(path))[0]
+        for path in glob.glob("infrastructure/tasks/*/*.py")
+    ]
+    assert len(scripts) == len(set(scripts))
+    assert not set(scripts) & set(sys.stdlib_module_names)
@@ -0,0 +1,148 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from aws_cdk.assertions import Template
+
+from infrastructure.config import DagTaskConfig, LogConfig
+from infrastructure.constructs.DagTasksConstruct import DagTasksConstruct
+from infrastructure.constructs.LogConstruct import LOG_ROUTER_NAME
+from tests.conftest import environment, resources, task_config
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+
+from logs import DEFAULT_SAMPLE, default_sample  # noqa: E402
+
+
+def task_containers(template: Template) -> list[list[dict]]:
+    return [
+        task["Properties"]["ContainerDefinitions"]
+        for task in resources(template, "AWS::ECS::TaskDefinition").values()
+    ]
+
+
+def test_awslogs_does_not_block_by_default(airflow):
+    _, template = airflow()
+    for containers in task_containers(template):
+        for container in containers:
+            log = container["LogConfiguration"]
+            assert log["LogDriver"] == "awslogs"
+            assert log["Options"]["mode"] == "non-blocking"
+            assert log["Options"]["max-buffer-size"] == "25m"
+
+
+def test_blocking_awslogs_has_no_buffer(airflow):
+    _, template = airflow(
+        airflow_task_config=task_config(log_config=LogConfig(mode="blocking"))
+    )
+    for containers in task_containers(template):
+        for container in containers:
+            options = container["LogConfiguration"]["Options"]
+            assert "mode" not in options
+            assert "max-buffer-size" not in options
+
+
+def test_unknown_log_mode():
+    with pytest.raises(ValueError, match="Unknown log mode"):
+        LogConfig(mode="dropping")
+
+
+def test_firelens_routes_through_one_router_per_task(airflow):
+    _, template = airflow(
+        airflow_task_config=task_config(
+            log_config=LogConfig(firelens=True, max_buffer_size="8m")
+        )
+    )
+    for containers in task_containers(template):
+        (router,) = [c for c in containers if c["Name"] == LOG_ROUTER_NAME]
+        assert router["Essential"] is False
+        assert router["FirelensConfiguration"]["Type"] == "fluentbit"
+        # The router itself logs through awslogs, without blocking
+        assert router["LogConfiguration"]["LogDriver"] == "awslogs"
+        assert router["LogConfiguration"]["Options"]["max-buffer-size"] == "8m"
+        for container in containers:
+            if container is router:
+                continue
+            log = container["LogConfiguration"]
+            assert log["LogDriver"] == "awsfirelens"
+            assert log["Options"]["Name"] == "cloudwatch_logs"
+            assert log["Options"]["auto_create_group"] == "false"
+
+
+def test_dag_tasks_pass_the_script_log_settings(stack, network):
+    DagTasksConstruct(
+        stack,
+        "DagTasks",
+        vpc=network.vpc,
+        default_security_group=network.security_group,
+        image_registry=network.image_registry,
+        task_configs=[
+            DagTaskConfig(
+                family="Task", container_name="Container", cpu=256, memory=512
+            )
+        ],
+        log_config=LogConfig(script_log_level="DEBUG", script_log_sample=1000),
+    )
+    (containers,) = task_containers(Template.from_stack(stack))
+    (container,) = containers
+    assert environment(container)["LOG_LEVEL"] == "DEBUG"
+    assert environment(container)["LOG_SAMPLE"] == "1000"
+
+
+def test_script_log_sample_is_unset_by_default():
+    assert LogConfig().script_environment == {"LOG_LEVEL": "INFO"}
+
+
+def test_dag_tasks_cannot_use_firelens(stack, network):
+    with pytest.raises(ValueError, match="cannot use FireLens"):
+        DagTasksConstruct(
+            stack,
+            "DagTasks",
+            vpc=network.vpc,
+            default_security_group=network.security_group,
+            image_registry=network.image_registry,
+            log_config=LogConfig(firelens=True),
+        )
+
+
+@pytest.mark.parametrize(
+    "value, sample", [(None, DEFAULT_SAMPLE), ("0", 0), ("1000", 1000)]
+)
+def test_default_sample(monkeypatch, value, sample):
+    monkeypatch.delenv("LOG_SAMPLE", raising=False)
+    if value is not None:
+        monkeypatch.setenv("LOG_SAMPLE", value)
+    assert default_sample() == sample
+
+
+@pytest.mark.parametrize(
+    "level, logged",
+    [
+        (None, ["info", "warning"]),
+        ("debug", ["debug", "info", "warning"]),
+        ("WARNING", ["warning"]),
+    ],
+)
+def test_get_logger_level(level, logged):
+    # Run in a fresh interpreter, basicConfig is a no-op once pytest has installed its handlers
+    env = dict(os.environ, PYTHONPATH=os.path.join(TASKS_DIR, "common"))
+    env.pop("LOG_LEVEL", None)
+    if level is not None:
+        env["LOG_LEVEL"] = level
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from logs import get_logger\n"
+            "logger = get_logger('test')\n"
+            "logger.debug('debug'); logger.info('info'); logger.warning('warning')",
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines() == logged
+    assert result.stderr == ""
@@ -0,0 +1,230 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+sys.path.insert(0, os.path.join(TASKS_DIR, "single_task"))
+
+import npy  # noqa: E402
+from merge import concatenate, count_numbers, merge, resolve_sources  # noqa: E402
+
+
+def write_lines(path, numbers):
+    with open(path, "w") as f:
+        f.writelines(f"{number}\n" for number in numbers)
+    return str(path)
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [int(line) for line in f]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    return [
+        write_lines(tmp_path / "even.txt", range(0, 20, 2)),
+        write_lines(tmp_path / "odd.txt", range(1, 20, 2)),
+    ]
+
+
+def test_concat_keeps_source_order(tmp_path, sources):
+    destination = tmp_path / "numbers.txt"
+    count, written = merge(sources, str(destination), mode="concat")
+    assert read_lines(destination) == [*range(0, 20, 2), *range(1, 20, 2)]
+    # The byte copy does not count the numbers it moves
+    assert count is None
+    assert written == os.path.getsize(destination)
+
+
+def test_ordered_merges_numerically(tmp_path, sources):
+    destination = tmp_path / "numbers.txt"
+    count, written = merge(sources, str(destination), mode="ordered")
+    assert read_lines(destination) == list(range(20))
+    assert count == 20
+    assert written == os.path.getsize(destination)
+
+
+def test_ordered_compares_numbers_not_strings(tmp_path):
+    sources = [
+        write_lines(tmp_path / "a.txt", [2, 10, 100]),
+        write_lines(tmp_path / "b.txt", [9, 11]),
+    ]
+    merge(sources, str(tmp_path / "numbers.txt"), mode="ordered")
+    assert read_lines(tmp_path / "numbers.txt") == [2, 9, 10, 11, 100]
+
+
+def test_modes_agree_on_count(tmp_path, sources):
+    for mode in ("concat", "ordered"):
+        destination = str(tmp_path / f"{mode}.txt")
+        merge(sources, destination, mode=mode)
+        assert count_numbers(destination) == 20
+
+
+def test_empty_sources(tmp_path):
+    sources = [
+        write_lines(tmp_path / "even.txt", []),
+        write_lines(tmp_path / "odd.txt", []),
+    ]
+    for mode in ("concat", "ordered"):
+        destination = tmp_path / f"{mode}.txt"
+        assert merge(sources, str(destination), mode=mode)[1] == 0
+        assert read_lines(destination) == []
+
+
+def test_concat_falls_back_without_copy_file_range(tmp_path, sources, monkeypatch):
+    monkeypatch.delattr(os, "copy_file_range", raising=False)
+    destination = tmp_path / "numbers.txt"
+    concatenate(sources, str(destination))
+    assert read_lines(destination) == [*range(0, 20, 2), *range(1, 20, 2)]
+
+
+def test_unknown_mode(tmp_path, sources):
+    with pytest.raises(ValueError, match="Unknown merge mode"):
+        merge(sources, str(tmp_path / "numbers.txt"), mode="shuffle")
+
+
+def test_resolve_sources_without_manifest(sources):
+    assert resolve_sources(sources[0]) == [sources[0]]
+
+
+def write_manifest(file_path, shards):
+    with open(os.path.splitext(file_path)[0] + ".manifest.json", "w") as f:
+        json.dump({"format": "text", "step": 2, "shards": shards}, f)
+
+
+def test_resolve_sources_expands_parts_and_manifests(tmp_path):
+    even = str(tmp_path / "even.txt")
+    write_lines(tmp_path / "even.00000.txt", [0, 2])
+    # The second part was itself written in two shards
+    write_lines(tmp_path / "even.00001.00000.txt", [4])
+    write_lines(tmp_path / "even.00001.00001.txt", [6])
+    write_manifest(
+        str(tmp_path / "even.00001.txt"),
+        [{"path": "even.00001.00000.txt"}, {"path": "even.00001.00001.txt"}],
+    )
+    assert resolve_sources(even, parts=2) == [
+        str(tmp_path / name)
+        for name in ("even.00000.txt", "even.00001.00000.txt", "even.00001.00001.txt")
+    ]
+
+
+def test_resolve_sources_fails_on_a_missing_part(tmp_path):
+    write_lines(tmp_path / "even.00000.txt", [0, 2])
+    with pytest.raises(FileNotFoundError, match="even.00001.txt"):
+        resolve_sources(str(tmp_path / "even.txt"), parts=2)
+
+
+def test_resolve_sources_fails_on_a_missing_shard(tmp_path):
+    write_lines(tmp_path / "even.00000.txt", [0, 2])
+    write_manifest(
+        str(tmp_path / "even.txt"),
+        [{"path": "even.00000.txt"}, {"path": "even.00001.txt"}],
+    )
+    with pytest.raises(FileNotFoundError, match="even.00001.txt"):
+        resolve_sources(str(tmp_path / "even.txt"))
+
+
+def write_npy(path, numbers):
+    numbers = list(numbers)
+    with open(path, "wb") as f:
+        f.write(npy.header(len(numbers)) + npy.pack(numbers))
+    return str(path)
+
+
+def read_npy(path):
+    with npy.mapped(str(path)) as numbers:
+        return numbers.tolist()
+
+
+@pytest.fixture
+def npy_sources(tmp_path):
+    return [
+        write_npy(tmp_path / "even.npy", range(0, 20, 2)),
+        write_npy(tmp_path / "odd.npy", range(1, 20, 2)),
+    ]
+
+
+@pytest.mark.parametrize("mode", ["concat", "ordered"])
+def test_npy_merges_match_text(tmp_path, sources, npy_sources, mode):
+    merge(sources, str(tmp_path / "numbers.txt"), mode=mode)
+    destination = tmp_path / "numbers.npy"
+    count, written = merge(npy_sources, str(destination), mode=mode, fmt="npy")
+    assert read_npy(destination) == read_lines(tmp_path / "numbers.txt")
+    assert count == 20
+    assert written == os.path.getsize(destination)
+
+
+@pytest.mark.parametrize("mode", ["concat", "ordered"])
+def test_export_text_to_npy(tmp_path, sources, mode):
+    merge(sources, str(tmp_path / "numbers.txt"), mode=mode)
+    destination = tmp_path / "numbers.npy"
+    count, written = merge(sources, str(destination), mode=mode, export="npy")
+    assert read_npy(destination) == read_lines(tmp_path / "numbers.txt")
+    assert count == 20
+    assert written == os.path.getsize(destination)
+
+
+@pytest.mark.parametrize("mode", ["concat", "ordered"])
+def test_export_npy_to_text(tmp_path, sources, npy_sources, mode):
+    merge(sources, str(tmp_path / "expected.txt"), mode=mode)
+    destination = tmp_path / "numbers.txt"
+    count, written = merge(
+        npy_sources, str(destination), mode=mode, fmt="npy", export="text"
+    )
+    # Byte for byte what the text merge writes
+    with open(destination) as f, open(tmp_path / "expected.txt") as expected:
+        assert f.read() == expected.read()
+    assert count == 20
+    assert written == os.path.getsize(destination)
+
+
+def test_npy_concat_of_empty_parts(tmp_path):
+    sources = [write_npy(tmp_path / f"part{i}.npy", []) for i in range(2)]
+    destination = tmp_path / "numbers.npy"
+    assert merge(sources, str(destination), fmt="npy") == (0, len(npy.header(0)))
+    assert read_npy(destination) == []
+
+
+@pytest.mark.parametrize("fmt", ["text", "npy"])
+@pytest.mark.parametrize("export", ["text", "npy"])
+def test_pipeline_exports(tmp_path, fmt, export):
+    # Run the task script end to end on a volume holding even/odd in ``fmt``
+    write = write_npy if fmt == "npy" else write_lines
+    extensions = {"text": ".txt", "npy": ".npy"}
+    write(tmp_path / f"even{extensions[fmt]}", range(0, 10, 2))
+    write(tmp_path / f"odd{extensions[fmt]}", range(1, 10, 2))
+    pythonpath = [
+        os.path.join(TASKS_DIR, "common"),
+        os.path.join(TASKS_DIR, "single_task"),
+    ]
+    result = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(TASKS_DIR, "single_task", "number_pipeline.py"),
+            "10",
+            "--volume-root",
+            str(tmp_path),
+            "--mode",
+            "ordered",
+            "--format",
+            fmt,
+            "--export",
+            export,
+        ],
+        env=dict(
+            os.environ, PYTHONPATH=os.pathsep.join(pythonpath), METRICS_SINK="none"
+        ),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Binary output is echoed as text as well, between the log lines
+    echoed = [line for line in result.stdout.splitlines() if line.isdigit()]
+    assert echoed == [str(number) for number in range(10)]
+    # The script cleans up after itself, sources and output alike
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,172 @@
+import json
+import os
+import sys
+
+import pytest
+from aws_cdk.assertions import Template
+
+from infrastructure.config import MetricsConfig
+from infrastructure.constructs.AirflowConstruct import AirflowConstruct
+from infrastructure.constructs.DashboardConstruct import (
+    DAG_TASK_NAMESPACE,
+    DAG_TASK_SCRIPTS,
+    DashboardConstruct,
+)
+from infrastructure.constructs.DatabaseConstruct import DatabaseConstruct
+from tests.conftest import environment, resources, task_config
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+
+from metrics import DEFAULT_NAMESPACE, Metrics  # noqa: E402
+
+
+def collected(metrics: Metrics) -> Metrics:
+    metrics.put("Bytes", 10, "Bytes")
+    metrics.put("Bytes", 5, "Bytes")
+    metrics.put("Numbers", 3)
+    return metrics
+
+
+def test_emf_document_shape(capsys):
+    collected(Metrics(Script="even_numbers", Part="0")).flush()
+    (line,) = capsys.readouterr().out.splitlines()
+    document = json.loads(line)
+    assert isinstance(document["_aws"]["Timestamp"], int)
+    assert document["_aws"]["CloudWatchMetrics"] == [
+        {
+            "Namespace": DEFAULT_NAMESPACE,
+            "Dimensions": [["Part", "Script"]],
+            "Metrics": [
+                {"Name": "Bytes", "Unit": "Bytes"},
+                {"Name": "Numbers", "Unit": "Count"},
+            ],
+        }
+    ]
+    # Dimensions and values sit at the top level, where EMF looks them up
+    assert {key: document[key] for key in ("Script", "Part", "Bytes", "Numbers")} == {
+        "Script": "even_numbers",
+        "Part": "0",
+        "Bytes": 15,
+        "Numbers": 3,
+    }
+
+
+def test_phase_times_in_milliseconds():
+    metrics = Metrics(sink="json")
+    with metrics.phase("Merge"):
+        pass
+    assert metrics.units == {"MergeTime": "Milliseconds"}
+    assert metrics.values["MergeTime"] >= 0
+
+
+def test_json_sink_appends_to_metrics_file(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "metrics.jsonl"
+    monkeypatch.setenv("METRICS_SINK", "json")
+    monkeypatch.setenv("METRICS_FILE", str(path))
+    for _ in range(2):
+        collected(Metrics.from_environment(Script="numbers")).flush()
+    assert capsys.readouterr().out == ""
+    assert [json.loads(line) for line in path.read_text().splitlines()] == [
+        {"Script": "numbers", "Bytes": 15, "Numbers": 3}
+    ] * 2
+
+
+def test_flush_starts_over(capsys):
+    metrics = collected(Metrics(sink="json"))
+    metrics.flush()
+    metrics.flush()
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+
+def test_none_sink_drops_metrics(capsys):
+    collected(Metrics(sink="none")).flush()
+    assert capsys.readouterr().out == ""
+
+
+def test_unknown_sink():
+    with pytest.raises(ValueError, match="Unknown metrics sink"):
+        Metrics(sink="statsd")
+
+
+def test_dashboard_charts_the_task_script_namespace():
+    # The dashboard reads what the scripts publish, with nothing to keep them in sync but a comment
+    assert DAG_TASK_NAMESPACE == DEFAULT_NAMESPACE
+    assert set(DAG_TASK_SCRIPTS) == {"even_numbers", "odd_numbers", "numbers"}
+
+
+def test_every_task_gets_a_non_essential_agent(airflow):
+    metrics_config = MetricsConfig(namespace="Test", statsd_port=9125)
+    _, template = airflow(
+        airflow_task_config=task_config(metrics_config=metrics_config)
+    )
+    tasks = resources(template, "AWS::ECS::TaskDefinition").values()
+    for task in tasks:
+        containers = task["Properties"]["ContainerDefinitions"]
+        airflow_containers = [c for c in containers if c["Name"] != "cloudwatch-agent"]
+        agents = [c for c in containers if c["Name"] == "cloudwatch-agent"]
+        if any(c["Name"] == "migration" for c in containers):
+            # The one-off migration task runs without an agent
+            assert agents == []
+            continue
+        (agent,) = agents
+        assert agent["Essential"] is False
+        assert agent["Image"] == metrics_config.agent_image
+        assert "Cpu" not in agent and "MemoryReservation" not in agent
+        assert json.loads(environment(agent)["CW_CONFIG_CONTENT"]) == (
+            metrics_config.agent_config
+        )
+        for container in airflow_containers:
+            assert environment(container)["AIRFLOW__METRICS__STATSD_PORT"] == "9125"
+
+
+def test_no_agent_without_metrics(airflow):
+    _, template = airflow()
+    for task in resources(template, "AWS::ECS::TaskDefinition").values():
+        for container in task["Properties"]["ContainerDefinitions"]:
+            assert container["Name"] != "cloudwatch-agent"
+            assert "AIRFLOW__METRICS__STATSD_ON" not in environment(container)
+
+
+def test_dashboard(stack, network):
+    metrics_config = MetricsConfig(namespace="Test")
+    # Built by hand, the airflow fixture synthesizes the stack before the dashboard exists
+    airflow = AirflowConstruct(
+        stack,
+        "AirflowService",
+        vpc=network.vpc,
+        cluster=network.cluster,
+        default_security_group=network.security_group,
+        private_subnet_ids=network.vpc.private_subnets,
+        image_registry=network.image_registry,
+        db_connection_string="postgresql+psycopg2://airflow:password@db:5432/airflow",
+        airflow_task_config=task_config(metrics_config=metrics_config),
+    )
+    db = DatabaseConstruct(
+        stack,
+        "RDS-PostgreSQL",
+        vpc=network.vpc,
+        default_security_group=network.security_group,
+    )
+    DashboardConstruct(
+        stack,
+        "Dashboard",
+        metrics_config=metrics_config,
+        services=airflow.services,
+        broker=airflow.broker,
+        db=db.db,
+    )
+    template = Template.from_stack(stack)
+    (dashboard,) = resources(template, "AWS::CloudWatch::Dashboard").values()
+    body = json.dumps(dashboard["Properties"]["DashboardBody"])
+    for title in (
+        "Scheduler loop duration (ms)",
+        "Executor slots",
+        "Celery queue backlog",
+        "Service CPU utilization (%)",
+        "Metadata DB latency (s)",
+        "DAG task phases (ms)",
+    ):
+        assert title in body
+    assert '\\"Test\\",\\"airflow.scheduler.scheduler_loop_duration\\"' in body
+    assert DAG_TASK_NAMESPACE in body
@@ -0,0 +1,109 @@
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("boto3")
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "infrastructure", "functions")
+)
+
+import run_migration  # noqa: E402
+
+TASK_ARN = "arn:aws:ecs:us-east-1:123456789012:task/airflow-cluster/abc"
+PROPERTIES = {
+    "Cluster": "airflow-cluster",
+    "TaskDefinition": "arn:aws:ecs:us-east-1:123456789012:task-definition/migration:3",
+    "ContainerName": "migration",
+    "Subnets": ["subnet-1"],
+    "SecurityGroups": ["sg-1"],
+}
+
+
+@pytest.fixture
+def ecs_client(monkeypatch):
+    client = mock.MagicMock()
+    monkeypatch.setattr(run_migration, "ecs_client", lambda: client)
+    return client
+
+
+def event(request_type="Create", **kwargs):
+    return {"RequestType": request_type, "ResourceProperties": PROPERTIES, **kwargs}
+
+
+def stopped_task(exit_code, reason="Essential container in task exited"):
+    return {
+        "tasks": [
+            {
+                "lastStatus": "STOPPED",
+                "stoppedReason": reason,
+                "containers": [{"name": "migration", "exitCode": exit_code}],
+            }
+        ]
+    }
+
+
+def test_starts_the_migration_task(ecs_client):
+    ecs_client.run_task.return_value = {
+        "tasks": [{"taskArn": TASK_ARN}],
+        "failures": [],
+    }
+    response = run_migration.on_event(event(), None)
+    assert response == {
+        "PhysicalResourceId": PROPERTIES["TaskDefinition"],
+        "Data": {"TaskArn": TASK_ARN},
+    }
+    run_task = ecs_client.run_task.call_args.kwargs
+    assert run_task["launchType"] == "FARGATE"
+    assert run_task["networkConfiguration"]["awsvpcConfiguration"]["subnets"] == [
+        "subnet-1"
+    ]
+
+
+def test_fails_when_the_task_cannot_start(ecs_client):
+    ecs_client.run_task.return_value = {
+        "tasks": [],
+        "failures": [{"reason": "RESOURCE:ENI"}],
+    }
+    with pytest.raises(RuntimeError, match="RESOURCE:ENI"):
+        run_migration.on_event(event(), None)
+
+
+def test_delete_does_not_run_the_task(ecs_client):
+    response = run_migration.on_event(
+        event("Delete", PhysicalResourceId="migration:3"), None
+    )
+    assert response == {"PhysicalResourceId": "migration:3"}
+    ecs_client.run_task.assert_not_called()
+    assert run_migration.is_complete(event("Delete"), None) == {"IsComplete": True}
+
+
+def test_waits_for_the_task_to_stop(ecs_client):
+    ecs_client.describe_tasks.return_value = {
+        "tasks": [{"lastStatus": "RUNNING", "containers": []}]
+    }
+    assert run_migration.is_complete(event(Data={"TaskArn": TASK_ARN}), None) == {
+        "IsComplete": False
+    }
+    ecs_client.describe_tasks.assert_called_once_with(
+        cluster="airflow-cluster", tasks=[TASK_ARN]
+    )
+
+
+def test_completes_when_the_migration_succeeds(ecs_client):
+    ecs_client.describe_tasks.return_value = stopped_task(0)
+    assert run_migration.is_complete(event(Data={"TaskArn": TASK_ARN}), None) == {
+        "IsComplete": True
+    }
+
+
+@pytest.mark.parametrize("exit_code", [1, None])
+def test_fails_the_deploy_when_the_migration_fails(ecs_client, exit_code):
+    ecs_client.describe_tasks.return_value = stopped_task(
+        exit_code, reason="CannotPullContainerError"
+    )
+    with pytest.raises(
+        RuntimeError, match=f"exit code {exit_code}: CannotPullContainerError"
+    ):
+        run_migration.is_complete(event(Data={"TaskArn": TASK_ARN}), None)
@@ -0,0 +1,66 @@
+import io
+import os
+import sys
+
+import pytest
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+
+import npy  # noqa: E402
+
+NUMBERS = [0, 1, -1, 2**62, -(2**63), 2**63 - 1]
+
+
+def write_npy(path, numbers):
+    with open(path, "wb") as f:
+        f.write(npy.header(len(numbers)) + npy.pack(numbers))
+    return str(path)
+
+
+@pytest.mark.parametrize("count", [0, 1, 9, 10**6, 10**15])
+def test_header_round_trip(count):
+    header = npy.header(count)
+    assert len(header) % npy.ALIGNMENT == 0
+    assert header.endswith(b"\n")
+    f = io.BytesIO(header)
+    f.name = "numbers.npy"
+    assert npy.read_header(f) == (count, len(header))
+
+
+def test_pack_is_little_endian_int64():
+    assert npy.pack([1, -2]) == b"\x01" + b"\x00" * 7 + b"\xfe" + b"\xff" * 7
+    assert len(npy.pack(NUMBERS)) == len(NUMBERS) * npy.ITEM_SIZE
+
+
+def test_mapped_reads_packed_numbers(tmp_path):
+    path = write_npy(tmp_path / "numbers.npy", NUMBERS)
+    assert npy.count(path) == len(NUMBERS)
+    with npy.mapped(path) as numbers:
+        assert numbers.tolist() == NUMBERS
+
+
+def test_mapped_empty_array(tmp_path):
+    path = write_npy(tmp_path / "numbers.npy", [])
+    with npy.mapped(path) as numbers:
+        assert numbers.tolist() == []
+
+
+def test_read_header_rejects_other_files(tmp_path):
+    path = tmp_path / "numbers.txt"
+    path.write_text("0\n2\n")
+    with open(path, "rb") as f, pytest.raises(ValueError, match="not a version 1.0"):
+        npy.read_header(f)
+
+
+def test_read_header_rejects_other_arrays(tmp_path):
+    path = tmp_path / "numbers.npy"
+    path.write_bytes(npy.header(2).replace(b"<i8", b"<f8"))
+    with open(path, "rb") as f, pytest.raises(ValueError, match="one-dimensional"):
+        npy.read_header(f)
+
+
+def test_numpy_loads_the_files(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    path = write_npy(tmp_path / "numbers.npy", NUMBERS)
+    assert numpy.load(path).tolist() == NUMBERS
@@ -0,0 +1,128 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+TASKS_DIR = os.path.join(os.path.dirname(__file__), "..", "infrastructure", "tasks")
+sys.path.insert(0, os.path.join(TASKS_DIR, "common"))
+sys.path.insert(0, os.path.join(TASKS_DIR, "multi_task"))
+
+from number_writer import (  # noqa: E402
+    build_parser,
+    manifest_path,
+    run,
+    shard_path,
+    split_range,
+    write_numbers,
+    write_sharded,
+)
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [int(line) for line in f]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 1 << 16])
+def test_chunks_write_the_whole_range(tmp_path, chunk_size):
+    destination = tmp_path / "even.txt"
+    log = io.StringIO()
+    written = write_numbers(
+        str(destination), 0, 20, chunk_size=chunk_size, sample=0, log=log
+    )
+    assert read_lines(destination) == list(range(0, 20, 2))
+    assert written == os.path.getsize(destination)
+    assert log.getvalue() == ""
+
+
+def test_every_number_is_echoed_by_default(tmp_path):
+    log = io.StringIO()
+    write_numbers(str(tmp_path / "odd.txt"), 1, 12, chunk_size=2, log=log)
+    assert log.getvalue() == "1\n3\n5\n7\n9\n11\n"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 5, 100])
+def test_sampling_does_not_depend_on_chunks(tmp_path, chunk_size):
+    log = io.StringIO()
+    write_numbers(
+        str(tmp_path / "odd.txt"), 1, 40, chunk_size=chunk_size, sample=3, log=log
+    )
+    assert log.getvalue().split() == [str(number) for number in range(1, 40, 6)]
+
+
+def test_empty_range(tmp_path):
+    destination = tmp_path / "even.txt"
+    assert write_numbers(str(destination), 0, 0, log=io.StringIO()) == 0
+    assert read_lines(destination) == []
+
+
+def test_quiet_run_only_logs_a_summary(tmp_path, capsys, monkeypatch):
+    monkeypatch.setenv("METRICS_SINK", "none")
+    args = build_parser("test").parse_args(
+        ["10", "--volume-root", str(tmp_path), "--quiet", "--chunk-size", "2"]
+    )
+    written = run(args, "even.txt", start=0, label="Even")
+    assert read_lines(tmp_path / "even.txt") == [0, 2, 4, 6, 8]
+    assert written == os.path.getsize(tmp_path / "even.txt")
+    assert not any(line.isdigit() for line in capsys.readouterr().out.splitlines())
+
+
+def test_quiet_and_sample_exclude_each_other():
+    with pytest.raises(SystemExit):
+        build_parser("test").parse_args(["10", "--quiet", "--sample", "2"])
+
+
+def test_split_range_keeps_shards_step_aligned():
+    bounds = split_range(1, 24, 3, 3)
+    # 1, 4, ..., 22 are eight numbers, the first two shards take one more
+    assert bounds == [(1, 10), (10, 19), (19, 24)]
+    shards = [list(range(start, stop, 3)) for start, stop in bounds]
+    assert shards == [[1, 4, 7], [10, 13, 16], [19, 22]]
+
+
+def test_split_range_with_more_shards_than_numbers():
+    assert split_range(0, 6, 2, 5) == [(0, 2), (2, 4), (4, 6)]
+    # An empty range is still one (empty) shard
+    assert split_range(6, 6, 2, 4) == [(6, 6)]
+
+
+def test_parts_past_the_end_are_written_empty(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_SINK", "none")
+    parser = build_parser("test")
+    for index in range(4):
+        args = parser.parse_args(
+            ["5", "--volume-root", str(tmp_path), "--quiet"]
+            + ["--part-index", str(index), "--part-count", "4"]
+        )
+        run(args, "odd.txt", start=1, label="Odd")
+    parts = [read_lines(shard_path(str(tmp_path / "odd.txt"), i)) for i in range(4)]
+    assert parts == [[1], [3], [], []]
+
+
+def test_write_sharded_lists_shards_in_order(tmp_path):
+    file_path = str(tmp_path / "even.txt")
+    written = write_sharded(file_path, 0, 40, shards=3, workers=2, chunk_size=4)
+    with open(manifest_path(file_path)) as f:
+        manifest = json.load(f)
+    assert manifest["format"] == "text"
+    assert [shard["path"] for shard in manifest["shards"]] == [
+        os.path.basename(shard_path(file_path, index)) for index in range(3)
+    ]
+    numbers = [
+        number
+        for shard in manifest["shards"]
+        for number in read_lines(tmp_path / shard["path"])
+    ]
+    assert numbers == list(range(0, 40, 2))
+    assert written == sum(shard["bytes"] for shard in manifest["shards"])
+
+
+def test_write_sharded_writes_the_manifest_last(tmp_path):
+    file_path = str(tmp_path / "even.txt")
+    # A directory where the last shard goes makes its write fail
+    os.mkdir(shard_path(file_path, 2))
+    with pytest.raises(IsADirectoryError):
+        write_sharded(file_path, 0, 40, shards=3, workers=2)
+    assert not os.path.exists(manifest_path(file_path))
@@ -0,0 +1,111 @@
+import os
+import shutil
+import subprocess
+import textwrap
+
+import pytest
+
+READINESS = os.path.join(
+    os.path.dirname(__file__), "..", "airflow", "config", "readiness.sh"
+)
+
+pytestmark = pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+
+
+class Shell:
+    """Runs readiness.sh functions against fake commands put first on PATH."""
+
+    def __init__(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.bin_dir = tmp_path / "bin"
+        self.bin_dir.mkdir()
+
+    def fake(self, name: str, failures: int = 0, status: int = 0) -> None:
+        """Install a ``name`` that fails ``failures`` times, then exits with ``status``."""
+        calls = self.tmp_path / f"{name}.calls"
+        script = self.bin_dir / name
+        script.write_text(
+            textwrap.dedent(
+                f"""\
+                #!/usr/bin/env bash
+                echo "${{*//$'\\n'/ }}" >> {calls}
+                if (($(wc -l < {calls}) <= {failures})); then exit 1; fi
+                exit {status}
+                """
+            )
+        )
+        script.chmod(0o755)
+
+    def calls(self, name: str) -> list[str]:
+        path = self.tmp_path / f"{name}.calls"
+        return path.read_text().splitlines() if path.exists() else []
+
+    def run(self, commands: str, timeout: int = 600) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ["bash", "-c", f"source {READINESS} && {commands}"],
+            env=dict(
+                os.environ,
+                PATH=f"{self.bin_dir}:{os.environ['PATH']}",
+                READINESS_TIMEOUT=str(timeout),
+                READINESS_INTERVAL="0",
+            ),
+            capture_output=True,
+            text=True,
+        )
+
+
+@pytest.fixture
+def shell(tmp_path) -> Shell:
+    return Shell(tmp_path)
+
+
+def test_wait_for_db_retries_until_reachable(shell):
+    shell.fake("airflow", failures=2)
+    result = shell.run("wait_for_db")
+    assert result.returncode == 0
+    assert shell.calls("airflow") == ["db check"] * 3
+    assert "startup: database reachable after" in result.stdout
+
+
+def test_wait_for_db_gives_up_after_the_timeout(shell):
+    shell.fake("airflow", status=1)
+    result = shell.run("wait_for_db", timeout=-1)
+    assert result.returncode == 1
+    assert "startup: gave up waiting for database reachable" in result.stderr
+
+
+def test_wait_for_migrations_waits_for_the_db_first(shell):
+    shell.fake("airflow", failures=1)
+    result = shell.run("wait_for_migrations", timeout=30)
+    assert result.returncode == 0
+    assert shell.calls("airflow") == [
+        "db check",
+        "db check",
+        "db check-migrations --migration-wait-timeout 30",
+    ]
+    assert "startup: migrations applied after" in result.stdout
+
+
+def test_wait_for_migrations_fails_without_migrations(shell):
+    # The database answers, but check-migrations runs out of time
+    result = shell.run("airflow() { [[ $2 == check ]]; } && wait_for_migrations")
+    assert result.returncode == 1
+    assert "startup: database reachable after" in result.stdout
+    assert "migrations applied" not in result.stdout
+
+
+def test_wait_for_migrations_does_not_check_without_a_db(shell):
+    shell.fake("airflow", status=1)
+    result = shell.run("wait_for_migrations", timeout=-1)
+    assert result.returncode == 1
+    assert shell.calls("airflow") == ["db check"]
+
+
+def test_wait_for_broker_retries_until_reachable(shell):
+    shell.fake("python3", failures=1)
+    result = shell.run("wait_for_broker")
+    assert result.returncode == 0
+    calls = shell.calls("python3")
+    assert len(calls) == 2
+    assert "app.connection_for_write()" in calls[-1]
+    assert "startup: broker reachable after" in result.stdout
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+from aws_cdk.assertions import Match
+
+from infrastructure.config import ResultBackendConfig, default_db_config
+from infrastructure.constructs.DatabaseConstruct import DatabaseConstruct
+from tests.conftest import container_definitions, environment, task_config
+
+
+def result_backend(template):
+    """The result backend of the Airflow containers, which must all agree on it."""
+    (backend,) = {
+        json.dumps(environment(container)["AIRFLOW__CELERY__RESULT_BACKEND"])
+        for name, container in container_definitions(template).items()
+        if name in ("webserver", "scheduler", "worker", "triggerer")
+    }
+    return json.loads(backend)
+
+
+def joined(value) -> list:
+    """The parts of an ``Fn::Join`` with an empty delimiter."""
+    delimiter, parts = value["Fn::Join"]
+    assert delimiter == ""
+    return parts
+
+
+def test_metadata_database_by_default(airflow):
+    _, template = airflow(airflow_task_config=task_config())
+    assert (
+        result_backend(template)
+        == "db+postgresql+psycopg2://airflow:password@db:5432/airflow"
+    )
+    template.resource_count_is("AWS::RDS::DBInstance", 0)
+    template.resource_count_is("AWS::ElastiCache::CacheCluster", 0)
+
+
+def test_dedicated_database(stack, network, airflow):
+    metadata_db = DatabaseConstruct(
+        stack,
+        "RDS-PostgreSQL",
+        vpc=network.vpc,
+        default_security_group=network.security_group,
+    )
+    _, template = airflow(
+        db_connection_string=metadata_db.db_connection_string,
+        airflow_task_config=task_config(
+            result_backend_config=ResultBackendConfig(
+                backend="dedicated_database", db_config=default_db_config
+            )
+        ),
+    )
+    # The same db_name on both instances, but never the same RDS identifier
+    identifiers = sorted(
+        (
+            instance["Properties"]["DBInstanceIdentifier"],
+            instance["Properties"]["DBName"],
+        )
+        for instance in template.find_resources("AWS::RDS::DBInstance").values()
+    )
+    assert identifiers == [("airflow", "airflow"), ("airflow-results", "airflow")]
+    result_db = next(
+        logical_id
+        for logical_id in template.find_resources("AWS::RDS::DBInstance")
+        if "ResultBackend" in logical_id
+    )
+    parts = joined(result_backend(template))
+    assert parts[0].startswith("db+postgresql+psycopg2://airflow:")
+    assert {"Fn::GetAtt": [result_db, "Endpoint.Address"]} in parts
+
+
+def test_redis(airflow):
+    _, template = airflow(
+        airflow_task_config=task_config(
+            result_backend_config=ResultBackendConfig(
+                backend="redis", cache_node_type="cache.t4g.small"
+            )
+        )
+    )
+    template.has_resource_properties(
+        "AWS::ElastiCache::CacheCluster",
+        {"Engine": "redis", "CacheNodeType": "cache.t4g.small", "NumCacheNodes": 1},
+    )
+    # Only the Airflow tasks' security group may reach Redis
+    template.has_resource_properties(
+        "AWS::EC2::SecurityGroupIngress",
+        {
+            "FromPort": 6379,
+            "ToPort": 6379,
+            "SourceSecurityGroupId": Match.any_value(),
+        },
+    )
+    redis = next(iter(template.find_resources("AWS::ElastiCache::CacheCluster")))
+    assert joined(result_backend(template)) == [
+        "redis://",
+        {"Fn::GetAtt": [redis, "RedisEndpoint.Address"]},
+        ":",
+        {"Fn::GetAtt": [redis, "RedisEndpoint.Port"]},
+        "/0",
+    ]
+    template.resource_count_is("AWS::RDS::DBInstance", 0)
+
+
+def test_dedicated_database_needs_a_db_config():
+    with pytest.raises(ValueError, match="needs a db_config"):
+        ResultBackendConfig(backend="dedicated_database")
@@ -0,0 +1,176 @@
+import pytest
+from aws_cdk import aws_ecs as ecs
+from aws_cdk.assertions import Match, Template
+
+from infrastructure.config import AutoScalingConfig, BrokerConfig
+from infrastructure.constructs.BrokerConstruct import BrokerConstruct
+from infrastructure.constructs.ServiceConstruct import ServiceConstruct
+
+
+@pytest.fixture
+def worker_service(stack, network):
+    """Builds a worker ServiceConstruct and returns the stack's template."""
+
+    def build(autoscaling_config: AutoScalingConfig, **kwargs) -> Template:
+        task_definition = ecs.FargateTaskDefinition(
+            stack, "WorkerTask", cpu=1024, memory_limit_mib=2048
+        )
+        task_definition.add_container(
+            "worker", image=ecs.ContainerImage.from_registry("worker")
+        )
+        ServiceConstruct(
+            stack,
+            "WorkerService",
+            vpc=network.vpc,
+            default_security_group=network.security_group,
+            cluster=network.cluster,
+            task_definition=task_definition,
+            broker=BrokerConstruct(
+                stack, "Broker", broker_config=BrokerConfig(queues=["default", "gpu"])
+            ),
+            is_worker_service=True,
+            autoscaling_config=autoscaling_config,
+            **kwargs,
+        )
+        return Template.from_stack(stack)
+
+    return build
+
+
+def test_utilization_scaling_tracks_cpu_and_memory(worker_service):
+    template = worker_service(AutoScalingConfig(min_capacity=1, max_capacity=5))
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {"MinCapacity": 1, "MaxCapacity": 5},
+    )
+    for metric in (
+        "ECSServiceAverageCPUUtilization",
+        "ECSServiceAverageMemoryUtilization",
+    ):
+        template.has_resource_properties(
+            "AWS::ApplicationAutoScaling::ScalingPolicy",
+            {
+                "PolicyType": "TargetTrackingScaling",
+                "TargetTrackingScalingPolicyConfiguration": Match.object_like(
+                    {"PredefinedMetricSpecification": {"PredefinedMetricType": metric}}
+                ),
+            },
+        )
+    template.resource_properties_count_is(
+        "AWS::ApplicationAutoScaling::ScalingPolicy", {"PolicyType": "StepScaling"}, 0
+    )
+
+
+def test_queue_depth_scaling_steps_on_backlog_per_worker(worker_service):
+    template = worker_service(
+        AutoScalingConfig(
+            min_capacity=0,
+            max_capacity=8,
+            scaling_mode="queue_depth",
+            backlog_per_worker=10,
+        )
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {"MinCapacity": 0, "MaxCapacity": 8},
+    )
+    template.resource_properties_count_is(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {"PolicyType": "TargetTrackingScaling"},
+        0,
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalingPolicy",
+        {
+            "PolicyType": "StepScaling",
+            "StepScalingPolicyConfiguration": Match.object_like(
+                {
+                    "AdjustmentType": "ChangeInCapacity",
+                    "StepAdjustments": Match.array_with(
+                        [
+                            Match.object_like(
+                                {"MetricIntervalLowerBound": 20, "ScalingAdjustment": 3}
+                            )
+                        ]
+                    ),
+                }
+            ),
+        },
+    )
+    policies = {
+        step["ScalingAdjustment"]: step
+        for policy in template.find_resources(
+            "AWS::ApplicationAutoScaling::ScalingPolicy"
+        ).values()
+        for step in policy["Properties"]["StepScalingPolicyConfiguration"][
+            "StepAdjustments"
+        ]
+    }
+    # Relative to the alarm thresholds below: scale in at or under 5, out from 10 and 30
+    assert policies == {
+        -1: {"MetricIntervalUpperBound": 0, "ScalingAdjustment": -1},
+        1: {
+            "MetricIntervalLowerBound": 0,
+            "MetricIntervalUpperBound": 20,
+            "ScalingAdjustment": 1,
+        },
+        3: {"MetricIntervalLowerBound": 20, "ScalingAdjustment": 3},
+    }
+    # One alarm per direction, both on the backlog per running worker
+    alarms = template.find_resources("AWS::CloudWatch::Alarm")
+    assert sorted(
+        (
+            alarm["Properties"]["ComparisonOperator"],
+            alarm["Properties"]["Threshold"],
+            alarm["Properties"]["EvaluationPeriods"],
+        )
+        for alarm in alarms.values()
+    ) == [
+        ("GreaterThanOrEqualToThreshold", 10, 2),
+        ("LessThanOrEqualToThreshold", 5, 2),
+    ]
+    for alarm in alarms.values():
+        metrics = {query["Id"]: query for query in alarm["Properties"]["Metrics"]}
+        # A service without tasks may have no RunningTaskCount datapoints at all
+        assert metrics["expr_1"]["Expression"] == (
+            "IF(FILL(running, 0) > 0, (visible + in_flight) / FILL(running, 0), "
+            "(visible + in_flight) * 10)"
+        )
+        assert (
+            metrics["visible"]["MetricStat"]["Metric"]["MetricName"]
+            == "ApproximateNumberOfMessagesVisible"
+        )
+        assert (
+            metrics["running"]["MetricStat"]["Metric"]["Namespace"]
+            == "ECS/ContainerInsights"
+        )
+
+
+def test_queue_depth_scaling_watches_the_pool_queue(worker_service):
+    template = worker_service(
+        AutoScalingConfig(min_capacity=0, max_capacity=2, scaling_mode="queue_depth"),
+        celery_queue="gpu",
+    )
+    gpu_queue = next(
+        logical_id
+        for logical_id in template.find_resources("AWS::SQS::Queue")
+        if logical_id.startswith("BrokergpuQueue")
+    )
+    for alarm in template.find_resources("AWS::CloudWatch::Alarm").values():
+        metrics = {query["Id"]: query for query in alarm["Properties"]["Metrics"]}
+        dimensions = metrics["visible"]["MetricStat"]["Metric"]["Dimensions"]
+        assert dimensions == [
+            {"Name": "QueueName", "Value": {"Fn::GetAtt": [gpu_queue, "QueueName"]}}
+        ]
+
+
+def test_queue_depth_scaling_needs_a_broker_queue(worker_service):
+    with pytest.raises(ValueError, match="'missing' is not in the broker config"):
+        worker_service(
+            AutoScalingConfig(
+                min_capacity=0,
+                max_capacity=2,
+                scaling_mode="queue_depth",
+                queue_name="missing",
+            )
+        )
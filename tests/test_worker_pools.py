@@ -0,0 +1,126 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from infrastructure.config import AutoScalingConfig, WorkerPoolConfig
+from tests.conftest import environment, resources, task_config
+
+WORKER_ENTRY = os.path.join(
+    os.path.dirname(__file__), "..", "airflow", "config", "worker_entry.sh"
+)
+
+POOLS = [
+    WorkerPoolConfig(
+        name="HighMemory",
+        queue="high_memory",
+        cpu=2048,
+        memory=16384,
+        concurrency=2,
+        autoscaling_config=AutoScalingConfig(min_capacity=0, max_capacity=4),
+    ),
+    WorkerPoolConfig(
+        name="Io",
+        queue="io",
+        cpu=1024,
+        memory=2048,
+        autoscaling_config=AutoScalingConfig(min_capacity=1, max_capacity=10),
+    ),
+]
+
+
+def pool_resource(template, type: str, pool: WorkerPoolConfig) -> dict:
+    """The one resource of ``type`` the AirflowConstruct created for ``pool``."""
+    (resource,) = [
+        resource
+        for logical_id, resource in resources(template, type).items()
+        if logical_id.startswith(f"AirflowService{pool.name}Worker")
+    ]
+    return resource["Properties"]
+
+
+def pool_worker(template, pool: WorkerPoolConfig) -> dict:
+    task = pool_resource(template, "AWS::ECS::TaskDefinition", pool)
+    (worker,) = [
+        container
+        for container in task["ContainerDefinitions"]
+        if container["Name"] == "worker"
+    ]
+    return worker
+
+
+def test_one_service_per_pool(airflow):
+    construct, template = airflow(airflow_task_config=task_config(worker_pools=POOLS))
+    assert {"HighMemoryWorker", "IoWorker"} <= set(construct.services)
+    # The combined Airflow service plus one per pool
+    template.resource_count_is("AWS::ECS::Service", 1 + len(POOLS))
+    for pool in POOLS:
+        service = pool_resource(template, "AWS::ECS::Service", pool)
+        assert "LoadBalancers" not in service
+
+
+@pytest.mark.parametrize("pool", POOLS, ids=lambda pool: pool.name)
+def test_pool_worker_consumes_its_queue(airflow, pool):
+    _, template = airflow(airflow_task_config=task_config(worker_pools=POOLS))
+    task = pool_resource(template, "AWS::ECS::TaskDefinition", pool)
+    assert (task["Cpu"], task["Memory"]) == (str(pool.cpu), str(pool.memory))
+    assert environment(pool_worker(template, pool))["CELERY_QUEUES"] == pool.queue
+    target = pool_resource(
+        template, "AWS::ApplicationAutoScaling::ScalableTarget", pool
+    )
+    assert (target["MinCapacity"], target["MaxCapacity"]) == (
+        pool.autoscaling_config.min_capacity,
+        pool.autoscaling_config.max_capacity,
+    )
+
+
+def test_pool_concurrency_overrides_tuning(airflow):
+    _, template = airflow(airflow_task_config=task_config(worker_pools=POOLS))
+    worker = environment(pool_worker(template, POOLS[0]))
+    assert worker["AIRFLOW__CELERY__WORKER_CONCURRENCY"] == "2"
+
+
+def test_default_worker_consumes_every_queue(airflow):
+    _, template = airflow(airflow_task_config=task_config(worker_pools=POOLS))
+    workers = [
+        container
+        for task in resources(template, "AWS::ECS::TaskDefinition").values()
+        for container in task["Properties"]["ContainerDefinitions"]
+        if container["Name"] == "worker"
+    ]
+    assert len(workers) == 1 + len(POOLS)
+    assert sum("CELERY_QUEUES" not in environment(worker) for worker in workers) == 1
+
+
+@pytest.mark.skipif(shutil.which("bash") is None, reason="needs bash")
+@pytest.mark.parametrize(
+    "queues, command",
+    [
+        (None, "celery worker --pid /tmp/airflow-worker.pid"),
+        (
+            "high_memory",
+            "celery worker --pid /tmp/airflow-worker.pid --queues high_memory",
+        ),
+    ],
+)
+def test_worker_entry_passes_queues_only_when_set(tmp_path, queues, command):
+    # Run the entry script with its readiness checks stubbed and a fake airflow on PATH
+    readiness = tmp_path / "readiness.sh"
+    readiness.write_text(
+        "wait_for_migrations() { :; }\nwait_for_broker() { :; }\nstartup_mark() { :; }\n"
+    )
+    entry = tmp_path / "worker_entry.sh"
+    with open(WORKER_ENTRY) as f:
+        entry.write_text(f.read().replace("/readiness.sh", str(readiness)))
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    airflow = bin_dir / "airflow"
+    airflow.write_text(f'#!/usr/bin/env bash\necho "$*" > {tmp_path}/airflow.args\n')
+    airflow.chmod(0o755)
+    env = dict(os.environ, PATH=f"{bin_dir}:{os.environ['PATH']}")
+    env.pop("CELERY_QUEUES", None)
+    if queues is not None:
+        env["CELERY_QUEUES"] = queues
+    subprocess.run(["bash", str(entry)], env=env, check=True, capture_output=True)
+    assert (tmp_path / "airflow.args").read_text().strip() == command